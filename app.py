@@ -1,24 +1,165 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from datetime import datetime
+import gzip
+import logging
+import re
+import html
+import os
+from datetime import datetime, timezone
 import gspread
+import httplib2
 from oauth2client.service_account import ServiceAccountCredentials
 import time
+import threading
+import hashlib
+import sqlite3
+import uuid
+import weakref
+import tempfile
+import zipfile
+import multiprocessing
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import io
 import base64
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.units import inch
-from reportlab.lib import colors
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from pdf_reports import ReportStyleRegistry, build_property_pdf, get_report_style_registry, render_pdf_reports
+
+try:
+    import pyarrow  # noqa: F401 - enables Parquet sheet snapshots
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 # Hardcoded URLs
 GOOGLE_SHEET_URL = "https://docs.google.com/spreadsheets/d/1BWz_FnYdzZyyl4WafSgoZV9rLHC91XOjstDcgwn_k6Y/edit?usp="
 N8N_WEBHOOK_URL = "https://your-n8n-instance.com/webhook/real-estate-address"  # Replace with actual webhook URL
+GOOGLE_SHEET_ID = "1BWz_FnYdzZyyl4WafSgoZV9rLHC91XOjstDcgwn_k6Y"
+
+# Sheet data cache settings
+SHEET_CACHE_TTL_SECONDS = 300  # Shared across reruns and sessions
+SHEET_DELTA_SYNC_ENABLED = True  # Fetch only appended/changed rows once a full pull is cached
+SHEET_FULL_RESYNC_SECONDS = 15 * 60  # Force a full pull once the last one is this old (bounds missed edits)
+
+# Sheet snapshot settings
+SHEET_SNAPSHOT_DIR = os.path.join(".cache", "sheet_snapshots")  # Last good pull, served on cold start
+
+# Data index settings
+INDEX_REGISTRY_MAX_FRAMES = 8  # Data versions whose search/sort indexes are kept in memory
+SEARCH_INDEX_COLUMNS = ['formattedAddress', 'city', 'state', 'propertyType']
+PROPERTY_PAGE_SIZE_OPTIONS = [10, 20, 50, 100]  # Property cards rendered per page
+SORT_COLUMN_MAP = {
+    "Price": "price",
+    "City": "city",
+    "Square Footage": "squareFootage",
+    "Year Built": "yearBuilt"
+}
+
+# Sheets client pool settings
+SHEETS_TOKEN_REFRESH_MARGIN_SECONDS = 300  # Refresh OAuth tokens this long before they expire
+SHEETS_TOKEN_REFRESH_BACKOFF_SECONDS = 60  # Minimum gap between proactive refresh attempts per client
+
+# Sheet write buffer settings
+SHEET_WRITE_BUFFER_SIZE = 100  # Flush once this many rows/cells are buffered
+SHEET_WRITE_BUFFER_MAX_AGE = 5.0  # Flush once the oldest buffered write is this many seconds old
+
+# Webhook transport settings
+WEBHOOK_POOL_CONNECTIONS = 10  # Number of hosts to keep connection pools for
+WEBHOOK_POOL_MAXSIZE = 20  # Keep-alive connections per host
+WEBHOOK_POOL_BLOCK = True  # Wait for a free connection rather than exceed the per-host limit
+
+# Webhook circuit breaker and rate limit settings
+WEBHOOK_BREAKER_WINDOW_SECONDS = 60  # Rolling window for error rate and latency
+WEBHOOK_BREAKER_MIN_CALLS = 5  # Calls needed in the window before the breaker can trip
+WEBHOOK_BREAKER_ERROR_RATE = 0.5  # Trip when this share of calls fail
+WEBHOOK_BREAKER_SLOW_CALL_SECONDS = 10.0  # Calls slower than this count as slow
+WEBHOOK_BREAKER_SLOW_CALL_RATE = 0.8  # Trip when this share of calls are slow
+WEBHOOK_BREAKER_OPEN_SECONDS = 30  # How long to fail fast before sending a probe
+WEBHOOK_BREAKER_PROBE_SECONDS = 30  # A probe unanswered for this long is abandoned and another allowed
+WEBHOOK_RATE_LIMIT = (25.0, 50)  # Default (requests per second, burst) per webhook URL
+WEBHOOK_RATE_LIMITS = {}  # Per-URL overrides: {webhook_url: (requests per second, burst)}
+WEBHOOK_RATE_LIMIT_MAX_WAIT = 5.0  # Seconds to wait for a token before failing fast
+
+# Webhook idempotency settings
+WEBHOOK_IDEMPOTENCY_TTL_SECONDS = 3600  # Treat a resend of the same address within this window as a duplicate
+WEBHOOK_IDEMPOTENCY_MAX_KEYS = 10000  # Delivered keys remembered (least recently used are dropped)
+WEBHOOK_IN_FLIGHT_WAIT = 30.0  # Seconds to wait on an identical delivery already in flight before giving up
+WEBHOOK_METRICS_MAX_SAMPLES = 5000  # Most recent attempt latencies kept for percentiles
+
+# Webhook batch envelope settings
+WEBHOOK_BATCH_SIZE = 50  # Addresses per batch envelope
+WEBHOOK_BATCH_LINGER_SECONDS = 0.5  # Max wait for a partial batch to fill before it is sent
+WEBHOOK_BATCH_GZIP = True  # gzip batch bodies (Content-Encoding: gzip)
+WEBHOOK_GZIP_MIN_BYTES = 1024  # Smaller bodies are sent uncompressed
+
+# Bulk address import settings
+BULK_IMPORT_MAX_WORKERS = 8  # Concurrent webhook deliveries; keep <= WEBHOOK_POOL_MAXSIZE
+ADDRESS_FIELDS = ['addressLine1', 'addressLine2', 'city', 'state', 'zipCode', 'county', 'propertyType', 'notes']
+USPS_STATE_CODES = frozenset([
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY',
+    'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND',
+    'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+    'DC', 'PR', 'VI', 'GU', 'AS', 'MP', 'AA', 'AE', 'AP'
+])
+USPS_STATE_NAMES = {
+    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR', 'CALIFORNIA': 'CA', 'COLORADO': 'CO',
+    'CONNECTICUT': 'CT', 'DELAWARE': 'DE', 'FLORIDA': 'FL', 'GEORGIA': 'GA', 'HAWAII': 'HI', 'IDAHO': 'ID',
+    'ILLINOIS': 'IL', 'INDIANA': 'IN', 'IOWA': 'IA', 'KANSAS': 'KS', 'KENTUCKY': 'KY', 'LOUISIANA': 'LA',
+    'MAINE': 'ME', 'MARYLAND': 'MD', 'MASSACHUSETTS': 'MA', 'MICHIGAN': 'MI', 'MINNESOTA': 'MN',
+    'MISSISSIPPI': 'MS', 'MISSOURI': 'MO', 'MONTANA': 'MT', 'NEBRASKA': 'NE', 'NEVADA': 'NV',
+    'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ', 'NEW MEXICO': 'NM', 'NEW YORK': 'NY', 'NORTH CAROLINA': 'NC',
+    'NORTH DAKOTA': 'ND', 'OHIO': 'OH', 'OKLAHOMA': 'OK', 'OREGON': 'OR', 'PENNSYLVANIA': 'PA',
+    'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC', 'SOUTH DAKOTA': 'SD', 'TENNESSEE': 'TN', 'TEXAS': 'TX',
+    'UTAH': 'UT', 'VERMONT': 'VT', 'VIRGINIA': 'VA', 'WASHINGTON': 'WA', 'WEST VIRGINIA': 'WV',
+    'WISCONSIN': 'WI', 'WYOMING': 'WY', 'DISTRICT OF COLUMBIA': 'DC', 'PUERTO RICO': 'PR',
+    'VIRGIN ISLANDS': 'VI', 'US VIRGIN ISLANDS': 'VI', 'GUAM': 'GU', 'AMERICAN SAMOA': 'AS',
+    'NORTHERN MARIANA ISLANDS': 'MP'
+}
+# Address patterns are plain strings so pandas string methods can hand them to the native
+# regex kernels of Arrow-backed columns; the re module caches them for the single-address path.
+# 4-5 digit ZIP (spreadsheets drop one leading zero) with an optional ZIP+4, dash optional
+ZIP_CODE_PATTERN = r'^([0-9]{4,5})(?:[-\s]?([0-9]{4}))?$'
+NORMALIZED_ZIP_PATTERN = r'[0-9]{5}(?:-[0-9]{4})?'
+WHITESPACE_PATTERN = r'\s+'
+STATE_PUNCTUATION_PATTERN = r'[.,]'
+ADDRESS_CSV_COLUMN_ALIASES = {
+    'addressline1': 'addressLine1', 'address': 'addressLine1', 'street': 'addressLine1', 'streetaddress': 'addressLine1',
+    'addressline2': 'addressLine2', 'unit': 'addressLine2', 'apt': 'addressLine2',
+    'city': 'city', 'state': 'state',
+    'zipcode': 'zipCode', 'zip': 'zipCode', 'postalcode': 'zipCode',
+    'county': 'county', 'propertytype': 'propertyType', 'notes': 'notes'
+}
+
+# Webhook outbox settings
+WEBHOOK_OUTBOX_PATH = os.path.join(".cache", "webhook_outbox.sqlite3")
+WEBHOOK_OUTBOX_MAX_ATTEMPTS = 8  # Give up on a delivery after this many attempts
+WEBHOOK_OUTBOX_BASE_BACKOFF = 2.0  # Seconds before the first retry, doubled per attempt
+WEBHOOK_OUTBOX_MAX_BACKOFF = 300.0  # Upper bound on the retry delay
+WEBHOOK_OUTBOX_POLL_INTERVAL = 1.0  # Seconds between checks for due deliveries
+
+# Report artifact cache settings
+REPORT_GENERATOR_VERSION = "1.1"  # Bump when report output changes so cached artifacts are not reused
+REPORT_CACHE_DIR = os.path.join(".cache", "reports")
+REPORT_CACHE_MEMORY_BYTES = 64 * 1024 * 1024  # In-process tier budget
+REPORT_CACHE_DISK_BYTES = 512 * 1024 * 1024  # On-disk tier budget
+REPORT_CACHE_DISK_EVICT_TO = 0.9  # Share of the disk budget left after an eviction pass
+REPORT_BATCH_MAX_WORKERS = os.cpu_count() or 1  # Processes used for batch PDF export
+REPORT_BATCH_CHUNK_SIZE = 20  # Reports rendered per worker task
+REPORT_BATCH_CHUNK_TIMEOUT = 120.0  # Seconds allowed per chunk before the pool is abandoned
+REPORT_EXPORT_DIR = os.path.join(".cache", "exports")  # Prepared ZIP archives awaiting download
+REPORT_EXPORT_MAX_AGE = 6 * 60 * 60  # Seconds before an abandoned archive is swept
 
 # Configure page
 st.set_page_config(
@@ -128,20 +269,739 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Sheet Data Cache Class
+class SheetDataCache:
+    """Process-wide TTL cache for worksheet data keyed by sheet ID and worksheet"""
+    
+    def __init__(self, ttl: float = SHEET_CACHE_TTL_SECONDS):
+        """Initialize with a time-to-live in seconds"""
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(sheet_id: str, worksheet_name: str = None) -> tuple:
+        """Build the cache key for a worksheet"""
+        return (sheet_id, worksheet_name or "")
+    
+    def get(self, sheet_id: str, worksheet_name: str = None) -> Optional[pd.DataFrame]:
+        """Return cached data if present and not expired
+        
+        The frame is a shallow copy of the cached one: callers may add, drop or
+        rename columns on it freely, but must copy() before editing values in place
+        (with pandas copy-on-write such edits copy automatically; without it they
+        would reach the shared cached frame).
+        """
+        key = self.make_key(sheet_id, worksheet_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry['loaded_at'] < self.ttl:
+                self.hits += 1
+                return entry['data'].copy(deep=False)
+            self.misses += 1
+            return None
+    
+    def get_stale_entry(self, sheet_id: str, worksheet_name: str = None) -> Optional[Dict[str, Any]]:
+        """Return the cached entry regardless of age (used as the base for delta syncs)
+        
+        'data' is a shallow copy, under the same contract as get().
+        """
+        key = self.make_key(sheet_id, worksheet_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return {
+                'data': entry['data'].copy(deep=False),
+                'loaded_at': entry['loaded_at'],
+                'sync': dict(entry['sync'], dirty_rows=set(entry['sync']['dirty_rows'])) if entry['sync'] else None,
+                'generation': entry['generation']
+            }
+    
+    def set(self, sheet_id: str, worksheet_name: str, data: pd.DataFrame,
+            sync_state: Optional[Dict[str, Any]] = None, mode: str = "full", base: Optional[Dict[str, Any]] = None):
+        """Store freshly loaded data together with its delta-sync state
+        
+        base is the get_stale_entry() result the sync started from. If the entry was
+        marked stale after that, the rows dirtied since are carried into the new
+        sync state and the entry stays stale, so the next load picks them up.
+        """
+        key = self.make_key(sheet_id, worksheet_name)
+        with self._lock:
+            current = self._entries.get(key)
+            generation = current['generation'] if current is not None else 0
+            loaded_at = time.time()
+            if current is not None and base is not None and generation != base['generation']:
+                loaded_at = 0
+                if sync_state is not None and current['sync']:
+                    consumed = base['sync']['dirty_rows'] if base['sync'] else set()
+                    sync_state = dict(sync_state, dirty_rows=set(sync_state['dirty_rows'])
+                                      | (current['sync']['dirty_rows'] - consumed))
+            self._entries[key] = {'data': data, 'loaded_at': loaded_at, 'sync': sync_state, 'generation': generation}
+            if mode == "delta":
+                self.delta_syncs += 1
+            else:
+                self.full_syncs += 1
+    
+    def mark_stale(self, sheet_id: str, worksheet_name: str = None, dirty_rows: List[int] = None):
+        """Expire cached data but keep it as the base for the next delta sync"""
+        key = self.make_key(sheet_id, worksheet_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['loaded_at'] = 0
+            entry['generation'] += 1
+            if dirty_rows and entry['sync']:
+                entry['sync']['dirty_rows'].update(dirty_rows)
+    
+    def invalidate(self, sheet_id: str = None, worksheet_name: str = None):
+        """Drop cached data for one worksheet, one spreadsheet, or everything"""
+        with self._lock:
+            if sheet_id is None:
+                self._entries.clear()
+            elif worksheet_name is None:
+                for key in [k for k in self._entries if k[0] == sheet_id]:
+                    del self._entries[key]
+            else:
+                self._entries.pop(self.make_key(sheet_id, worksheet_name), None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total > 0 else 0,
+                'entries': len(self._entries),
+                'full_syncs': self.full_syncs,
+                'delta_syncs': self.delta_syncs,
+                'ttl_seconds': self.ttl
+            }
+
+@st.cache_resource
+def get_sheet_data_cache() -> SheetDataCache:
+    """Get the sheet data cache shared by all sessions"""
+    return SheetDataCache(ttl=SHEET_CACHE_TTL_SECONDS)
+
+# Sheets Client Pool Class
+class SheetsClientPool:
+    """Shares authenticated gspread clients and opened sheet handles across sessions
+    
+    Clients are keyed by a fingerprint of the service account credentials, so every
+    session that uploads the same key file reuses one OAuth token and one set of
+    spreadsheet/worksheet handles.
+    """
+    
+    SCOPE = [
+        'https://spreadsheets.google.com/feeds',
+        'https://www.googleapis.com/auth/drive'
+    ]
+    
+    def __init__(self, refresh_margin: float = SHEETS_TOKEN_REFRESH_MARGIN_SECONDS,
+                 refresh_backoff: float = SHEETS_TOKEN_REFRESH_BACKOFF_SECONDS):
+        """Initialize with the proactive token refresh margin and retry backoff in seconds"""
+        self.refresh_margin = refresh_margin
+        self.refresh_backoff = refresh_backoff
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            'authentications': 0,
+            'token_refreshes': 0,
+            'token_refresh_failures': 0,
+            'handle_hits': 0,
+            'handle_misses': 0
+        }
+    
+    @staticmethod
+    def credentials_fingerprint(credentials_dict: Dict[str, Any]) -> str:
+        """Fingerprint a service account key without keeping the key material as the key"""
+        identity = "|".join(str(credentials_dict.get(field, '')) for field in
+                            ('client_email', 'private_key_id', 'private_key'))
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+    
+    def _get_entry(self, credentials_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Get (or create) the pooled client entry for a set of credentials"""
+        fingerprint = self.credentials_fingerprint(credentials_dict)
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None:
+                creds = ServiceAccountCredentials.from_json_keyfile_dict(credentials_dict, self.SCOPE)
+                entry = {
+                    'credentials': creds,
+                    'client': gspread.authorize(creds),
+                    'spreadsheets': {},
+                    'worksheets': {},
+                    'lock': threading.Lock(),
+                    'refresh_lock': threading.Lock(),
+                    'refresh_attempted_at': 0.0
+                }
+                self._entries[fingerprint] = entry
+                self.counters['authentications'] += 1
+        self._refresh_if_needed(entry)
+        return entry
+    
+    def _count(self, counter: str):
+        """Increment a pool counter"""
+        with self._lock:
+            self.counters[counter] += 1
+    
+    def _needs_refresh(self, entry: Dict[str, Any]) -> bool:
+        """Whether the token is unknown or close to expiry and no attempt was made within the backoff"""
+        expiry = getattr(entry['credentials'], 'token_expiry', None)
+        if expiry is not None:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)  # oauth2client uses naive UTC
+            if (expiry - now).total_seconds() > self.refresh_margin:
+                return False
+        return time.monotonic() - entry['refresh_attempted_at'] >= self.refresh_backoff
+    
+    def _refresh_if_needed(self, entry: Dict[str, Any]):
+        """Refresh the access token before it expires instead of on the first failing request
+        
+        At most one session refreshes a client at a time and the others go ahead
+        without waiting; after an attempt (failed, or leaving no expiry) the next is
+        not made for refresh_backoff seconds.
+        """
+        if not self._needs_refresh(entry) or not entry['refresh_lock'].acquire(blocking=False):
+            return
+        try:
+            # Another session may have refreshed before we got the lock
+            if not self._needs_refresh(entry):
+                return
+            entry['refresh_attempted_at'] = time.monotonic()
+            try:
+                entry['credentials'].refresh(httplib2.Http())
+                self._count('token_refreshes')
+            except Exception:
+                # The client still refreshes on demand if the proactive refresh fails
+                self._count('token_refresh_failures')
+        finally:
+            entry['refresh_lock'].release()
+    
+    def get_client(self, credentials_dict: Dict[str, Any]):
+        """Get the shared authorized gspread client for these credentials"""
+        return self._get_entry(credentials_dict)['client']
+    
+    def open_worksheet(self, credentials_dict: Dict[str, Any], sheet_id: str, worksheet_name: str = None):
+        """Get a cached worksheet handle, opening the spreadsheet only on first use"""
+        entry = self._get_entry(credentials_dict)
+        key = (sheet_id, worksheet_name or "")
+        with entry['lock']:
+            worksheet = entry['worksheets'].get(key)
+            if worksheet is not None:
+                self._count('handle_hits')
+                return worksheet
+            
+            self._count('handle_misses')
+            spreadsheet = entry['spreadsheets'].get(sheet_id)
+            if spreadsheet is None:
+                spreadsheet = entry['client'].open_by_key(sheet_id)
+                entry['spreadsheets'][sheet_id] = spreadsheet
+            worksheet = spreadsheet.worksheet(worksheet_name) if worksheet_name else spreadsheet.sheet1
+            entry['worksheets'][key] = worksheet
+            return worksheet
+    
+    def evict_handles(self, credentials_dict: Dict[str, Any], sheet_id: str = None):
+        """Forget cached spreadsheet/worksheet handles so they are reopened on next use"""
+        fingerprint = self.credentials_fingerprint(credentials_dict)
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+        if entry is None:
+            return
+        with entry['lock']:
+            if sheet_id is None:
+                entry['spreadsheets'].clear()
+                entry['worksheets'].clear()
+            else:
+                entry['spreadsheets'].pop(sheet_id, None)
+                for key in [k for k in entry['worksheets'] if k[0] == sheet_id]:
+                    del entry['worksheets'][key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get pool counters"""
+        with self._lock:
+            return {**self.counters, 'clients': len(self._entries)}
+
+@st.cache_resource
+def get_sheets_client_pool() -> SheetsClientPool:
+    """Get the gspread client pool shared by all sessions"""
+    return SheetsClientPool()
+
+# Sheet Snapshot Store Class
+class SheetSnapshotStore:
+    """Persists the last good worksheet pull as a typed columnar file on local disk
+    
+    Snapshots are Parquet files and need pyarrow (see get_sheet_snapshot_store).
+    Writes go to a temporary file first so a crash never leaves a half-written
+    snapshot behind.
+    """
+    
+    def __init__(self, directory: str = SHEET_SNAPSHOT_DIR):
+        """Initialize with the snapshot directory"""
+        self.directory = directory
+        self.extension = ".parquet"
+        self._lock = threading.Lock()
+    
+    def _path(self, sheet_id: str, worksheet_name: str = None) -> str:
+        """Build the snapshot file path for a worksheet"""
+        name = hashlib.sha1(f"{sheet_id}|{worksheet_name or ''}".encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.directory, name + self.extension)
+    
+    @staticmethod
+    def _to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+        """Give every column a single type (sheet columns often mix numbers and blanks)
+        
+        Columns whose non-blank values are all numeric become numeric, with blanks as
+        NaN; only columns that really mix text with other values are stringified.
+        """
+        typed = df.copy()
+        for col in typed.columns:
+            if typed[col].dtype != object:
+                continue
+            inferred = pd.api.types.infer_dtype(typed[col], skipna=True)
+            if inferred in ('string', 'empty'):
+                continue
+            values = typed[col]
+            if inferred == 'boolean':
+                typed[col] = values.astype('boolean')
+                continue
+            blank = values.isna() | (values.astype(str).str.strip() == '')
+            numeric = pd.to_numeric(values.where(~blank), errors='coerce')
+            has_bools = values[~blank].map(lambda value: isinstance(value, (bool, np.bool_))).any()
+            if not has_bools and numeric[~blank].notna().all():
+                typed[col] = numeric
+            else:
+                typed[col] = values.astype(str)
+        return typed
+    
+    @staticmethod
+    def _from_columnar(typed: pd.DataFrame) -> pd.DataFrame:
+        """Undo the blank-to-NaN step of _to_columnar so snapshots match live pulls
+        
+        Numeric columns with missing values go back to the sheet's mixed form: blanks
+        as '' and whole numbers as ints, as get_all_records returns them.
+        """
+        df = typed.copy()
+        for col in df.columns:
+            if not pd.api.types.is_float_dtype(df[col]) or not df[col].isna().any():
+                continue
+            df[col] = [
+                '' if pd.isna(value) else int(value) if value.is_integer() else value
+                for value in df[col].tolist()
+            ]
+        return df
+    
+    def save(self, sheet_id: str, worksheet_name: str, df: pd.DataFrame) -> bool:
+        """Write a snapshot of the data"""
+        path = self._path(sheet_id, worksheet_name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with self._lock:
+                self._to_columnar(df).to_parquet(tmp_path, index=True)
+                os.replace(tmp_path, path)
+            return True
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    
+    def load(self, sheet_id: str, worksheet_name: str = None) -> Optional[Tuple[pd.DataFrame, float]]:
+        """Load the snapshot and the time it was written, if one exists"""
+        path = self._path(sheet_id, worksheet_name)
+        try:
+            if not os.path.exists(path):
+                return None
+            saved_at = os.path.getmtime(path)
+            return self._from_columnar(pd.read_parquet(path)), saved_at
+        except Exception:
+            return None
+
+@st.cache_resource
+def get_sheet_snapshot_store() -> Optional[SheetSnapshotStore]:
+    """Get the on-disk sheet snapshot store, or None (snapshots disabled) without pyarrow"""
+    if not PARQUET_AVAILABLE:
+        logger.warning("pyarrow is not installed; sheet snapshots are disabled")
+        return None
+    return SheetSnapshotStore()
+
+# Sheet Refresher Class
+class SheetRefresher:
+    """Runs background worksheet refreshes, at most one in flight per worksheet"""
+    
+    def __init__(self):
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self.last_errors = {}
+        self.completed = 0
+    
+    def is_refreshing(self, key: tuple) -> bool:
+        """Check whether a refresh for this worksheet is running"""
+        with self._lock:
+            return key in self._in_flight
+    
+    def last_error(self, key: tuple) -> Optional[str]:
+        """Error from the last refresh of this worksheet, if it failed"""
+        with self._lock:
+            return self.last_errors.get(key)
+    
+    def refresh_async(self, key: tuple, refresh_fn) -> bool:
+        """Start refresh_fn in a daemon thread unless one is already running for key"""
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+        
+        def run():
+            try:
+                error = refresh_fn()
+            except Exception as e:
+                error = str(e)
+            with self._lock:
+                if error:
+                    self.last_errors[key] = error
+                else:
+                    self.last_errors.pop(key, None)
+                    self.completed += 1
+                self._in_flight.discard(key)
+        
+        threading.Thread(target=run, name=f"sheet-refresh-{key[0][:8]}", daemon=True).start()
+        return True
+
+@st.cache_resource
+def get_sheet_refresher() -> SheetRefresher:
+    """Get the background sheet refresher shared by all sessions"""
+    return SheetRefresher()
+
+# Data Index Registry Class
+class DataIndexRegistry:
+    """Keeps indexes built over a DataFrame for as long as that data version is in use
+    
+    Cached sheet data is never mutated in place; every sync produces a new DataFrame.
+    Indexes are therefore keyed by DataFrame identity, and an entry is dropped once
+    its DataFrame is garbage collected or falls out of the LRU window.
+    """
+    
+    def __init__(self, max_frames: int = INDEX_REGISTRY_MAX_FRAMES):
+        """Initialize with the number of data versions to keep indexes for"""
+        self.max_frames = max_frames
+        self.builds = 0
+        self.hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_or_build(self, df: pd.DataFrame, name: Any, builder):
+        """Get the named index for this DataFrame, building it on first use"""
+        key = id(df)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['ref']() is not df:
+                # id() was reused by a new object after the old frame was collected
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if name in entry['indexes']:
+                    self.hits += 1
+                    return entry['indexes'][name]
+        
+        index = builder()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['ref']() is not df:
+                entry = {'ref': weakref.ref(df), 'indexes': {}}
+                self._entries[key] = entry
+            entry['indexes'][name] = index
+            self.builds += 1
+            while len(self._entries) > self.max_frames:
+                self._entries.popitem(last=False)
+        return index
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get index build/hit counters"""
+        with self._lock:
+            return {'frames': len(self._entries), 'builds': self.builds, 'hits': self.hits}
+
+@st.cache_resource
+def get_data_index_registry() -> DataIndexRegistry:
+    """Get the index registry shared by all sessions"""
+    return DataIndexRegistry()
+
+# Property Search Index Class
+class PropertySearchIndex:
+    """Case-insensitive substring index over text columns
+    
+    Each column is factorized into its distinct values, and a trigram posting list
+    is built over those values. A query intersects the posting lists of its
+    trigrams, verifies the few candidate values, and maps them back to rows through
+    the factorized codes. Terms shorter than three characters scan the distinct
+    values directly.
+    """
+    
+    def __init__(self, df: pd.DataFrame, columns: List[str]):
+        """Build the index over the given columns of df"""
+        self.n_rows = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        self._column_indexes = [self._build_column(df[col]) for col in self.columns]
+    
+    @staticmethod
+    def _trigram_keys(chars: np.ndarray) -> np.ndarray:
+        """Pack consecutive code points into one int64 key per trigram"""
+        return (chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:]
+    
+    @classmethod
+    def _build_column(cls, series: pd.Series) -> Dict[str, Any]:
+        """Factorize a column and build trigram postings over its distinct values"""
+        codes, uniques = pd.factorize(series.astype(str))
+        values = [str(value).lower() for value in uniques]
+        column_index = {'codes': codes, 'values': values}
+        
+        # All values in one buffer separated by NUL so no trigram spans two values
+        lengths = np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+        chars = np.frombuffer(("\x00".join(values) + "\x00").encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+        owners = np.repeat(np.arange(len(values), dtype=np.int64), lengths + 1)
+        if len(chars) < 3:
+            column_index.update(keys=np.empty(0, dtype=np.int64), starts=np.zeros(1, dtype=np.int64),
+                                postings=np.empty(0, dtype=np.int64))
+            return column_index
+        
+        keys = cls._trigram_keys(chars)
+        valid = (chars[:-2] != 0) & (chars[1:-1] != 0) & (chars[2:] != 0)
+        keys, owners = keys[valid], owners[:-2][valid]
+        
+        # Sort by (trigram, value) and drop repeats of a trigram within one value
+        order = np.lexsort((owners, keys))
+        keys, owners = keys[order], owners[order]
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (owners[1:] != owners[:-1])
+        keys, owners = keys[keep], owners[keep]
+        
+        unique_keys, starts = np.unique(keys, return_index=True)
+        column_index.update(keys=unique_keys, starts=np.append(starts, len(keys)), postings=owners)
+        return column_index
+    
+    def _matching_values(self, column_index: Dict[str, Any], term: str) -> np.ndarray:
+        """Get a boolean mask over a column's distinct values containing term"""
+        values = column_index['values']
+        # One extra slot so missing values (code -1) always map to False
+        value_mask = np.zeros(len(values) + 1, dtype=bool)
+        
+        if len(term) < 3:
+            hits = [code for code, value in enumerate(values) if term in value]
+        else:
+            keys = column_index['keys']
+            chars = np.frombuffer(term.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+            query_keys = np.unique(self._trigram_keys(chars))
+            positions = np.searchsorted(keys, query_keys)
+            if np.any(positions >= len(keys)) or np.any(keys[np.minimum(positions, len(keys) - 1)] != query_keys):
+                return value_mask
+            starts, ends = column_index['starts'][positions], column_index['starts'][positions + 1]
+            candidates = None
+            for i in np.argsort(ends - starts):  # Intersect shortest posting lists first
+                posting = column_index['postings'][starts[i]:ends[i]]
+                if candidates is None:
+                    candidates = posting
+                else:
+                    # Postings are sorted, so membership is a binary search per candidate
+                    found = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                    candidates = candidates[posting[found] == candidates]
+                if len(candidates) == 0:
+                    return value_mask
+            hits = [code for code in candidates.tolist() if term in values[code]]
+        value_mask[hits] = True
+        return value_mask
+    
+    def search_mask(self, search_term: str) -> np.ndarray:
+        """Get a boolean row mask of rows where any indexed column contains search_term"""
+        term = search_term.lower()
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for column_index in self._column_indexes:
+            value_mask = self._matching_values(column_index, term)
+            if value_mask.any():
+                mask |= value_mask[column_index['codes']]
+        return mask
+    
+    def search(self, search_term: str) -> np.ndarray:
+        """Get the row positions (ascending) matching search_term"""
+        return np.flatnonzero(self.search_mask(search_term))
+
+# Property Query Class
+class PropertyQuery:
+    """Describes a listings query: search term, filters, numeric ranges, sort and page"""
+    
+    def __init__(self, search_term: str = "", search_columns: List[str] = None,
+                 filters: Dict[str, Any] = None, ranges: Dict[str, Tuple[Optional[float], Optional[float]]] = None,
+                 sort_by: str = None, ascending: bool = True, limit: int = None, offset: int = 0):
+        """Initialize the query
+        
+        filters maps a column to a value or list of accepted values (exact match),
+        ranges maps a column to an inclusive (min, max) pair where either bound may
+        be None, and limit/offset select the page of sorted results to return.
+        """
+        self.search_term = search_term or ""
+        self.search_columns = search_columns or SEARCH_INDEX_COLUMNS
+        self.filters = filters or {}
+        self.ranges = ranges or {}
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self.limit = limit
+        self.offset = max(offset, 0)
+
+# Property Query Engine Class
+class PropertyQueryEngine:
+    """Evaluates PropertyQuery objects in one pass over cached per-version indexes
+    
+    Search, filters and ranges are combined as boolean masks; only the requested
+    page of rows is materialized as a DataFrame.
+    """
+    
+    def __init__(self, index_registry: Optional[DataIndexRegistry] = None):
+        """Initialize with an optional shared index registry"""
+        self.index_registry = index_registry
+    
+    def _get_index(self, df: pd.DataFrame, name: Any, builder):
+        """Get an index for this data version (built ad hoc without a registry)"""
+        if self.index_registry is None:
+            return builder()
+        return self.index_registry.get_or_build(df, name, builder)
+    
+    def _categorical(self, df: pd.DataFrame, column: str) -> Tuple[np.ndarray, Dict[Any, int]]:
+        """Get factorized codes for a column and a value -> code lookup"""
+        def build():
+            codes, uniques = pd.factorize(df[column])
+            return codes, {value: code for code, value in enumerate(uniques)}
+        return self._get_index(df, ('categorical', column), build)
+    
+    def _numeric(self, df: pd.DataFrame, column: str) -> np.ndarray:
+        """Get a column as floats (blank or non-numeric cells become NaN)"""
+        return self._get_index(
+            df, ('numeric', column),
+            lambda: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        )
+    
+    @staticmethod
+    def _build_permutations(series: pd.Series) -> Dict[str, np.ndarray]:
+        """Argsort a column once in both directions, missing values last
+        
+        Columns whose non-blank cells are all numeric sort numerically (blanks count
+        as missing); anything else sorts as strings.
+        """
+        numeric = pd.to_numeric(series, errors='coerce')
+        non_blank = series.notna() & (series.astype(str).str.strip() != '')
+        if numeric.notna().sum() > 0 and numeric.notna().sum() == non_blank.sum():
+            keys = numeric.to_numpy(dtype=float, na_value=np.nan)
+            missing = np.isnan(keys)
+        else:
+            missing = series.isna().to_numpy()
+            keys = series.astype(str).to_numpy(dtype=object)
+        
+        valid_positions = np.flatnonzero(~missing)
+        ascending = valid_positions[np.argsort(keys[valid_positions], kind='stable')]
+        missing_positions = np.flatnonzero(missing)
+        return {
+            'ascending': np.concatenate([ascending, missing_positions]),
+            'descending': np.concatenate([ascending[::-1], missing_positions])
+        }
+    
+    def sorted_positions(self, df: pd.DataFrame, column: str, ascending: bool = True) -> np.ndarray:
+        """Get the presorted row permutation of df by column for this data version"""
+        permutations = self._get_index(df, ('sort', column), lambda: self._build_permutations(df[column]))
+        return permutations['ascending' if ascending else 'descending']
+    
+    def match_mask(self, df: pd.DataFrame, query: PropertyQuery) -> np.ndarray:
+        """Get the boolean row mask of rows matching the query's search, filters and ranges"""
+        mask = np.ones(len(df), dtype=bool)
+        
+        if query.search_term:
+            columns = [col for col in query.search_columns if col in df.columns]
+            index = self._get_index(df, ('search', tuple(columns)), lambda: PropertySearchIndex(df, columns))
+            mask &= index.search_mask(query.search_term)
+        
+        for column, accepted in query.filters.items():
+            if column not in df.columns:
+                continue
+            codes, lookup = self._categorical(df, column)
+            accepted = accepted if isinstance(accepted, (list, tuple, set)) else [accepted]
+            accepted_codes = [lookup[value] for value in accepted if value in lookup]
+            mask &= np.isin(codes, accepted_codes)
+        
+        for column, (low, high) in query.ranges.items():
+            if column not in df.columns:
+                continue
+            values = self._numeric(df, column)
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        
+        return mask
+    
+    def count(self, df: pd.DataFrame, query: PropertyQuery) -> int:
+        """Count matching rows without sorting or materializing them"""
+        if df.empty:
+            return 0
+        return int(self.match_mask(df, query).sum())
+    
+    def execute(self, df: pd.DataFrame, query: PropertyQuery) -> Tuple[pd.DataFrame, int]:
+        """Run the query and return (page of matching rows, total number of matches)"""
+        if df.empty:
+            return df, 0
+        
+        mask = self.match_mask(df, query)
+        if query.sort_by and query.sort_by in df.columns:
+            # Filter the presorted permutation instead of sorting the matches
+            permutation = self.sorted_positions(df, query.sort_by, query.ascending)
+            positions = permutation[mask[permutation]]
+        else:
+            positions = np.flatnonzero(mask)
+        
+        total = len(positions)
+        end = None if query.limit is None else query.offset + query.limit
+        return df.iloc[positions[query.offset:end]], total
+
+@st.cache_resource
+def get_query_engine() -> PropertyQueryEngine:
+    """Get the listings query engine backed by the shared index registry"""
+    return PropertyQueryEngine(get_data_index_registry())
+
 # Google Sheets Helper Class
 class GoogleSheetsManager:
     """Helper class to manage Google Sheets operations"""
     
-    def __init__(self, credentials_dict: Dict[str, Any]):
-        """Initialize with service account credentials"""
+    def __init__(self, credentials_dict: Dict[str, Any], cache: Optional[SheetDataCache] = None,
+                 delta_sync: bool = SHEET_DELTA_SYNC_ENABLED, client_pool: Optional[SheetsClientPool] = None,
+                 snapshots: Optional[SheetSnapshotStore] = None, report_errors: bool = True,
+                 index_registry: Optional[DataIndexRegistry] = None):
+        """Initialize with service account credentials and optional shared cache, client pool, snapshot store and index registry"""
         self.credentials_dict = credentials_dict
+        self.cache = cache
+        self.delta_sync = delta_sync
+        self.client_pool = client_pool
+        self.snapshots = snapshots
+        self.index_registry = index_registry
+        self.report_errors = report_errors
+        self.last_error = None
+        self.last_load_info = {}
         self.client = None
         self.sheet = None
+        self.sheet_id = None
+        self.worksheet_name = None
+        self.write_stats = {'operations': 0, 'api_calls': 0}
         self._authenticate()
     
     def _authenticate(self):
         """Authenticate with Google Sheets API"""
         try:
+            if self.client_pool is not None:
+                self.client = self.client_pool.get_client(self.credentials_dict)
+                return
+            
             scope = [
                 'https://spreadsheets.google.com/feeds',
                 'https://www.googleapis.com/auth/drive'
@@ -156,33 +1016,241 @@ class GoogleSheetsManager:
     def connect_to_sheet(self, sheet_id: str, worksheet_name: str = None) -> bool:
         """Connect to a specific Google Sheet"""
         try:
-            spreadsheet = self.client.open_by_key(sheet_id)
-            if worksheet_name:
-                self.sheet = spreadsheet.worksheet(worksheet_name)
+            if self.client_pool is not None:
+                self.sheet = self.client_pool.open_worksheet(self.credentials_dict, sheet_id, worksheet_name)
             else:
-                self.sheet = spreadsheet.sheet1
+                spreadsheet = self.client.open_by_key(sheet_id)
+                if worksheet_name:
+                    self.sheet = spreadsheet.worksheet(worksheet_name)
+                else:
+                    self.sheet = spreadsheet.sheet1
+            self.sheet_id = sheet_id
+            self.worksheet_name = worksheet_name
             return True
         except Exception as e:
-            st.error(f"Failed to connect to sheet: {str(e)}")
+            self._report_error(f"Failed to connect to sheet: {str(e)}")
             return False
     
-    def get_all_data(self) -> Optional[pd.DataFrame]:
-        """Get all data from the connected sheet"""
+    def _report_error(self, message: str):
+        """Remember the error and show it unless running in the background"""
+        self.last_error = message
+        if self.report_errors:
+            st.error(message)
+    
+    def get_cached_data(self, sheet_id: str, worksheet_name: str = None) -> Optional[pd.DataFrame]:
+        """Get data from the shared cache without touching the Sheets API"""
+        if self.cache is None:
+            return None
+        return self.cache.get(sheet_id, worksheet_name)
+    
+    def get_all_data(self, use_cache: bool = True) -> Optional[pd.DataFrame]:
+        """Get all data from the connected sheet (served from the shared cache when fresh)"""
         try:
             if not self.sheet:
                 raise Exception("No sheet connected")
             
-            records = self.sheet.get_all_records()
-            if records:
-                df = pd.DataFrame(records)
-                # Clean up empty rows
-                df = df.dropna(how='all')
-                return df
-            else:
-                return pd.DataFrame()
+            if use_cache:
+                cached = self.get_cached_data(self.sheet_id, self.worksheet_name)
+                if cached is not None:
+                    return cached
+            
+            if self.delta_sync and self.cache is not None:
+                entry = self.cache.get_stale_entry(self.sheet_id, self.worksheet_name)
+                if entry is not None and entry['sync'] is not None:
+                    df = self._delta_sync(entry)
+                    if df is not None:
+                        return df
+            
+            return self._full_sync()
         except Exception as e:
-            st.error(f"Error fetching data: {str(e)}")
+            if self.client_pool is not None and self.sheet_id:
+                # A stale handle (deleted/renamed worksheet) is reopened on the next attempt
+                self.client_pool.evict_handles(self.credentials_dict, self.sheet_id)
+            self._report_error(f"Error fetching data: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _row_fingerprint(values: List[Any]) -> str:
+        """Fingerprint a row of (numericised) cell values"""
+        return hashlib.sha1(json.dumps([str(v) for v in values]).encode('utf-8')).hexdigest()
+    
+    def _full_sync(self) -> pd.DataFrame:
+        """Download the whole worksheet and record the delta-sync state"""
+        base = self.cache.get_stale_entry(self.sheet_id, self.worksheet_name) if self.cache is not None else None
+        records = self.sheet.get_all_records()
+        if records:
+            df = pd.DataFrame(records)
+            # Clean up empty rows
+            df = df.dropna(how='all')
+        else:
+            df = pd.DataFrame()
+        
+        if self.cache is not None:
+            sync_state = None
+            if records:
+                sync_state = {
+                    'header': list(records[0].keys()),
+                    'row_count': len(records),
+                    'tail_fingerprint': self._row_fingerprint(list(records[-1].values())),
+                    'dirty_rows': set(),
+                    'full_synced_at': time.time()
+                }
+            self.cache.set(self.sheet_id, self.worksheet_name, df, sync_state, mode="full", base=base)
+        self._save_snapshot(df)
+        return df
+    
+    def _delta_sync(self, base: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Fetch only appended and locally modified rows and merge them into the cached data.
+        
+        base is the cache's stale entry. Returns None when a full pull is required
+        instead: the header changed, the last synced row no longer matches its
+        fingerprint (rows inserted, deleted or edited above it), or the last full pull
+        is older than SHEET_FULL_RESYNC_SECONDS (edits by other writers to earlier
+        rows are only seen by a full pull).
+        """
+        base_df, sync_state = base['data'], base['sync']
+        if time.time() - sync_state['full_synced_at'] >= SHEET_FULL_RESYNC_SECONDS:
+            return None
+        
+        header = sync_state['header']
+        row_count = sync_state['row_count']
+        last_col = gspread.utils.rowcol_to_a1(1, len(header)).rstrip('0123456789')
+        tail_row = row_count + 1  # Sheet row of the last synced record (row 1 is the header)
+        dirty_rows = sorted(r for r in sync_state['dirty_rows'] if 2 <= r < tail_row)
+        
+        # One API call: header, last synced row onwards, and any rows we wrote to
+        ranges = ["1:1", f"A{tail_row}:{last_col}"]
+        ranges += [f"A{r}:{last_col}{r}" for r in dirty_rows]
+        results = self.sheet.batch_get(ranges)
+        
+        def to_record_values(raw_row):
+            padded = list(raw_row) + [""] * (len(header) - len(raw_row))
+            return gspread.utils.numericise_all(padded[:len(header)])
+        
+        fetched_header = list(results[0][0]) if results[0] else []
+        fetched_header += [""] * (len(header) - len(fetched_header))
+        if fetched_header != header:
             return None
+        
+        tail = list(results[1])
+        if not tail:
+            return None
+        tail_values = to_record_values(tail[0])
+        tail_fingerprint = self._row_fingerprint(tail_values)
+        tail_dirty = tail_row in sync_state['dirty_rows']
+        if not tail_dirty and tail_fingerprint != sync_state['tail_fingerprint']:
+            return None
+        
+        new_rows = [to_record_values(r) for r in tail[1:]]
+        patched = {r: to_record_values(res[0]) if res else [""] * len(header)
+                   for r, res in zip(dirty_rows, results[2:])}
+        if tail_dirty:
+            patched[tail_row] = tail_values
+        
+        if not new_rows and not patched:
+            df = base_df
+        else:
+            # Row labels follow sheet positions (sheet row - 2) so patches line up
+            frames = [base_df.drop(index=[r - 2 for r in patched], errors='ignore')]
+            if patched:
+                frames.append(pd.DataFrame(list(patched.values()), columns=header,
+                                           index=[r - 2 for r in patched]))
+            if new_rows:
+                frames.append(pd.DataFrame(new_rows, columns=header,
+                                           index=range(row_count, row_count + len(new_rows))))
+            df = pd.concat(frames)
+            if patched:
+                df = df.sort_index()
+            df = df.dropna(how='all')
+        
+        new_state = {
+            'header': header,
+            'row_count': row_count + len(new_rows),
+            'tail_fingerprint': self._row_fingerprint(new_rows[-1]) if new_rows else tail_fingerprint,
+            'dirty_rows': set(),
+            'full_synced_at': sync_state['full_synced_at']
+        }
+        self.cache.set(self.sheet_id, self.worksheet_name, df, new_state, mode="delta", base=base)
+        if df is not base_df:
+            self._save_snapshot(df)
+        return df
+    
+    def _save_snapshot(self, df: pd.DataFrame):
+        """Persist the last good pull for cold starts"""
+        if self.snapshots is not None and not df.empty:
+            self.snapshots.save(self.sheet_id, self.worksheet_name, df)
+    
+    def load_data(self, sheet_id: str, worksheet_name: str = None, refresher: Optional[SheetRefresher] = None,
+                  force_refresh: bool = False) -> Optional[pd.DataFrame]:
+        """Load worksheet data stale-while-revalidate
+        
+        Fresh cached data is returned as is. Expired cached data, or failing that the
+        on-disk snapshot, is returned immediately while a background refresh runs.
+        Only when neither exists (or force_refresh is set) is the sheet read inline,
+        and if that read fails the snapshot is still served.
+        """
+        key = SheetDataCache.make_key(sheet_id, worksheet_name)
+        if force_refresh and self.cache is not None:
+            self.cache.invalidate(sheet_id, worksheet_name)
+        
+        if not force_refresh:
+            cached = self.get_cached_data(sheet_id, worksheet_name)
+            if cached is not None:
+                self.last_load_info = {'source': 'cache', 'refreshing': False}
+                return cached
+            
+            stale, as_of, source = None, None, None
+            entry = self.cache.get_stale_entry(sheet_id, worksheet_name) if self.cache is not None else None
+            if entry is not None:
+                stale, as_of, source = entry['data'], entry['loaded_at'], 'stale-cache'
+            elif self.snapshots is not None:
+                snapshot = self.snapshots.load(sheet_id, worksheet_name)
+                if snapshot is not None:
+                    (stale, as_of), source = snapshot, 'snapshot'
+            
+            if stale is not None and refresher is not None:
+                refresher.refresh_async(key, lambda: self._background_refresh(sheet_id, worksheet_name))
+                self.last_load_info = {
+                    'source': source,
+                    'as_of': as_of,
+                    'refreshing': refresher.is_refreshing(key),
+                    'last_error': refresher.last_error(key)
+                }
+                return stale
+        
+        df = None
+        if self.connect_to_sheet(sheet_id, worksheet_name):
+            df = self.get_all_data(use_cache=False)
+        if df is None and self.snapshots is not None:
+            snapshot = self.snapshots.load(sheet_id, worksheet_name)
+            if snapshot is not None:
+                self.last_load_info = {'source': 'snapshot', 'as_of': snapshot[1], 'refreshing': False,
+                                       'last_error': self.last_error}
+                return snapshot[0]
+        self.last_load_info = {'source': 'live', 'refreshing': False}
+        return df
+    
+    def _background_refresh(self, sheet_id: str, worksheet_name: str = None) -> Optional[str]:
+        """Refresh the cache and snapshot off the script thread; returns an error message on failure"""
+        # A separate manager keeps this thread from switching the session's connected sheet
+        manager = GoogleSheetsManager(
+            self.credentials_dict, cache=self.cache, delta_sync=self.delta_sync,
+            client_pool=self.client_pool, snapshots=self.snapshots, report_errors=False
+        )
+        if not manager.connect_to_sheet(sheet_id, worksheet_name):
+            return manager.last_error
+        if manager.get_all_data(use_cache=False) is None:
+            return manager.last_error
+        return None
+    
+    def invalidate_cache(self, dirty_rows: List[int] = None):
+        """Expire cached data for the connected worksheet after a write"""
+        if self.cache is None or not self.sheet_id:
+            return
+        if self.delta_sync:
+            self.cache.mark_stale(self.sheet_id, self.worksheet_name, dirty_rows)
+        else:
+            self.cache.invalidate(self.sheet_id, self.worksheet_name)
     
     def append_row(self, data: List[Any]) -> bool:
         """Append a row to the sheet"""
@@ -191,6 +1259,7 @@ class GoogleSheetsManager:
                 raise Exception("No sheet connected")
             
             self.sheet.append_row(data)
+            self.invalidate_cache()
             return True
         except Exception as e:
             st.error(f"Error appending row: {str(e)}")
@@ -203,11 +1272,78 @@ class GoogleSheetsManager:
                 raise Exception("No sheet connected")
             
             self.sheet.update_cell(row, col, value)
+            self.invalidate_cache(dirty_rows=[row])
             return True
         except Exception as e:
             st.error(f"Error updating cell: {str(e)}")
             return False
     
+    def _record_write(self, operations: int):
+        """Track how many logical writes were sent in a single API call"""
+        self.write_stats['operations'] += operations
+        self.write_stats['api_calls'] += 1
+    
+    def append_rows(self, rows: List[List[Any]]) -> bool:
+        """Append many rows to the sheet in a single API call"""
+        if not rows:
+            return True
+        try:
+            if not self.sheet:
+                raise Exception("No sheet connected")
+            
+            self.sheet.append_rows(rows)
+            self._record_write(len(rows))
+            self.invalidate_cache()
+            return True
+        except Exception as e:
+            st.error(f"Error appending rows: {str(e)}")
+            return False
+    
+    def batch_update_cells(self, updates: List[Tuple[int, int, Any]]) -> bool:
+        """Update many (row, col, value) cells in a single API call"""
+        if not updates:
+            return True
+        return self.batch_update([
+            {'range': gspread.utils.rowcol_to_a1(row, col), 'values': [[value]]}
+            for row, col, value in updates
+        ])
+    
+    def batch_update(self, range_updates: List[Dict[str, Any]]) -> bool:
+        """Update many A1 ranges ({'range': 'A2:C3', 'values': [[...], ...]}) in a single API call"""
+        if not range_updates:
+            return True
+        try:
+            if not self.sheet:
+                raise Exception("No sheet connected")
+            
+            self.sheet.batch_update(range_updates)
+            self._record_write(len(range_updates))
+            
+            dirty_rows = set()
+            for update in range_updates:
+                grid = gspread.utils.a1_range_to_grid_range(update['range'])
+                start = grid.get('startRowIndex', 0) + 1
+                end = grid.get('endRowIndex', start + len(update['values']) - 1)
+                dirty_rows.update(range(start, end + 1))
+            self.invalidate_cache(dirty_rows=sorted(dirty_rows))
+            return True
+        except Exception as e:
+            st.error(f"Error updating ranges: {str(e)}")
+            return False
+    
+    def buffered_writer(self, max_buffered: int = SHEET_WRITE_BUFFER_SIZE,
+                        max_age: float = SHEET_WRITE_BUFFER_MAX_AGE) -> 'SheetWriteBuffer':
+        """Create a write buffer that batches appends and cell updates for this sheet"""
+        return SheetWriteBuffer(self, max_buffered=max_buffered, max_age=max_age)
+    
+    def get_write_stats(self) -> Dict[str, Any]:
+        """Get batched write counters, including API calls saved versus one call per write"""
+        return {
+            'operations': self.write_stats['operations'],
+            'api_calls': self.write_stats['api_calls'],
+            'api_calls_saved': self.write_stats['operations'] - self.write_stats['api_calls']
+        }
+    
     def get_sheet_info(self) -> Dict[str, Any]:
         """Get information about the connected sheet"""
         try:
@@ -232,16 +1368,15 @@ class GoogleSheetsManager:
         if columns is None:
             columns = df.columns.tolist()
         
-        # Create search mask
-        mask = pd.Series([False] * len(df))
-        
-        for col in columns:
-            if col in df.columns:
-                mask |= df[col].astype(str).str.contains(
-                    search_term, case=False, na=False
-                )
+        # Reuse the text index built for this data version
+        if self.index_registry is not None:
+            index = self.index_registry.get_or_build(
+                df, ('search', tuple(columns)), lambda: PropertySearchIndex(df, columns)
+            )
+        else:
+            index = PropertySearchIndex(df, columns)
         
-        return df[mask]
+        return df.iloc[index.search(search_term)]
     
     def filter_by_property_type(self, df: pd.DataFrame, property_type: str) -> pd.DataFrame:
         """Filter dataframe by property type"""
@@ -258,7 +1393,98 @@ class GoogleSheetsManager:
         if df.empty or sort_column not in df.columns:
             return df
         
-        return df.sort_values(by=sort_column, ascending=ascending)
+        # Gather rows through the permutation presorted for this data version
+        engine = PropertyQueryEngine(self.index_registry)
+        return df.iloc[engine.sorted_positions(df, sort_column, ascending)]
+
+# Sheet Write Buffer Class
+class SheetWriteBuffer:
+    """Buffers row appends and cell updates and flushes them as batched API calls
+    
+    A flush happens when the buffer reaches max_buffered writes, when the oldest
+    buffered write is older than max_age seconds (checked on every add and by
+    flush_if_due), and when leaving a ``with`` block. Rows are flushed before
+    cell updates.
+    """
+    
+    def __init__(self, manager: GoogleSheetsManager, max_buffered: int = SHEET_WRITE_BUFFER_SIZE,
+                 max_age: float = SHEET_WRITE_BUFFER_MAX_AGE):
+        """Initialize with the sheets manager to flush through"""
+        self.manager = manager
+        self.max_buffered = max_buffered
+        self.max_age = max_age
+        self.pending_rows = []
+        self.pending_cells = []
+        self.first_buffered_at = None
+        self.flushes = 0
+        self.failed_flushes = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+    
+    def __len__(self):
+        return len(self.pending_rows) + len(self.pending_cells)
+    
+    def add_row(self, row: List[Any]):
+        """Buffer a row append"""
+        self._mark_buffered()
+        self.pending_rows.append(row)
+        self._flush_if_needed()
+    
+    def add_rows(self, rows: List[List[Any]]):
+        """Buffer several row appends"""
+        for row in rows:
+            self.add_row(row)
+    
+    def update_cell(self, row: int, col: int, value: Any):
+        """Buffer a cell update"""
+        self._mark_buffered()
+        self.pending_cells.append((row, col, value))
+        self._flush_if_needed()
+    
+    def _mark_buffered(self):
+        if self.first_buffered_at is None:
+            self.first_buffered_at = time.time()
+    
+    def _flush_if_needed(self):
+        if len(self) >= self.max_buffered:
+            self.flush()
+        else:
+            self.flush_if_due()
+    
+    def flush_if_due(self) -> bool:
+        """Flush if the oldest buffered write has exceeded max_age"""
+        if self.first_buffered_at is not None and time.time() - self.first_buffered_at >= self.max_age:
+            return self.flush()
+        return True
+    
+    def flush(self) -> bool:
+        """Send all buffered writes; failed batches stay buffered for the next flush"""
+        if not len(self):
+            return True
+        
+        success = True
+        if self.pending_rows:
+            if self.manager.append_rows(self.pending_rows):
+                self.pending_rows = []
+            else:
+                success = False
+        if self.pending_cells and success:
+            if self.manager.batch_update_cells(self.pending_cells):
+                self.pending_cells = []
+            else:
+                success = False
+        
+        if success:
+            self.flushes += 1
+            self.first_buffered_at = None
+        else:
+            self.failed_flushes += 1
+        return success
 
 def get_sheet_manager() -> Optional[GoogleSheetsManager]:
     """Get Google Sheets manager from session state"""
@@ -268,7 +1494,11 @@ def get_sheet_manager() -> Optional[GoogleSheetsManager]:
     try:
         if 'sheets_manager' not in st.session_state:
             st.session_state['sheets_manager'] = GoogleSheetsManager(
-                st.session_state['credentials']
+                st.session_state['credentials'],
+                cache=get_sheet_data_cache(),
+                client_pool=get_sheets_client_pool(),
+                snapshots=get_sheet_snapshot_store(),
+                index_registry=get_data_index_registry()
             )
         return st.session_state['sheets_manager']
     except Exception as e:
@@ -288,137 +1518,964 @@ def validate_credentials(credentials_dict: Dict[str, Any]) -> bool:
     
     return credentials_dict.get('type') == 'service_account'
 
-# Webhook Helper Class
-class WebhookManager:
-    """Helper class to manage webhook operations"""
+def webhook_json_default(value: Any) -> Any:
+    """json.dumps fallback for webhook payloads built from sheet or CSV rows (numpy/pandas scalars)"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+# Webhook Transport Class
+class WebhookTransport:
+    """Shared keep-alive HTTP session for webhook calls
     
-    def __init__(self, webhook_url: str):
-        """Initialize with webhook URL"""
-        self.webhook_url = webhook_url
-        self.timeout = 30  # seconds
-        self.max_retries = 3
+    One requests.Session with a pooled adapter is reused by every webhook manager,
+    so repeat submissions skip DNS, TCP and TLS setup. pool_maxsize caps the open
+    connections per host; with pool_block set, extra concurrent requests wait for
+    a free connection instead of opening more.
+    """
     
-    def send_address_data(self, address_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send address data to n8n webhook with retry logic"""
-        
-        # Add metadata
-        payload = {
+    def __init__(self, pool_connections: int = WEBHOOK_POOL_CONNECTIONS,
+                 pool_maxsize: int = WEBHOOK_POOL_MAXSIZE, pool_block: bool = WEBHOOK_POOL_BLOCK):
+        """Initialize the pooled session"""
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.session = requests.Session()
+        # Retries are handled by WebhookManager, not by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POST through the pooled session"""
+        return self.session.post(url, **kwargs)
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+@st.cache_resource
+def get_webhook_transport() -> WebhookTransport:
+    """Get the pooled webhook HTTP transport shared by all sessions"""
+    return WebhookTransport()
+
+# Circuit Breaker Helper Class
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker over a rolling window of webhook calls
+    
+    The breaker opens when enough recent calls fail or run slow. While it is open,
+    calls are refused immediately. After open_seconds a single probe is let through
+    (half-open); its outcome closes the circuit or opens it again.
+    
+    allow_request() hands out a token that the caller passes back to record(), so
+    only the probe's own outcome can decide a half-open circuit.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    CALL = 0  # token for calls admitted while closed; probes get unique positive tokens
+    
+    def __init__(self, window_seconds: float = WEBHOOK_BREAKER_WINDOW_SECONDS,
+                 min_calls: int = WEBHOOK_BREAKER_MIN_CALLS, error_rate: float = WEBHOOK_BREAKER_ERROR_RATE,
+                 slow_call_seconds: float = WEBHOOK_BREAKER_SLOW_CALL_SECONDS,
+                 slow_call_rate: float = WEBHOOK_BREAKER_SLOW_CALL_RATE,
+                 open_seconds: float = WEBHOOK_BREAKER_OPEN_SECONDS,
+                 probe_seconds: float = WEBHOOK_BREAKER_PROBE_SECONDS):
+        """Initialize a closed breaker"""
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.probe_seconds = probe_seconds
+        self._lock = threading.Lock()
+        self._calls = deque()  # (timestamp, failed, slow)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_token = None  # token of the probe in flight, if any
+        self._probe_started_at = 0.0
+        self._probe_sequence = 0
+        self.times_opened = 0
+        self.rejected = 0
+    
+    def _prune(self, now: float):
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+    
+    def _open(self, now: float):
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probe_token = None
+        self.times_opened += 1
+    
+    def _probe_expired(self, now: float) -> bool:
+        return self._probe_token is not None and now - self._probe_started_at >= self.probe_seconds
+    
+    @property
+    def state(self) -> str:
+        """Current state, moving open to half-open once the open period has passed"""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = self.HALF_OPEN
+            return self._state
+    
+    def retry_after(self) -> float:
+        """Seconds until the circuit may let a call through
+        
+        While open this is the rest of the open period; while half-open with a probe
+        in flight it is the time left before that probe is abandoned.
+        """
+        state = self.state
+        now = time.monotonic()
+        with self._lock:
+            if state == self.OPEN:
+                return max(0.0, self.open_seconds - (now - self._opened_at))
+            if state == self.HALF_OPEN and self._probe_token is not None:
+                return max(0.0, self.probe_seconds - (now - self._probe_started_at))
+            return 0.0
+    
+    def allow_request(self) -> Optional[int]:
+        """Return a token if a call may go ahead, else None; half-open allows one probe at a time
+        
+        Check the result with `is None`: calls admitted while closed get CALL (0).
+        """
+        state = self.state
+        now = time.monotonic()
+        with self._lock:
+            if state == self.CLOSED:
+                return self.CALL
+            if state == self.HALF_OPEN and (self._probe_token is None or self._probe_expired(now)):
+                self._probe_sequence += 1
+                self._probe_token = self._probe_sequence
+                self._probe_started_at = now
+                return self._probe_token
+            self.rejected += 1
+            return None
+    
+    def reject(self):
+        """Count a call refused because the circuit is open"""
+        with self._lock:
+            self.rejected += 1
+    
+    def release(self, token: int):
+        """Hand back a token whose call was never made, freeing the probe slot without an outcome"""
+        with self._lock:
+            if token != self.CALL and token == self._probe_token:
+                self._probe_token = None
+    
+    def record(self, token: int, failed: bool, latency: float):
+        """Record the outcome of a call allow_request let through, passing back its token
+        
+        A probe's outcome closes or re-opens the circuit. Outcomes of abandoned probes,
+        and of calls admitted while closed that finish after the circuit opened, are ignored.
+        """
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if token != self.CALL:
+                if token != self._probe_token or self._state != self.HALF_OPEN:
+                    return
+                if failed or slow:
+                    self._open(now)
+                else:
+                    self._state = self.CLOSED
+                    self._probe_token = None
+                    self._calls.clear()
+                return
+            if self._state != self.CLOSED:
+                return
+            
+            self._calls.append((now, failed, slow))
+            self._prune(now)
+            total = len(self._calls)
+            if total >= self.min_calls:
+                failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+                slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+                if failures / total >= self.error_rate or slow_calls / total >= self.slow_call_rate:
+                    self._open(now)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state and rolling-window counts"""
+        state = self.state
+        with self._lock:
+            self._prune(time.monotonic())
+            total = len(self._calls)
+            failures = sum(1 for _, call_failed, _ in self._calls if call_failed)
+            return {
+                'state': state,
+                'window_calls': total,
+                'window_error_rate': failures / total if total else 0.0,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected
+            }
+
+# Rate Limiter Helper Class
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second up to `capacity` burst"""
+    
+    def __init__(self, rate: float, capacity: int):
+        """Initialize a full bucket"""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.throttled = 0
+    
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take a token, waiting up to timeout seconds; return False if none became available"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+                if now + wait > deadline:
+                    self.throttled += 1
+                    return False
+            time.sleep(wait)
+
+# Webhook Guard Registry Class
+class WebhookGuardRegistry:
+    """Per-URL circuit breakers and rate limiters shared by every webhook sender"""
+    
+    def __init__(self, rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_rate_limit: Tuple[float, int] = WEBHOOK_RATE_LIMIT):
+        """Initialize with per-URL (rate, burst) overrides and the default limit"""
+        self.rate_limits = WEBHOOK_RATE_LIMITS if rate_limits is None else rate_limits
+        self.default_rate_limit = default_rate_limit
+        self._breakers = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+    
+    def breaker(self, webhook_url: str) -> CircuitBreaker:
+        """Get the circuit breaker for a webhook URL"""
+        with self._lock:
+            if webhook_url not in self._breakers:
+                self._breakers[webhook_url] = CircuitBreaker()
+            return self._breakers[webhook_url]
+    
+    def limiter(self, webhook_url: str) -> TokenBucket:
+        """Get the rate limiter for a webhook URL"""
+        with self._lock:
+            if webhook_url not in self._limiters:
+                rate, burst = self.rate_limits.get(webhook_url, self.default_rate_limit)
+                self._limiters[webhook_url] = TokenBucket(rate, burst)
+            return self._limiters[webhook_url]
+
+@st.cache_resource
+def get_webhook_guards() -> WebhookGuardRegistry:
+    """Get the webhook circuit breakers and rate limiters shared by all sessions"""
+    return WebhookGuardRegistry()
+
+# Delivered Key Cache Class
+class DeliveredKeyCache:
+    """Bounded LRU/TTL record of idempotency keys that were already delivered
+    
+    Keys being sent right now are claimed (see claim), so identical addresses
+    submitted at the same time go out once instead of in parallel.
+    """
+    
+    def __init__(self, max_keys: int = WEBHOOK_IDEMPOTENCY_MAX_KEYS,
+                 ttl_seconds: float = WEBHOOK_IDEMPOTENCY_TTL_SECONDS):
+        """Initialize an empty cache"""
+        self.max_keys = max_keys
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (delivered_at, status_code)
+        self._in_flight = set()  # claimed keys not yet delivered or released
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self.hits = 0
+        self.misses = 0
+    
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Earlier delivery for key if still within the TTL; call with the lock held"""
+        entry = self._entries.get(key)
+        if entry is None or time.time() - entry[0] > self.ttl_seconds:
+            if entry is not None:
+                del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return {'delivered_at': entry[0], 'status_code': entry[1]}
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the earlier delivery for key, or None if it was not delivered recently"""
+        with self._lock:
+            earlier = self._lookup(key)
+            if earlier is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return earlier
+    
+    def claim(self, key: str, wait: float = WEBHOOK_IN_FLIGHT_WAIT) -> Optional[Dict[str, Any]]:
+        """Claim key for a delivery about to be sent
+        
+        Returns None when the caller now holds the claim and must end it with add()
+        on success or release() otherwise. If key was delivered recently, returns
+        that delivery instead. If another caller holds the claim, waits up to wait
+        seconds for it to end, then returns {'in_flight': True} if it still has not.
+        """
+        deadline = time.monotonic() + wait
+        with self._lock:
+            while True:
+                earlier = self._lookup(key)
+                if earlier is not None:
+                    self.hits += 1
+                    return earlier
+                if key not in self._in_flight:
+                    self._in_flight.add(key)
+                    self.misses += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return {'in_flight': True}
+                self._released.wait(remaining)
+    
+    def release(self, key: str):
+        """Drop the claim on key after a failed delivery so it can be sent again"""
+        with self._lock:
+            self._in_flight.discard(key)
+            self._released.notify_all()
+    
+    def add(self, key: str, status_code: Optional[int]):
+        """Remember that key was delivered (ending any claim on it)"""
+        with self._lock:
+            self._entries[key] = (time.time(), status_code)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+            self._in_flight.discard(key)
+            self._released.notify_all()
+    
+    def stats(self) -> Dict[str, int]:
+        """Duplicate hits, misses, remembered keys and keys in flight"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'keys': len(self._entries),
+                    'in_flight': len(self._in_flight)}
+
+@st.cache_resource
+def get_delivered_key_cache() -> DeliveredKeyCache:
+    """Get the delivered idempotency keys shared by all sessions"""
+    return DeliveredKeyCache()
+
+# Webhook Metrics Class
+class WebhookMetrics:
+    """Thread-safe latency and outcome counters for webhook calls
+    
+    Attempts are single HTTP calls; deliveries are whole sends including retries.
+    Calls refused locally (duplicates, open circuit, rate limit) are counted
+    separately and never reach the latency samples.
+    """
+    
+    def __init__(self, max_samples: int = WEBHOOK_METRICS_MAX_SAMPLES):
+        """Initialize empty counters"""
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Clear all recorded metrics"""
+        with self._lock:
+            self._latencies = deque(maxlen=self.max_samples)
+            self.attempts = 0
+            self.bytes_sent = 0
+            self.status_counts = {}
+            self.error_counts = {}
+            self.deliveries = 0
+            self.delivered = 0
+            self.attempts_per_delivery = {}
+            self.rejections = {}
+            self.started_at = time.time()
+    
+    def record_attempt(self, latency: float, status_code: Optional[int], error_type: Optional[str] = None,
+                       bytes_sent: int = 0):
+        """Record one HTTP attempt"""
+        with self._lock:
+            self.attempts += 1
+            self.bytes_sent += bytes_sent
+            self._latencies.append(latency)
+            if status_code is not None:
+                self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+            if error_type is not None:
+                self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
+    
+    def record_delivery(self, attempts: int, success: bool):
+        """Record a finished delivery and how many attempts it took"""
+        with self._lock:
+            self.deliveries += 1
+            self.delivered += int(success)
+            self.attempts_per_delivery[attempts] = self.attempts_per_delivery.get(attempts, 0) + 1
+    
+    def record_rejection(self, reason: str):
+        """Record a call refused locally ('duplicate', 'in_flight', 'circuit_open' or 'rate_limited')"""
+        with self._lock:
+            self.rejections[reason] = self.rejections.get(reason, 0) + 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Point-in-time copy of all metrics, with latency percentiles in seconds"""
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=float)
+            snapshot = {
+                'since': self.started_at,
+                'attempts': self.attempts,
+                'bytes_sent': self.bytes_sent,
+                'deliveries': self.deliveries,
+                'delivered': self.delivered,
+                'success_rate': self.delivered / self.deliveries if self.deliveries else None,
+                'status_counts': dict(sorted(self.status_counts.items())),
+                'error_counts': dict(self.error_counts),
+                'timeouts': self.error_counts.get('timeout', 0),
+                'attempts_per_delivery': dict(sorted(self.attempts_per_delivery.items())),
+                'rejections': dict(self.rejections),
+                'latency_samples': len(latencies)
+            }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            snapshot['latency'] = {
+                'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                'mean': float(latencies.mean()), 'max': float(latencies.max())
+            }
+        else:
+            snapshot['latency'] = None
+        return snapshot
+
+@st.cache_resource
+def get_webhook_metrics() -> WebhookMetrics:
+    """Get the webhook metrics shared by all sessions"""
+    return WebhookMetrics()
+
+# Address Validation Helper Class
+class AddressValidationEngine:
+    """Address normalization and validation, column-wise for DataFrames and per record
+    
+    validate/normalize work on whole DataFrames with pandas string methods for bulk
+    imports; validate_record/normalize_record apply the same rules to a single form
+    submission without building a one-row frame.
+    """
+    
+    REQUIRED_FIELDS = ['addressLine1', 'city', 'state', 'zipCode']
+    RECOMMENDED_FIELDS = ['propertyType', 'county']
+    MISSING_REQUIRED = "Missing required field: {}"
+    MISSING_RECOMMENDED = "Missing recommended field: {}"
+    ZIP_INVALID = "Invalid ZIP code (expected: 12345 or 12345-6789)"
+    ZIP_PADDED = "ZIP code was missing a leading zero and has been padded"
+    STATE_LENGTH = "State should be 2-character abbreviation (e.g., CA, NY)"
+    STATE_UNKNOWN = "State is not a valid USPS state code"
+    
+    def __init__(self, state_codes=USPS_STATE_CODES, state_names: Optional[Dict[str, str]] = None):
+        """Initialize with the valid state codes and a full-name to code lookup"""
+        self.state_codes = frozenset(state_codes)
+        self.state_names = USPS_STATE_NAMES if state_names is None else state_names
+    
+    @staticmethod
+    def clean(df: pd.DataFrame) -> pd.DataFrame:
+        """Return the address fields as stripped strings, with missing columns as ''"""
+        frame = pd.DataFrame({
+            field: df[field].fillna('').astype(str).str.strip() if field in df.columns else ''
+            for field in ADDRESS_FIELDS
+        }, index=df.index)
+        for field in ADDRESS_FIELDS:
+            if field != 'notes':
+                frame[field] = frame[field].str.replace(WHITESPACE_PATTERN, ' ', regex=True)
+        return frame
+    
+    @staticmethod
+    def clean_record(data: Dict[str, Any]) -> Dict[str, str]:
+        """Return the address fields of one record as stripped strings, missing as ''"""
+        record = {}
+        for field in ADDRESS_FIELDS:
+            value = data.get(field)
+            value = '' if value is None or (np.ndim(value) == 0 and pd.isna(value)) else str(value).strip()
+            record[field] = value if field == 'notes' else re.sub(WHITESPACE_PATTERN, ' ', value)
+        return record
+    
+    def normalize_state(self, state: pd.Series) -> pd.Series:
+        """Upper-case state values and map full state names to USPS codes"""
+        state = state.str.upper().str.replace(STATE_PUNCTUATION_PATTERN, '', regex=True)
+        return state.map(self.state_names).fillna(state)
+    
+    def normalize_state_value(self, state: str) -> str:
+        """Single-value normalize_state"""
+        state = re.sub(STATE_PUNCTUATION_PATTERN, '', state.upper())
+        return self.state_names.get(state, state)
+    
+    @staticmethod
+    def normalize_zip(zip_code: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """Normalize ZIPs to 12345 or 12345-6789; also return which ones were zero-padded
+        
+        Values that do not match ZIP_CODE_PATTERN are returned unchanged.
+        """
+        parts = zip_code.str.extract(ZIP_CODE_PATTERN)
+        matched = parts[0].notna()
+        zip5 = parts[0].fillna('').str.zfill(5)
+        plus4 = ('-' + parts[1]).fillna('')
+        normalized = zip_code.where(~matched, zip5 + plus4)
+        padded = matched & parts[0].str.len().lt(5)
+        return normalized, padded.fillna(False).astype(bool)
+    
+    @staticmethod
+    def normalize_zip_value(zip_code: str) -> Tuple[str, bool]:
+        """Single-value normalize_zip"""
+        match = re.match(ZIP_CODE_PATTERN, zip_code)
+        if match is None:
+            return zip_code, False
+        zip5, plus4 = match.groups()
+        return zip5.zfill(5) + (f"-{plus4}" if plus4 else ''), len(zip5) < 5
+    
+    @staticmethod
+    def join_messages(checks: List[Tuple[pd.Series, str]], index: pd.Index) -> pd.Series:
+        """Combine (mask, message) checks into one '; '-separated message string per row"""
+        messages = pd.Series('', index=index, dtype=object)
+        for mask, message in checks:
+            prefix = np.where(messages.ne(''), messages + '; ', '')
+            messages = pd.Series(np.where(mask, prefix + message, messages), index=index, dtype=object)
+        return messages
+    
+    def normalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Clean and normalize every address row and build its formattedAddress"""
+        return self._normalize_cleaned(self.clean(df))
+    
+    def _normalize_cleaned(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame.copy()
+        frame['city'] = frame['city'].str.title()
+        frame['county'] = frame['county'].str.title()
+        frame['state'] = self.normalize_state(frame['state'])
+        frame['zipCode'], _ = self.normalize_zip(frame['zipCode'])
+        
+        # Join the non-empty address parts
+        formatted = frame['addressLine1']
+        for part in [frame['addressLine2'], frame['city'], frame['state'] + ' ' + frame['zipCode']]:
+            joined = np.where(formatted.ne(''), formatted + ', ' + part, part)
+            formatted = pd.Series(np.where(part.ne(''), joined, formatted), index=frame.index, dtype=object)
+        frame['formattedAddress'] = formatted
+        return frame
+    
+    def normalize_record(self, data: Dict[str, Any]) -> Dict[str, str]:
+        """Clean and normalize one address record and build its formattedAddress"""
+        record = self.clean_record(data)
+        record['city'] = record['city'].title()
+        record['county'] = record['county'].title()
+        record['state'] = self.normalize_state_value(record['state'])
+        record['zipCode'], _ = self.normalize_zip_value(record['zipCode'])
+        parts = [record['addressLine1'], record['addressLine2'], record['city'], f"{record['state']} {record['zipCode']}"]
+        record['formattedAddress'] = ', '.join(part for part in parts if part)
+        return record
+    
+    def validate(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Validate every address row
+        
+        Returns the normalized address fields plus 'valid', 'errors' and 'warnings'
+        columns. Missing required fields, ZIPs that cannot be normalized and state
+        values that are not USPS codes are errors; the rest are warnings.
+        """
+        frame = self.clean(df)
+        result = self._normalize_cleaned(frame)
+        state = result['state']
+        zip_code, zip_padded = self.normalize_zip(frame['zipCode'])
+        
+        errors = [
+            (frame[field].eq(''), self.MISSING_REQUIRED.format(field))
+            for field in self.REQUIRED_FIELDS
+        ]
+        errors.extend([
+            (zip_code.ne('') & ~zip_code.str.fullmatch(NORMALIZED_ZIP_PATTERN), self.ZIP_INVALID),
+            (state.ne('') & state.str.len().ne(2), self.STATE_LENGTH),
+            (state.str.len().eq(2) & ~state.isin(self.state_codes), self.STATE_UNKNOWN),
+        ])
+        warnings = [
+            (frame[field].eq(''), self.MISSING_RECOMMENDED.format(field))
+            for field in self.RECOMMENDED_FIELDS
+        ]
+        warnings.append((zip_padded, self.ZIP_PADDED))
+        
+        result['errors'] = self.join_messages(errors, frame.index)
+        result['warnings'] = self.join_messages(warnings, frame.index)
+        result['valid'] = result['errors'].eq('')
+        return result
+    
+    def validate_record(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate one address record with the same rules as validate
+        
+        Returns {'valid', 'errors', 'warnings'} with the messages as lists.
+        """
+        record = self.clean_record(data)
+        state = self.normalize_state_value(record['state'])
+        zip_code, zip_padded = self.normalize_zip_value(record['zipCode'])
+        
+        errors = [self.MISSING_REQUIRED.format(field) for field in self.REQUIRED_FIELDS if not record[field]]
+        if zip_code and not re.fullmatch(NORMALIZED_ZIP_PATTERN, zip_code):
+            errors.append(self.ZIP_INVALID)
+        if state and len(state) != 2:
+            errors.append(self.STATE_LENGTH)
+        if len(state) == 2 and state not in self.state_codes:
+            errors.append(self.STATE_UNKNOWN)
+        warnings = [self.MISSING_RECOMMENDED.format(field) for field in self.RECOMMENDED_FIELDS if not record[field]]
+        if zip_padded:
+            warnings.append(self.ZIP_PADDED)
+        
+        return {'valid': not errors, 'errors': errors, 'warnings': warnings}
+
+# Webhook Helper Class
+class WebhookManager:
+    """Helper class to manage webhook operations"""
+    
+    def __init__(self, webhook_url: str, transport: Optional[WebhookTransport] = None,
+                 guards: Optional[WebhookGuardRegistry] = None, delivered_keys: Optional[DeliveredKeyCache] = None,
+                 metrics: Optional[WebhookMetrics] = None):
+        """Initialize with webhook URL and optional shared transport, guards, delivered-key cache and metrics"""
+        self.webhook_url = webhook_url
+        self.transport = transport
+        self.delivered_keys = delivered_keys
+        self.metrics = metrics
+        self.timeout = 30  # seconds
+        self.max_retries = 3
+        self.rate_limit_wait = WEBHOOK_RATE_LIMIT_MAX_WAIT
+        self.in_flight_wait = WEBHOOK_IN_FLIGHT_WAIT
+        self.breaker = guards.breaker(webhook_url) if guards is not None else None
+        self.rate_limiter = guards.limiter(webhook_url) if guards is not None else None
+        self.address_engine = AddressValidationEngine()
+    
+    def _post(self, **kwargs) -> requests.Response:
+        """POST to the webhook, reusing pooled connections when a transport is set"""
+        if self.transport is not None:
+            return self.transport.post(self.webhook_url, **kwargs)
+        return requests.post(self.webhook_url, **kwargs)
+    
+    @staticmethod
+    def idempotency_key(address_data: Dict[str, Any]) -> str:
+        """Content hash of the address fields, identical for resubmissions of the same address"""
+        content = {field: str(address_data.get(field, '') or '').strip().lower() for field in ADDRESS_FIELDS}
+        digest = hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+        return f"addr-{digest[:32]}"
+    
+    def build_payload(self, address_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Add request metadata and an idempotency key to formatted address data"""
+        return {
             **address_data,
+            "idempotencyKey": self.idempotency_key(address_data),
             "timestamp": datetime.now().isoformat(),
             "source": "streamlit_app",
             "version": "1.0"
         }
         
-        # Attempt to send with retries
+    def _rejected(self, error: str, **flags) -> Dict[str, Any]:
+        """Result for a call refused locally by the circuit breaker or rate limiter"""
+        return {'success': False, 'status_code': None, 'response_text': '', 'error': error, **flags}
+    
+    def _claim_key(self, idempotency_key: str) -> Optional[Dict[str, Any]]:
+        """Claim an idempotency key before sending; None once claimed, else the refusal to return
+        
+        A key delivered recently comes back as a success with 'duplicate' set; one
+        still claimed by another delivery after in_flight_wait seconds comes back as
+        a local refusal with 'in_flight' set.
+        """
+        earlier = self.delivered_keys.claim(idempotency_key, self.in_flight_wait)
+        if earlier is None:
+            return None
+        if earlier.get('in_flight'):
+            self._record_rejection('in_flight')
+            return self._rejected("skipped: the same address is still being sent by another request",
+                                  in_flight=True, retry_after=1.0)
+        self._record_rejection('duplicate')
+        return {
+            'success': True,
+            'status_code': earlier['status_code'],
+            'response_text': 'Duplicate of a recent delivery; not sent again',
+            'error': None,
+            'duplicate': True,
+            'delivered_at': earlier['delivered_at']
+        }
+    
+    def _end_claim(self, idempotency_key: str, outcome: Optional[Dict[str, Any]]):
+        """Remember a successful delivery of a claimed key, or release the claim"""
+        if outcome is not None and outcome['success']:
+            self.delivered_keys.add(idempotency_key, outcome['status_code'])
+        else:
+            self.delivered_keys.release(idempotency_key)
+    
+    def post_payload(self, payload: Dict[str, Any], compress: bool = False, claimed: bool = False) -> Dict[str, Any]:
+        """Make a single delivery attempt (no retries, no Streamlit output)
+        
+        Calls are refused without touching the network while the circuit is open
+        ('circuit_open' is set) or when no rate-limit token frees up in time
+        ('rate_limited' is set). A payload whose idempotency key was delivered
+        recently is not sent again and comes back as a success with 'duplicate' set;
+        one whose key another call is still sending is refused with 'in_flight' set.
+        With claimed, the caller already holds the key's claim and ends it itself.
+        With compress, bodies of at least WEBHOOK_GZIP_MIN_BYTES are sent gzip-encoded.
+        """
+        idempotency_key = payload.get('idempotencyKey') if self.delivered_keys is not None else None
+        if not idempotency_key or claimed:
+            return self._post_once(payload, compress)
+        refused = self._claim_key(idempotency_key)
+        if refused is not None:
+            return refused
+        outcome = None
+        try:
+            outcome = self._post_once(payload, compress)
+        finally:
+            self._end_claim(idempotency_key, outcome)
+        return outcome
+    
+    def _post_once(self, payload: Dict[str, Any], compress: bool) -> Dict[str, Any]:
+        """One attempt through the circuit breaker and rate limiter, recording metrics"""
+        if self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN:
+            self.breaker.reject()
+            self._record_rejection('circuit_open')
+            return self._rejected(
+                f"skipped: circuit open after repeated webhook failures (retry in {self.breaker.retry_after():.0f}s)",
+                circuit_open=True, retry_after=self.breaker.retry_after()
+            )
+        # Breaker admission comes first so calls it refuses do not spend rate-limit tokens
+        breaker_token = self.breaker.allow_request() if self.breaker is not None else None
+        if self.breaker is not None and breaker_token is None:
+            self._record_rejection('circuit_open')
+            return self._rejected("skipped: circuit half-open, waiting on a probe request",
+                                  circuit_open=True, retry_after=max(self.breaker.retry_after(), 1.0))
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(self.rate_limit_wait):
+            if self.breaker is not None:
+                self.breaker.release(breaker_token)
+            self._record_rejection('rate_limited')
+            return self._rejected("skipped: webhook rate limit reached", rate_limited=True,
+                                  retry_after=1.0 / self.rate_limiter.rate)
+        
+        start_time = time.monotonic()
+        try:
+            outcome = self._attempt(payload, compress)
+        except Exception:
+            # Hand back the breaker slot (a half-open probe in particular) before re-raising
+            if self.breaker is not None:
+                self.breaker.record(breaker_token, True, time.monotonic() - start_time)
+            raise
+        latency = time.monotonic() - start_time
+        if self.metrics is not None:
+            self.metrics.record_attempt(latency, outcome['status_code'], outcome.get('error_type'),
+                                        outcome.get('bytes_sent', 0))
+        if self.breaker is not None:
+            status_code = outcome['status_code']
+            # An unencodable payload never reached the webhook, so it says nothing about its health
+            failed = outcome.get('error_type') != 'encoding' and (
+                status_code is None or status_code >= 500 or status_code == 429
+            )
+            self.breaker.record(breaker_token, failed, latency)
+        return outcome
+    
+    def _record_rejection(self, reason: str):
+        if self.metrics is not None:
+            self.metrics.record_rejection(reason)
+    
+    def record_delivery(self, attempts: int, success: bool):
+        """Record a finished delivery in the shared metrics, if any"""
+        if self.metrics is not None:
+            self.metrics.record_delivery(attempts, success)
+    
+    def _attempt(self, payload: Dict[str, Any], compress: bool = False) -> Dict[str, Any]:
+        headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'RealEstate-Streamlit-App/1.0'
+        }
+        if payload.get('idempotencyKey'):
+            headers['Idempotency-Key'] = payload['idempotencyKey']
+        try:
+            body = json.dumps(payload, default=webhook_json_default).encode('utf-8')
+        except (TypeError, ValueError) as e:
+            return {'success': False, 'status_code': None, 'response_text': '',
+                    'error': f"failed: payload could not be encoded as JSON ({e})", 'error_type': 'encoding',
+                    'bytes_sent': 0}
+        try:
+            if compress and len(body) >= WEBHOOK_GZIP_MIN_BYTES:
+                body = gzip.compress(body, compresslevel=6)
+                headers['Content-Encoding'] = 'gzip'
+            response = self._post(
+                data=body,
+                headers=headers,
+                timeout=self.timeout
+            )
+            success = response.status_code == 200
+            return {
+                'success': success,
+                'status_code': response.status_code,
+                'response_text': response.text,
+                'error': None if success else f"failed with status code: {response.status_code}",
+                'error_type': None if success else 'http_status',
+                'bytes_sent': len(body)
+            }
+        except requests.exceptions.Timeout:
+            error, error_type = f"timed out after {self.timeout} seconds", 'timeout'
+        except requests.exceptions.ConnectionError:
+            error, error_type = "failed: Connection error", 'connection'
+        except requests.exceptions.RequestException as e:
+            error, error_type = f"failed: {str(e)}", 'request'
+        return {'success': False, 'status_code': None, 'response_text': '', 'error': error, 'error_type': error_type,
+                'bytes_sent': len(body)}
+    
+    def deliver_payload(self, payload: Dict[str, Any], on_attempt_failed=None, compress: bool = False) -> Dict[str, Any]:
+        """Deliver a payload with retry logic, reporting failed attempts to on_attempt_failed
+        
+        The idempotency key stays claimed across the retries, so an identical payload
+        delivered concurrently waits for this one instead of being sent alongside it.
+        """
+        idempotency_key = payload.get('idempotencyKey') if self.delivered_keys is not None else None
+        if not idempotency_key:
+            return self._deliver_with_retries(payload, on_attempt_failed, compress)
+        refused = self._claim_key(idempotency_key)
+        if refused is not None:
+            if not refused['success'] and on_attempt_failed is not None:
+                on_attempt_failed(refused['error'])
+            return {
+                'success': refused['success'],
+                'status_code': refused['status_code'],
+                'response_text': refused['response_text'] or refused['error'],
+                'attempt': 0,
+                'error': refused['error'],
+                'duplicate': refused.get('duplicate', False),
+                'in_flight': refused.get('in_flight', False),
+                'payload': payload
+            }
+        result = None
+        try:
+            result = self._deliver_with_retries(payload, on_attempt_failed, compress)
+        finally:
+            self._end_claim(idempotency_key, result)
+        return result
+    
+    def _deliver_with_retries(self, payload: Dict[str, Any], on_attempt_failed, compress: bool) -> Dict[str, Any]:
+        """Retry loop of deliver_payload; the caller handles the idempotency claim"""
         for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    self.webhook_url,
-                    json=payload,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'RealEstate-Streamlit-App/1.0'
-                    },
-                    timeout=self.timeout
-                )
-                
-                result = {
-                    'success': response.status_code == 200,
-                    'status_code': response.status_code,
-                    'response_text': response.text,
+            outcome = self.post_payload(payload, compress=compress, claimed=True)
+            if outcome['success']:
+                self.record_delivery(attempt + 1, True)
+                return {
+                    'success': True,
+                    'status_code': outcome['status_code'],
+                    'response_text': outcome['response_text'],
                     'attempt': attempt + 1,
+                    'duplicate': False,
                     'payload': payload
                 }
                 
-                if result['success']:
-                    return result
-                else:
-                    st.warning(f"Attempt {attempt + 1} failed with status code: {response.status_code}")
-                    
-            except requests.exceptions.Timeout:
-                st.warning(f"Attempt {attempt + 1} timed out after {self.timeout} seconds")
-            except requests.exceptions.ConnectionError:
-                st.warning(f"Attempt {attempt + 1} failed: Connection error")
-            except requests.exceptions.RequestException as e:
-                st.warning(f"Attempt {attempt + 1} failed: {str(e)}")
+            if on_attempt_failed is not None:
+                on_attempt_failed(f"Attempt {attempt + 1} {outcome['error']}")
+            
+            # Refused locally or unencodable: fail fast rather than wait out the backoff
+            if outcome.get('circuit_open') or outcome.get('rate_limited') or outcome.get('error_type') == 'encoding':
+                # Only count it as a delivery if an earlier attempt reached the webhook
+                if attempt > 0:
+                    self.record_delivery(attempt, False)
+                return {
+                    'success': False,
+                    'status_code': None,
+                    'response_text': outcome['error'],
+                    'attempt': attempt + 1,
+                    'error': outcome['error'],
+                    'circuit_open': outcome.get('circuit_open', False),
+                    'payload': payload
+                }
             
             # Wait before retry (except on last attempt)
             if attempt < self.max_retries - 1:
                 time.sleep(2 ** attempt)  # Exponential backoff
         
         # All attempts failed
+        self.record_delivery(self.max_retries, False)
         return {
             'success': False,
             'status_code': None,
             'response_text': 'All retry attempts failed',
             'attempt': self.max_retries,
+            'error': outcome['error'],
             'payload': payload
         }
     
-    def validate_address_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate address data before sending"""
-        errors = []
-        warnings = []
-        
-        # Required fields
-        required_fields = ['addressLine1', 'city', 'state', 'zipCode']
-        for field in required_fields:
-            if not data.get(field, '').strip():
-                errors.append(f"Missing required field: {field}")
-        
-        # Optional but recommended fields
-        recommended_fields = ['propertyType', 'county']
-        for field in recommended_fields:
-            if not data.get(field, '').strip():
-                warnings.append(f"Missing recommended field: {field}")
-        
-        # Validate ZIP code format (basic validation)
-        zip_code = data.get('zipCode', '').strip()
-        if zip_code and not (zip_code.isdigit() and len(zip_code) == 5):
-            if not (len(zip_code) == 10 and zip_code[5] == '-' and 
-                   zip_code[:5].isdigit() and zip_code[6:].isdigit()):
-                warnings.append("ZIP code format may be invalid (expected: 12345 or 12345-6789)")
-        
-        # Validate state (basic validation - should be 2 characters)
-        state = data.get('state', '').strip()
-        if state and len(state) != 2:
-            warnings.append("State should be 2-character abbreviation (e.g., CA, NY)")
+    def send_address_data(self, address_data: Dict[str, Any], on_attempt_failed=None) -> Dict[str, Any]:
+        """Send address data to n8n webhook with retry logic, reporting failed attempts to on_attempt_failed"""
+        return self.deliver_payload(self.build_payload(address_data), on_attempt_failed=on_attempt_failed)
+    
+    def build_batch_envelope(self, addresses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Wrap several formatted addresses in one envelope carrying the request metadata once
         
+        Each address keeps its own idempotencyKey; the envelope key is derived from them,
+        so a retried batch carries the same Idempotency-Key header.
+        """
+        items = [{**address, "idempotencyKey": self.idempotency_key(address)} for address in addresses]
+        batch_digest = hashlib.sha256("|".join(item["idempotencyKey"] for item in items).encode('utf-8'))
         return {
-            'valid': len(errors) == 0,
-            'errors': errors,
-            'warnings': warnings
+            "batch": True,
+            "idempotencyKey": f"batch-{batch_digest.hexdigest()[:32]}",
+            "count": len(items),
+            "addresses": items,
+            "timestamp": datetime.now().isoformat(),
+            "source": "streamlit_app",
+            "version": "1.0"
         }
     
+    def deliver_batch(self, addresses: List[Dict[str, Any]], compress: bool = WEBHOOK_BATCH_GZIP) -> Dict[str, Any]:
+        """Deliver addresses as one batch envelope with retry logic
+        
+        Each address key is claimed first. Addresses delivered recently are left out
+        of the envelope and flagged in 'duplicates'; addresses another request is
+        still sending are left out and flagged in 'in_flight' (both in input order).
+        On success every address in the envelope is remembered.
+        """
+        duplicates = [False] * len(addresses)
+        in_flight = [False] * len(addresses)
+        claimed = []
+        pending = []
+        try:
+            for position, address in enumerate(addresses):
+                if self.delivered_keys is None:
+                    pending.append(address)
+                    continue
+                key = self.idempotency_key(address)
+                if key in claimed:
+                    continue  # a repeat within this batch shares the result of its first occurrence
+                refused = self._claim_key(key)
+                if refused is None:
+                    claimed.append(key)
+                    pending.append(address)
+                elif refused.get('in_flight'):
+                    in_flight[position] = True
+                else:
+                    duplicates[position] = True
+            if not pending:
+                return {'success': not any(in_flight), 'status_code': None, 'attempt': 0,
+                        'error': "skipped: the same addresses are still being sent" if any(in_flight) else None,
+                        'duplicate': not any(in_flight), 'duplicates': duplicates, 'in_flight': in_flight, 'sent': 0}
+            
+            result = self.deliver_payload(self.build_batch_envelope(pending), compress=compress)
+        except BaseException:
+            for key in claimed:
+                self.delivered_keys.release(key)
+            raise
+        for key in claimed:
+            self._end_claim(key, result)
+        return {**result, 'duplicates': duplicates, 'in_flight': in_flight, 'sent': len(pending)}
+    
+    def validate_address_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate address data before sending"""
+        return self.address_engine.validate_record(data)
+    
     def format_address_data(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
         """Format and clean address data"""
+        return self.address_engine.normalize_record(form_data)
         
-        # Clean and format the data
-        formatted_data = {}
-        
-        # Required fields
-        formatted_data['addressLine1'] = form_data.get('addressLine1', '').strip()
-        formatted_data['city'] = form_data.get('city', '').strip().title()
-        formatted_data['state'] = form_data.get('state', '').strip().upper()
-        formatted_data['zipCode'] = form_data.get('zipCode', '').strip()
-        
-        # Optional fields
-        formatted_data['addressLine2'] = form_data.get('addressLine2', '').strip()
-        formatted_data['county'] = form_data.get('county', '').strip().title()
-        formatted_data['propertyType'] = form_data.get('propertyType', '').strip()
-        formatted_data['notes'] = form_data.get('notes', '').strip()
-        
-        # Generate formatted address
-        address_parts = [formatted_data['addressLine1']]
-        if formatted_data['addressLine2']:
-            address_parts.append(formatted_data['addressLine2'])
-        address_parts.extend([
-            formatted_data['city'],
-            f"{formatted_data['state']} {formatted_data['zipCode']}"
-        ])
-        formatted_data['formattedAddress'] = ', '.join(filter(None, address_parts))
+    def validate_address_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Validate every row of an address DataFrame (see AddressValidationEngine.validate)"""
+        return self.address_engine.validate(df)
         
-        return formatted_data
+    def format_address_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Format and clean every row of an address DataFrame"""
+        return self.address_engine.normalize(df)
     
     def test_webhook_connection(self) -> Dict[str, Any]:
         """Test webhook connection with a ping"""
@@ -429,8 +2486,7 @@ class WebhookManager:
         }
         
         try:
-            response = requests.post(
-                self.webhook_url,
+            response = self._post(
                 json=test_payload,
                 headers={'Content-Type': 'application/json'},
                 timeout=10
@@ -450,93 +2506,1188 @@ class WebhookManager:
                 'status_code': None
             }
 
+@st.cache_resource
 def create_webhook_manager(webhook_url: str) -> WebhookManager:
-    """Create and return a webhook manager instance"""
-    return WebhookManager(webhook_url)
+    """Create a webhook manager for this URL, reused across reruns and sessions"""
+    return WebhookManager(webhook_url, transport=get_webhook_transport(), guards=get_webhook_guards(),
+                          delivered_keys=get_delivered_key_cache(), metrics=get_webhook_metrics())
+
+# Webhook Outbox Class
+class WebhookOutbox:
+    """Durable SQLite-backed queue of webhook deliveries
+    
+    Each submission becomes a row identified by a ticket ID. Its status moves from
+    pending to sending and then to delivered, or back to pending with a later
+    next_attempt_at, or to failed once the attempts run out.
+    """
+    
+    def __init__(self, path: str = WEBHOOK_OUTBOX_PATH):
+        """Initialize the outbox database, re-queueing deliveries interrupted by a restart"""
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")  # persistent: stored in the database file
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS deliveries (
+                    ticket_id TEXT PRIMARY KEY,
+                    webhook_url TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    status_code INTEGER,
+                    last_error TEXT,
+                    response_text TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (status, next_attempt_at)")
+            conn.execute("UPDATE deliveries SET status = 'pending' WHERE status = 'sending'")
+    
+    @contextmanager
+    def _connect(self):
+        """Open a connection for one unit of work, committing on success and always closing it
+        
+        One connection per call keeps the outbox safe to use from any thread.
+        """
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def enqueue(self, webhook_url: str, payload: Dict[str, Any]) -> str:
+        """Queue a payload for delivery and return its ticket ID"""
+        ticket_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO deliveries (ticket_id, webhook_url, payload, status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?, ?)",
+                (ticket_id, webhook_url, json.dumps(payload, default=webhook_json_default), now, now, now)
+            )
+        return ticket_id
+    
+    def claim_due(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Mark up to limit due deliveries as sending and return them"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT ticket_id, webhook_url, payload, attempts FROM deliveries "
+                "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE deliveries SET status = 'sending', updated_at = ? WHERE ticket_id = ?",
+                [(now, row['ticket_id']) for row in rows]
+            )
+        return [
+            {**dict(row), 'payload': json.loads(row['payload'])}
+            for row in rows
+        ]
+    
+    def record_attempt(self, ticket_id: str, outcome: Dict[str, Any], attempts: int,
+                       next_attempt_at: Optional[float] = None):
+        """Store the outcome of an attempt; next_attempt_at re-queues a failed delivery"""
+        if outcome['success']:
+            status = 'delivered'
+        elif next_attempt_at is not None:
+            status = 'pending'
+        else:
+            status = 'failed'
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE deliveries SET status = ?, attempts = ?, next_attempt_at = ?, status_code = ?, "
+                "last_error = ?, response_text = ?, updated_at = ? WHERE ticket_id = ?",
+                (status, attempts, next_attempt_at or time.time(), outcome.get('status_code'),
+                 outcome.get('error'), (outcome.get('response_text') or '')[:500], time.time(), ticket_id)
+            )
+    
+    def get_status(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """Get the delivery status for a ticket"""
+        statuses = self.get_statuses([ticket_id])
+        return statuses[0] if statuses else None
+    
+    def get_statuses(self, ticket_ids: List[str]) -> List[Dict[str, Any]]:
+        """Get delivery statuses for several tickets, newest first"""
+        if not ticket_ids:
+            return []
+        placeholders = ",".join("?" * len(ticket_ids))
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ticket_id, status, attempts, status_code, last_error, next_attempt_at, created_at, updated_at "
+                f"FROM deliveries WHERE ticket_id IN ({placeholders}) ORDER BY created_at DESC",
+                list(ticket_ids)
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def stats(self) -> Dict[str, int]:
+        """Count deliveries by status"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM deliveries GROUP BY status").fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+# Webhook Outbox Worker Class
+class WebhookOutboxWorker:
+    """Background thread that delivers queued webhook payloads with retry and backoff"""
+    
+    def __init__(self, outbox: WebhookOutbox, transport: Optional[WebhookTransport] = None,
+                 guards: Optional[WebhookGuardRegistry] = None,
+                 delivered_keys: Optional[DeliveredKeyCache] = None, metrics: Optional[WebhookMetrics] = None,
+                 max_attempts: int = WEBHOOK_OUTBOX_MAX_ATTEMPTS, base_backoff: float = WEBHOOK_OUTBOX_BASE_BACKOFF,
+                 max_backoff: float = WEBHOOK_OUTBOX_MAX_BACKOFF, poll_interval: float = WEBHOOK_OUTBOX_POLL_INTERVAL):
+        """Initialize with the outbox to drain and the shared HTTP transport"""
+        self.outbox = outbox
+        self.transport = transport
+        self.guards = guards
+        self.delivered_keys = delivered_keys
+        self.metrics = metrics
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._managers = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Start the delivery thread"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="webhook-outbox", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the delivery thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def wake(self):
+        """Check for due deliveries now instead of waiting for the next poll"""
+        self._wake.set()
+    
+    def submit(self, webhook_url: str, payload: Dict[str, Any]) -> str:
+        """Queue a payload and return its ticket ID immediately"""
+        ticket_id = self.outbox.enqueue(webhook_url, payload)
+        self.wake()
+        return ticket_id
+    
+    def _manager_for(self, webhook_url: str) -> WebhookManager:
+        manager = self._managers.get(webhook_url)
+        if manager is None:
+            manager = WebhookManager(webhook_url, transport=self.transport, guards=self.guards,
+                                     delivered_keys=self.delivered_keys, metrics=self.metrics)
+            # Never block the single delivery thread: refusals are re-queued by _deliver
+            manager.rate_limit_wait = 0.0
+            manager.in_flight_wait = 0.0
+            self._managers[webhook_url] = manager
+        return manager
+    
+    def _backoff(self, attempts: int) -> float:
+        """Delay before the next attempt after `attempts` failures"""
+        return min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+    
+    def _deliver(self, delivery: Dict[str, Any]):
+        """Attempt one claimed delivery and record its outcome"""
+        manager = self._manager_for(delivery['webhook_url'])
+        outcome = manager.post_payload(delivery['payload'])
+        if outcome.get('circuit_open') or outcome.get('rate_limited') or outcome.get('in_flight'):
+            # Never reached the webhook, so this does not use up an attempt
+            retry_at = time.time() + max(outcome.get('retry_after', 0.0), self.poll_interval)
+            self.outbox.record_attempt(delivery['ticket_id'], outcome, delivery['attempts'], retry_at)
+            return
+        attempts = delivery['attempts'] + 1
+        next_attempt_at = None
+        if not outcome['success'] and attempts < self.max_attempts and outcome.get('error_type') != 'encoding':
+            next_attempt_at = time.time() + self._backoff(attempts)
+        elif not outcome.get('duplicate'):
+            manager.record_delivery(attempts, outcome['success'])
+        self.outbox.record_attempt(delivery['ticket_id'], outcome, attempts, next_attempt_at)
+    
+    def _requeue(self, delivery: Dict[str, Any], error: Exception):
+        """Put a claimed delivery back to pending after an unexpected error, counting it as an attempt"""
+        attempts = delivery['attempts'] + 1
+        outcome = {'success': False, 'status_code': None, 'error': f"{type(error).__name__}: {error}"}
+        next_attempt_at = time.time() + self._backoff(attempts) if attempts < self.max_attempts else None
+        try:
+            self.outbox.record_attempt(delivery['ticket_id'], outcome, attempts, next_attempt_at)
+        except Exception:
+            # Left in 'sending'; the outbox re-queues those when it is next opened
+            logger.exception("Could not re-queue webhook outbox delivery %s", delivery['ticket_id'])
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                deliveries = self.outbox.claim_due()
+            except sqlite3.Error:
+                deliveries = []
+            for delivery in deliveries:
+                try:
+                    self._deliver(delivery)
+                except Exception as e:
+                    logger.exception("Webhook outbox delivery %s failed", delivery['ticket_id'])
+                    self._requeue(delivery, e)
+            if not deliveries:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+@st.cache_resource
+def get_webhook_outbox_worker() -> WebhookOutboxWorker:
+    """Get the running webhook outbox worker shared by all sessions"""
+    worker = WebhookOutboxWorker(WebhookOutbox(WEBHOOK_OUTBOX_PATH), transport=get_webhook_transport(),
+                                 guards=get_webhook_guards(), delivered_keys=get_delivered_key_cache(),
+                                 metrics=get_webhook_metrics())
+    worker.start()
+    return worker
+
+# Bulk Webhook Sender Class
+class BulkWebhookSender:
+    """Deliver many formatted addresses concurrently through a bounded thread pool"""
+    
+    def __init__(self, webhook_manager: WebhookManager, max_workers: int = BULK_IMPORT_MAX_WORKERS):
+        """Initialize with the webhook manager to deliver through"""
+        self.webhook_manager = webhook_manager
+        self.max_workers = max_workers
+    
+    def send_frame(self, formatted_df: pd.DataFrame, progress_callback=None, batch_size: Optional[int] = None,
+                   compress: bool = WEBHOOK_BATCH_GZIP) -> pd.DataFrame:
+        """Deliver each row of formatted_df and return one result row per address
+        
+        With batch_size, rows go out as batch envelopes of up to batch_size addresses
+        (gzip-encoded when compress is set) instead of one request per address.
+        progress_callback(done, total) is called from the calling thread as deliveries
+        finish, so it may safely update Streamlit elements.
+        """
+        records = formatted_df.to_dict('records')
+        results = [None] * len(records)
+        if not records:
+            return pd.DataFrame(columns=['delivered', 'duplicate', 'status_code', 'attempts', 'error'],
+                                index=formatted_df.index)
+        
+        manager = self.webhook_manager
+        if batch_size:
+            chunks = [list(range(start, min(start + batch_size, len(records))))
+                      for start in range(0, len(records), batch_size)]
+        else:
+            chunks = [[position] for position in range(len(records))]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk-webhook") as executor:
+            futures = {}
+            for chunk in chunks:
+                if batch_size:
+                    future = executor.submit(manager.deliver_batch, [records[p] for p in chunk], compress)
+                else:
+                    future = executor.submit(manager.deliver_payload, manager.build_payload(records[chunk[0]]))
+                futures[future] = chunk
+            
+            done = 0
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'status_code': None, 'attempt': 0, 'error': str(e)}
+                duplicates = result.get('duplicates', [result.get('duplicate', False)] * len(chunk))
+                in_flight = result.get('in_flight', [False] * len(chunk))
+                if not isinstance(in_flight, list):
+                    in_flight = [in_flight] * len(chunk)
+                for position, duplicate, busy in zip(chunk, duplicates, in_flight):
+                    results[position] = {
+                        'delivered': (result['success'] and not busy) or duplicate,
+                        'duplicate': duplicate,
+                        'status_code': result.get('status_code'),
+                        'attempts': result.get('attempt'),
+                        'error': "skipped: the same address is still being sent by another request" if busy
+                                 else result.get('error') or ''
+                    }
+                done += len(chunk)
+                if progress_callback is not None:
+                    progress_callback(done, len(records))
+        
+        return pd.DataFrame(results, index=formatted_df.index)
+
+# Webhook Batcher Class
+class WebhookBatcher:
+    """Collect addresses submitted one at a time and send them as batch envelopes
+    
+    A batch is sent once batch_size addresses are waiting or the oldest has waited
+    linger_seconds, whichever comes first. submit() returns a Future that resolves to
+    the result of the batch carrying that address.
+    """
+    
+    def __init__(self, webhook_manager: WebhookManager, batch_size: int = WEBHOOK_BATCH_SIZE,
+                 linger_seconds: float = WEBHOOK_BATCH_LINGER_SECONDS, compress: bool = WEBHOOK_BATCH_GZIP,
+                 max_in_flight: int = 4):
+        """Initialize and start the batching thread"""
+        self.webhook_manager = webhook_manager
+        self.batch_size = batch_size
+        self.linger_seconds = linger_seconds
+        self.compress = compress
+        self._pending = []  # (address, future)
+        self._oldest_at = 0.0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="webhook-batch")
+        self.batches_sent = 0
+        self.addresses_sent = 0
+        self._thread = threading.Thread(target=self._run, name="webhook-batcher", daemon=True)
+        self._thread.start()
+    
+    def submit(self, address_data: Dict[str, Any]) -> Future:
+        """Queue a formatted address for the next batch"""
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WebhookBatcher is closed")
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending.append((address_data, future))
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return future
+    
+    def flush(self):
+        """Send whatever is waiting now, without waiting for the linger time"""
+        with self._condition:
+            self._oldest_at = float('-inf')
+            self._condition.notify()
+    
+    def close(self):
+        """Send the remaining addresses and wait for all batches to finish"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._pending:
+                        wait = self._oldest_at + self.linger_seconds - time.monotonic()
+                        if len(self._pending) >= self.batch_size or wait <= 0 or self._closed:
+                            break
+                        self._condition.wait(wait)
+                    elif self._closed:
+                        return
+                    else:
+                        self._condition.wait()
+                batch = self._pending[:self.batch_size]
+                self._pending = self._pending[self.batch_size:]
+                if self._pending:
+                    self._oldest_at = time.monotonic()
+            self._executor.submit(self._send, batch)
+    
+    def _send(self, batch: List[Tuple[Dict[str, Any], Future]]):
+        try:
+            result = self.webhook_manager.deliver_batch([address for address, _ in batch], compress=self.compress)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches_sent += 1
+        self.addresses_sent += result.get('sent', 0)
+        for (_, future), duplicate, busy in zip(batch, result['duplicates'], result['in_flight']):
+            if busy:
+                future.set_result({**result, 'success': False, 'duplicate': False, 'in_flight': True,
+                                   'error': "skipped: the same address is still being sent by another request"})
+            else:
+                future.set_result({**result, 'duplicate': duplicate, 'in_flight': False})
+
+def normalize_address_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename uploaded CSV columns to the address field names using ADDRESS_CSV_COLUMN_ALIASES"""
+    renames = {}
+    for column in df.columns:
+        key = ''.join(ch for ch in str(column).lower() if ch.isalnum())
+        if key in ADDRESS_CSV_COLUMN_ALIASES and ADDRESS_CSV_COLUMN_ALIASES[key] not in renames.values():
+            renames[column] = ADDRESS_CSV_COLUMN_ALIASES[key]
+    return df.rename(columns=renames)
+
+def display_bulk_address_import():
+    """Bulk CSV address import: validate all rows, then deliver the valid ones concurrently"""
+    st.subheader("📦 Bulk CSV Import")
+    st.markdown("Upload a CSV with columns such as `addressLine1`, `addressLine2`, `city`, `state`, `zipCode`, "
+                "`county`, `propertyType` and `notes`.")
+    
+    uploaded_file = st.file_uploader("Address CSV", type=['csv'], key="bulk_address_csv")
+    if uploaded_file is None:
+        return
+    
+    try:
+        raw_df = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+    except Exception as e:
+        st.error(f"Error reading CSV: {str(e)}")
+        return
+    
+    upload_source = (uploaded_file.name, uploaded_file.size)
+    webhook_manager = create_webhook_manager(N8N_WEBHOOK_URL)
+    upload_df = normalize_address_columns(raw_df)
+    validated = webhook_manager.validate_address_frame(upload_df)
+    valid_count = int(validated['valid'].sum())
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rows", len(validated))
+    with col2:
+        st.metric("Valid", valid_count)
+    with col3:
+        st.metric("With Warnings", int(validated['warnings'].ne('').sum()))
+    
+    invalid = validated[~validated['valid']]
+    if not invalid.empty:
+        with st.expander(f"❌ {len(invalid)} rows will be skipped"):
+            st.dataframe(invalid[['addressLine1', 'city', 'state', 'zipCode', 'errors']], use_container_width=True)
+    
+    max_workers = st.slider("Concurrent deliveries", 1, WEBHOOK_POOL_MAXSIZE, BULK_IMPORT_MAX_WORKERS)
+    col1, col2 = st.columns(2)
+    with col1:
+        batch_mode = st.checkbox("Send as batch envelopes", value=False,
+                                 help="Send several addresses per request. The n8n workflow must read the 'addresses' list.")
+        compress = st.checkbox("gzip request bodies", value=WEBHOOK_BATCH_GZIP, disabled=not batch_mode)
+    with col2:
+        batch_size = st.number_input("Addresses per batch", min_value=2, max_value=1000,
+                                     value=WEBHOOK_BATCH_SIZE, step=10, disabled=not batch_mode)
+    
+    if st.button(f"🚀 Send {valid_count} Valid Addresses", disabled=valid_count == 0):
+        formatted = webhook_manager.format_address_frame(upload_df[validated['valid']])
+        progress_bar = st.progress(0.0)
+        status_text = st.empty()
+        
+        def update_progress(done: int, total: int):
+            progress_bar.progress(done / total)
+            status_text.text(f"Delivered {done} of {total}")
+        
+        start_time = time.time()
+        sender = BulkWebhookSender(webhook_manager, max_workers=max_workers)
+        delivery = sender.send_frame(formatted, progress_callback=update_progress,
+                                     batch_size=int(batch_size) if batch_mode else None, compress=compress)
+        elapsed = time.time() - start_time
+        
+        results = validated.drop(columns='valid').copy()
+        results.insert(0, 'row', np.arange(2, len(results) + 2))  # CSV line number, after the header
+        results['formattedAddress'] = formatted['formattedAddress'].reindex(results.index).fillna('')
+        results = results.join(delivery)
+        results['status'] = np.select(
+            [~validated['valid'], results['duplicate'].eq(True), results['delivered'].eq(True)],
+            ['skipped', 'duplicate', 'delivered'],
+            default='failed'
+        )
+        st.session_state['bulk_import_results'] = (upload_source, results, elapsed)
+    
+    # Keep showing the last run's results (and download) across reruns for the same file
+    last_run = st.session_state.get('bulk_import_results')
+    if last_run is not None and last_run[0] == upload_source:
+        _, results, elapsed = last_run
+        status_counts = results['status'].value_counts()
+        st.success(
+            f"Finished in {elapsed:.1f}s: "
+            f"{status_counts.get('delivered', 0)} delivered, {status_counts.get('failed', 0)} failed, "
+            f"{status_counts.get('skipped', 0)} skipped, {status_counts.get('duplicate', 0)} already delivered"
+        )
+        st.dataframe(results, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="📥 Download Results CSV",
+            data=results.to_csv(index=False),
+            file_name=f"bulk_import_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv"
+        )
+
+def display_outbox_status():
+    """Display delivery status for this session's queued submissions"""
+    tickets = st.session_state.get('webhook_tickets', [])
+    if not tickets:
+        return
+    
+    st.subheader("📬 Submission Status")
+    col1, col2 = st.columns([3, 1])
+    with col2:
+        st.button("🔄 Refresh Status")
+    
+    statuses = get_webhook_outbox_worker().outbox.get_statuses(tickets)
+    status_icons = {'pending': '⏳', 'sending': '📤', 'delivered': '✅', 'failed': '❌'}
+    rows = [{
+        'Ticket': status['ticket_id'],
+        'Status': f"{status_icons.get(status['status'], '')} {status['status']}",
+        'Attempts': status['attempts'],
+        'Status Code': status['status_code'],
+        'Last Error': status['last_error'] or '',
+        'Submitted': datetime.fromtimestamp(status['created_at']).strftime('%I:%M:%S %p')
+    } for status in statuses]
+    with col1:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+def display_webhook_diagnostics():
+    """Display webhook latency and outcome metrics for tuning timeout and retries"""
+    with st.expander("🩺 Webhook Diagnostics"):
+        metrics = get_webhook_metrics()
+        snapshot = metrics.snapshot()
+        webhook_manager = create_webhook_manager(N8N_WEBHOOK_URL)
+        latency = snapshot['latency'] or {}
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Deliveries", snapshot['deliveries'])
+            st.metric("HTTP Attempts", snapshot['attempts'])
+        with col2:
+            success_rate = snapshot['success_rate']
+            st.metric("Success Rate", f"{success_rate:.1%}" if success_rate is not None else "N/A")
+            st.metric("Timeouts", snapshot['timeouts'])
+        with col3:
+            st.metric("p50 Latency", f"{latency['p50']:.2f}s" if latency else "N/A")
+            st.metric("p95 Latency", f"{latency['p95']:.2f}s" if latency else "N/A")
+        with col4:
+            st.metric("p99 Latency", f"{latency['p99']:.2f}s" if latency else "N/A")
+            st.metric("Duplicates Skipped", snapshot['rejections'].get('duplicate', 0))
+        
+        st.caption(
+            f"Current settings: timeout {webhook_manager.timeout}s, max retries {webhook_manager.max_retries}. "
+            f"Latency percentiles cover the last {snapshot['latency_samples']} attempts since "
+            f"{datetime.fromtimestamp(snapshot['since']).strftime('%Y-%m-%d %I:%M %p')}."
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Attempts per delivery**")
+            if snapshot['attempts_per_delivery']:
+                st.bar_chart(pd.Series(snapshot['attempts_per_delivery'], name='Deliveries'))
+            else:
+                st.write("No deliveries yet")
+        with col2:
+            st.markdown("**Outcomes**")
+            outcomes = {f"HTTP {code}": count for code, count in snapshot['status_counts'].items()}
+            outcomes.update({f"Error: {kind}": count for kind, count in snapshot['error_counts'].items()
+                             if kind != 'http_status'})
+            outcomes.update({f"Skipped: {reason}": count for reason, count in snapshot['rejections'].items()})
+            if outcomes:
+                st.dataframe(pd.DataFrame({'Outcome': list(outcomes), 'Count': list(outcomes.values())}),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.write("No attempts yet")
+        
+        breaker = get_webhook_guards().breaker(N8N_WEBHOOK_URL).snapshot()
+        st.caption(
+            f"Circuit: {breaker['state'].replace('_', '-')} "
+            f"({breaker['window_calls']} calls in window, {breaker['window_error_rate']:.0%} errors, "
+            f"opened {breaker['times_opened']} times)"
+        )
+        
+        if st.button("Reset Metrics"):
+            metrics.reset()
+            st.rerun()
 
 def display_webhook_result(result: Dict[str, Any]):
     """Display webhook result in Streamlit UI"""
-    if result['success']:
+    if result.get('duplicate'):
+        st.info("♻️ This address was already delivered to n8n recently, so it was not sent again.")
+    
+    elif result['success']:
         st.success("✅ Address submitted successfully to n8n webhook!")
         
-        with st.expander("📋 Submission Details"):
-            st.json({
-                'status_code': result['status_code'],
-                'attempt': result['attempt'],
-                'timestamp': result['payload']['timestamp']
-            })
-            
-        with st.expander("📤 Sent Data"):
-            # Remove sensitive data for display
-            display_payload = result['payload'].copy()
-            st.json(display_payload)
-            
-    else:
-        st.error("❌ Failed to submit address to webhook")
+        with st.expander("📋 Submission Details"):
+            st.json({
+                'status_code': result['status_code'],
+                'attempt': result['attempt'],
+                'timestamp': result['payload']['timestamp']
+            })
+            
+        with st.expander("📤 Sent Data"):
+            # Remove sensitive data for display
+            display_payload = result['payload'].copy()
+            st.json(display_payload)
+    
+    elif result.get('in_flight'):
+        st.warning("⏳ This address is still being sent by an earlier submission; check back in a moment.")
+    
+    elif result.get('circuit_open'):
+        st.error("⚡ n8n webhook is currently failing, so this submission was not sent. "
+                 "Please try again shortly or use the background queue.")
+    
+    else:
+        st.error("❌ Failed to submit address to webhook")
+        
+        with st.expander("🔍 Error Details"):
+            st.write(f"**Status Code:** {result.get('status_code', 'N/A')}")
+            st.write(f"**Attempts Made:** {result['attempt']}")
+            st.write(f"**Error Message:** {result['response_text']}")
+            
+        st.info("💡 **Troubleshooting Tips:**")
+        st.write("- Check if the n8n webhook URL is correct and accessible")
+        st.write("- Verify that the n8n workflow is active")
+        st.write("- Check your internet connection")
+        st.write("- Contact your system administrator if the issue persists")
+
+def validate_webhook_url(url: str) -> bool:
+    """Basic validation of webhook URL format"""
+    if not url:
+        return False
+    
+    # Basic URL validation
+    if not (url.startswith('http://') or url.startswith('https://')):
+        return False
+    
+    # Should contain 'webhook' in the path (common for n8n)
+    if 'webhook' not in url.lower():
+        return False
+    
+    return True
+
+def report_input_key(property_data: Dict[str, Any], metrics: Dict[str, float]) -> str:
+    """Stable hash of the report inputs; changes whenever the property or its metrics change"""
+    canonical = json.dumps({"property": property_data, "metrics": metrics}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+# Report Artifact Cache Class
+class ReportArtifactCache:
+    """Two-tier (memory, then disk) LRU cache of rendered reports
+    
+    Entries are content-addressed by the report inputs, the format and
+    REPORT_GENERATOR_VERSION, so a given property renders once no matter which
+    session asks for it. Each tier evicts least recently used entries to stay
+    within its byte budget.
+    """
+    
+    def __init__(self, directory: str = REPORT_CACHE_DIR, memory_bytes: int = REPORT_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = REPORT_CACHE_DISK_BYTES, version: str = REPORT_GENERATOR_VERSION):
+        """Initialize with the disk directory, tier budgets and generator version"""
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.version = version
+        self._memory = OrderedDict()  # key -> bytes
+        self._memory_used = 0
+        self._disk_sizes = None  # path -> size of the disk tier files, scanned on first write
+        self._disk_used = 0
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'renders': 0,
+                       'memory_evictions': 0, 'disk_evictions': 0}
+    
+    def artifact_key(self, report_format: str, property_data: Dict[str, Any], metrics: Dict[str, float]) -> str:
+        """Content address of one rendered report"""
+        input_key = report_input_key(property_data, metrics)
+        return hashlib.sha256(f"{self.version}|{report_format}|{input_key}".encode('utf-8')).hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+    
+    def _remember(self, key: str, data: bytes):
+        """Put an entry in the memory tier, evicting least recently used entries (lock held)"""
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        if len(data) > self.memory_bytes:
+            return
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            self._stats['memory_evictions'] += 1
+    
+    def get(self, key: str, record_miss: bool = True) -> Optional[bytes]:
+        """Look up an artifact in memory, then on disk (promoting disk hits to memory)
+        
+        record_miss=False is for speculative lookups that should not count as misses.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return self._memory[key]
+        
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # disk tier LRU order follows access time via mtime
+        except OSError:
+            if record_miss:
+                with self._lock:
+                    self._stats['misses'] += 1
+            return None
+        
+        with self._lock:
+            self._stats['disk_hits'] += 1
+            self._remember(key, data)
+        return data
+    
+    def put(self, key: str, data: bytes):
+        """Store an artifact in both tiers"""
+        with self._lock:
+            self._remember(key, data)
+        
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            if self._count_disk_write(path, len(data)):
+                self._enforce_disk_budget()
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _scan_disk(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every file in the disk tier"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.bin'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # evicted by another thread mid-scan
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def _count_disk_write(self, path: str, size: int) -> bool:
+        """Add a written file to the in-memory disk usage; True when the tier is over budget
+        
+        The directory is scanned once, on the first write, to pick up files left by
+        earlier runs; after that usage is tracked here and the directory is only
+        scanned again when eviction is needed.
+        """
+        with self._lock:
+            if self._disk_sizes is None:
+                self._disk_sizes = {entry_path: entry_size for _, entry_size, entry_path in self._scan_disk()}
+                self._disk_used = sum(self._disk_sizes.values())
+            else:
+                self._disk_used += size - self._disk_sizes.get(path, 0)
+                self._disk_sizes[path] = size
+            return self._disk_used > self.disk_bytes
+    
+    def _enforce_disk_budget(self):
+        """Delete the least recently used files until the disk tier is back under budget
+        
+        Evicts down to REPORT_CACHE_DISK_EVICT_TO of the budget so a full tier is not
+        rescanned on every write. The scan also resets the tracked usage, so files
+        removed outside this cache stop counting against the budget.
+        """
+        entries = sorted(self._scan_disk())
+        used = sum(size for _, size, _ in entries)
+        target = self.disk_bytes * REPORT_CACHE_DISK_EVICT_TO if used > self.disk_bytes else used
+        removed = set()
+        for _, size, path in entries:
+            if used <= target:
+                break
+            try:
+                os.remove(path)
+                used -= size
+                removed.add(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_sizes = {path: size for _, size, path in entries if path not in removed}
+            self._disk_used = used
+            self._stats['disk_evictions'] += len(removed)
+    
+    def get_or_render(self, report_format: str, property_data: Dict[str, Any], metrics: Dict[str, float],
+                      render) -> bytes:
+        """Return the cached artifact, or render it with render() and cache the result"""
+        key = self.artifact_key(report_format, property_data, metrics)
+        data = self.get(key)
+        if data is None:
+            rendered = render()
+            data = rendered.encode('utf-8') if isinstance(rendered, str) else bytes(rendered)
+            with self._lock:
+                self._stats['renders'] += 1
+            self.put(key, data)
+        return data
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_bytes'] = self._memory_used
+            stats['disk_bytes'] = self._disk_used
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+@st.cache_resource
+def get_report_artifact_cache() -> ReportArtifactCache:
+    """Get the report artifact cache shared by all sessions"""
+    return ReportArtifactCache()
+
+# Investment scoring thresholds, shared by the single-property analysis and the batch scorer.
+# Each rule is (metric, comparison, bands, fallback). The first band whose threshold the metric
+# meets wins; a band is (threshold, points, category, reason code, message) and the fallback
+# is (points, category, reason code, message).
+INVESTMENT_SCORE_RULES = [
+    ("cash_on_cash_return", ">=", [
+        (12, 20, "summary", "COC_EXCELLENT", "Excellent Cash-on-Cash Return."),
+        (8, 15, "summary", "COC_GOOD", "Good Cash-on-Cash Return."),
+        (5, 10, "warnings", "COC_FAIR", "Cash-on-Cash Return is fair, consider optimizing expenses or increasing income."),
+    ], (5, "risks", "COC_LOW", "Low Cash-on-Cash Return, indicating poor cash flow generation relative to investment.")),
+    ("cap_rate", ">=", [
+        (8, 20, "summary", "CAP_STRONG", "Strong Cap Rate, indicating good return potential."),
+        (6, 15, "summary", "CAP_GOOD", "Good Cap Rate."),
+        (4, 10, "warnings", "CAP_FAIR", "Cap Rate is fair, may indicate lower market demand or higher risk."),
+    ], (5, "risks", "CAP_LOW", "Low Cap Rate, suggesting higher price relative to NOI.")),
+    ("dscr", ">=", [
+        (1.5, 20, "summary", "DSCR_STRONG", "Very strong Debt Service Coverage Ratio, excellent loan repayment ability."),
+        (1.25, 15, "summary", "DSCR_HEALTHY", "Healthy Debt Service Coverage Ratio."),
+        (1.0, 10, "warnings", "DSCR_BREAKEVEN", "DSCR is at break-even, monitor cash flow closely."),
+    ], (5, "risks", "DSCR_LOW", "DSCR below 1.0, indicating potential difficulty in covering debt payments.")),
+    ("occupancy_rate", ">=", [
+        (90, 15, "summary", "OCC_HIGH", "High Occupancy Rate, stable rental income."),
+        (70, 10, "warnings", "OCC_MODERATE", "Moderate Occupancy Rate, potential for improvement."),
+    ], (5, "risks", "OCC_LOW", "Low Occupancy Rate, impacting rental income and profitability.")),
+    ("oer", "<=", [
+        (35, 15, "summary", "OER_LOW", "Low Operating Expense Ratio, efficient management."),
+        (50, 10, "warnings", "OER_MODERATE", "Moderate Operating Expense Ratio, review for potential savings."),
+    ], (5, "risks", "OER_HIGH", "High Operating Expense Ratio, significantly impacting profitability.")),
+]
+# (minimum score, tier, recommendation); scores below every band get the fallback
+INVESTMENT_TIERS = [
+    (80, "Strong", "This property shows strong investment potential. Consider proceeding with due diligence."),
+    (60, "Good", "Good investment opportunity, but further analysis on identified warnings is recommended."),
+]
+INVESTMENT_TIER_FALLBACK = ("High Risk", "This property carries significant risks. Thorough due diligence and risk mitigation strategies are essential before investment.")
+# Sheet (camelCase) column names accepted for the snake_case investment inputs
+PORTFOLIO_COLUMN_ALIASES = {
+    "squareFootage": "square_footage", "propertyTaxes": "property_taxes", "cashInvested": "cash_invested",
+    "grossRentalIncome": "gross_rental_income", "operatingExpenses": "operating_expenses",
+    "totalDebtService": "total_debt_service", "occupiedUnits": "occupied_units", "totalUnits": "total_units",
+    "propertyType": "property_type", "yearBuilt": "year_built", "lotSize": "lot_size",
+    "formattedAddress": "address"
+}
+
+# Snake_case inputs the portfolio score depends on (cap rate, cash-on-cash return and DSCR)
+PORTFOLIO_REQUIRED_COLUMNS = ["price", "noi", "cash_invested", "total_debt_service"]
+
+# HTML report template: static CSS and page shell, built once; only the {slots} are filled per report
+REPORT_HTML_CSS = """
+    body {
+        font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+        margin: 0;
+        padding: 20px;
+        background: linear-gradient(135deg, #f0f8ff 0%, #e6f3ff 100%);
+        color: #333;
+    }
+    .container {
+        max-width: 1000px;
+        margin: 0 auto;
+        background-color: white;
+        padding: 40px;
+        border-radius: 15px;
+        box-shadow: 0 10px 30px rgba(0,0,0,0.1);
+    }
+    .header {
+        text-align: center;
+        margin-bottom: 40px;
+        padding-bottom: 20px;
+        border-bottom: 3px solid #3498db;
+    }
+    h1 {
+        color: #2c3e50;
+        font-size: 2.5em;
+        margin-bottom: 10px;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
+    }
+    .subtitle {
+        color: #7f8c8d;
+        font-size: 1.1em;
+        margin-bottom: 20px;
+    }
+    h2 {
+        color: #34495e;
+        border-left: 5px solid #3498db;
+        padding-left: 15px;
+        margin-top: 40px;
+        margin-bottom: 20px;
+        font-size: 1.8em;
+    }
+    .property-overview {
+        display: grid;
+        grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+        gap: 20px;
+        margin: 30px 0;
+    }
+    .info-card {
+        background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
+        padding: 20px;
+        border-radius: 10px;
+        border-left: 4px solid #3498db;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    }
+    .info-card h3 {
+        margin: 0 0 10px 0;
+        color: #2c3e50;
+        font-size: 1.1em;
+    }
+    .info-card p {
+        margin: 0;
+        font-size: 1.3em;
+        font-weight: bold;
+        color: #3498db;
+    }
+    table {
+        width: 100%;
+        border-collapse: collapse;
+        margin: 20px 0;
+        background-color: white;
+        border-radius: 10px;
+        overflow: hidden;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    }
+    th, td {
+        padding: 15px;
+        text-align: left;
+        border-bottom: 1px solid #ecf0f1;
+    }
+    th {
+        background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
+        color: white;
+        font-weight: bold;
+        text-transform: uppercase;
+        letter-spacing: 0.5px;
+    }
+    tr:nth-child(even) {
+        background-color: #f8f9fa;
+    }
+    tr:hover {
+        background-color: #e8f4fd;
+        transition: background-color 0.3s ease;
+    }
+    .metric-value {
+        font-weight: bold;
+        font-size: 1.1em;
+    }
+    .positive { color: #27ae60; }
+    .negative { color: #e74c3c; }
+    .neutral { color: #f39c12; }
+    .analysis-section {
+        background: linear-gradient(135deg, #e8f4fd 0%, #d6eaff 100%);
+        padding: 25px;
+        border-radius: 10px;
+        margin: 30px 0;
+        border: 1px solid #3498db;
+    }
+    .analysis-section h3 {
+        color: #2c3e50;
+        margin-top: 0;
+    }
+    .recommendation {
+        background-color: #d5f4e6;
+        border-left: 4px solid #27ae60;
+        padding: 15px;
+        margin: 15px 0;
+        border-radius: 5px;
+    }
+    .warning {
+        background-color: #ffeaa7;
+        border-left: 4px solid #f39c12;
+        padding: 15px;
+        margin: 15px 0;
+        border-radius: 5px;
+    }
+    .risk {
+        background-color: #ffcccb;
+        border-left: 4px solid #e74c3c;
+        padding: 15px;
+        margin: 15px 0;
+        border-radius: 5px;
+    }
+    .footer {
+        margin-top: 50px;
+        text-align: center;
+        color: #7f8c8d;
+        font-size: 0.9em;
+        padding-top: 20px;
+        border-top: 1px solid #ecf0f1;
+    }
+    .portfolio-property {
+        margin-top: 60px;
+        padding-top: 20px;
+        border-top: 3px solid #3498db;
+    }
+    .portfolio-property h1 {
+        font-size: 1.8em;
+        text-align: left;
+    }
+    @media print {
+        body { background: white; }
+        .container { box-shadow: none; }
+        .portfolio-property { page-break-before: always; }
+    }
+"""
+REPORT_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>"""
+REPORT_HTML_STYLE = """</title>
+    <style>""" + REPORT_HTML_CSS + """    </style>
+</head>
+<body>
+    <div class="container">"""
+REPORT_HTML_HEADER = """
+        <div class="header">
+            <h1>{heading}</h1>
+            <div class="subtitle">{subtitle}</div>
+            <p><strong>Report Generated:</strong> {report_date}</p>
+        </div>
+"""
+REPORT_HTML_PAGE_END = """
+        <div class="footer">
+            <p>This report is for informational purposes only and does not constitute financial advice. Consult with a qualified professional before making investment decisions.</p>
+            <p>&copy; {year} Real Estate Management System. All rights reserved.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+REPORT_HTML_PROPERTY_SECTION = """
+        <h2>🏠 Property Overview</h2>
+        <div class="property-overview">{property_cards}
+        </div>
+        
+        <h2>💰 Financial Summary</h2>
+        <div class="property-overview">{financial_cards}
+        </div>
         
-        with st.expander("🔍 Error Details"):
-            st.write(f"**Status Code:** {result.get('status_code', 'N/A')}")
-            st.write(f"**Attempts Made:** {result['attempt']}")
-            st.write(f"**Error Message:** {result['response_text']}")
+        <h2>📊 Investment Metrics</h2>
+        <table>
+            <thead>
+                <tr>
+                    <th>Metric</th>
+                    <th>Value</th>
+                    <th>Industry Benchmark</th>
+                    <th>Assessment</th>
+                </tr>
+            </thead>
+            <tbody>{metric_rows}
+            </tbody>
+        </table>
+        
+        <div class="analysis-section">
+            <h2>💡 Investment Analysis &amp; Recommendations</h2>
+            <h3>Overall Score: {score}/100</h3>
             
-        st.info("💡 **Troubleshooting Tips:**")
-        st.write("- Check if the n8n webhook URL is correct and accessible")
-        st.write("- Verify that the n8n workflow is active")
-        st.write("- Check your internet connection")
-        st.write("- Contact your system administrator if the issue persists")
+            <h4>Summary:</h4>
+            <ul>{summary}</ul>
+            
+            <h4>Recommendations:</h4>
+            <div class="recommendation">
+                <ul>{recommendations}</ul>
+            </div>
+            {warnings}{risks}
+        </div>
+"""
+REPORT_HTML_CARD = """
+            <div class="info-card">
+                <h3>{label}</h3>
+                <p>{value}</p>
+            </div>"""
+REPORT_HTML_METRIC_ROW = """
+                <tr>
+                    <td>{label}</td>
+                    <td class="metric-value">{value}</td>
+                    <td>{benchmark}</td>
+                    <td class="{css_class}">{assessment}</td>
+                </tr>"""
+REPORT_HTML_ANALYSIS_BLOCK = """
+            <h4>{title}:</h4>
+            <div class="{css_class}"><ul>{items}</ul></div>"""
+# Info cards: (label, property field, value format, default)
+REPORT_HTML_PROPERTY_CARDS = [
+    ("📍 Address", "address", "{}", "N/A"),
+    ("💰 Purchase Price", "price", "${:,.2f}", 0),
+    ("📐 Square Footage", "square_footage", "{:,} sq ft", 0),
+    ("🏘️ Property Type", "property_type", "{}", "N/A"),
+    ("🛏️ Bedrooms", "bedrooms", "{}", 0),
+    ("🚿 Bathrooms", "bathrooms", "{}", 0),
+    ("📅 Year Built", "year_built", "{}", "N/A"),
+    ("🏞️ Lot Size", "lot_size", "{:,.0f} sq ft", 0),
+]
+REPORT_HTML_FINANCIAL_CARDS = [
+    ("💵 Net Operating Income", "noi", "${:,.2f}", 0),
+    ("💸 Cash Invested", "cash_invested", "${:,.2f}", 0),
+    ("📈 Gross Rental Income", "gross_rental_income", "${:,.2f}", 0),
+    ("📉 Operating Expenses", "operating_expenses", "${:,.2f}", 0),
+]
+# Metric rows: (label, metric, value format, benchmark, comparison, (Excellent, Good, Fair) thresholds).
+# Values meeting Good are positive and values outside Fair negative. Annual cash flow only
+# checks for a positive value; price per square foot has no benchmark (comparison None).
+REPORT_HTML_METRIC_ROWS = [
+    ("Annual Cash Flow", "annual_cash_flow", "${:,.2f}", "Positive", ">", None),
+    ("Cash-on-Cash Return", "cash_on_cash_return", "{:.2f}%", "8-12%", ">=", (12, 8, 5)),
+    ("Cap Rate", "cap_rate", "{:.2f}%", "6-10%", ">=", (8, 6, 4)),
+    ("Debt Service Coverage Ratio", "dscr", "{:.2f}", "1.25+", ">=", (1.5, 1.25, 1.0)),
+    ("Gross Rental Yield", "gross_rental_yield", "{:.2f}%", "8-12%", ">=", (10, 8, 6)),
+    ("Price per Square Foot", "price_per_sqft", "${:.2f}", "Market Dependent", None, None),
+    ("Operating Expense Ratio (OER)", "oer", "{:.2f}%", "30-50%", "<=", (35, 50, 60)),
+    ("Return on Investment (ROI)", "roi", "{:.2f}%", "10-20%", ">=", (20, 10, 5)),
+    ("Occupancy Rate", "occupancy_rate", "{:.2f}%", "90-95%", ">=", (95, 90, 70)),
+    ("Net Yield", "net_yield", "{:.2f}%", "5-10%", ">=", (8, 5, 3)),
+    ("Break-Even Ratio", "break_even_ratio", "{:.2f}%", "< 85%", "<", (75, 85, 95)),
+]
+REPORT_HTML_PORTFOLIO_CARDS = [
+    ("🏠 Properties", "properties", "{:,}", 0),
+    ("🟢 Strong", "Strong", "{:,}", 0),
+    ("🟡 Good", "Good", "{:,}", 0),
+    ("🔴 High Risk", "High Risk", "{:,}", 0),
+]
 
-def validate_webhook_url(url: str) -> bool:
-    """Basic validation of webhook URL format"""
-    if not url:
-        return False
-    
-    # Basic URL validation
-    if not (url.startswith('http://') or url.startswith('https://')):
-        return False
-    
-    # Should contain 'webhook' in the path (common for n8n)
-    if 'webhook' not in url.lower():
-        return False
+def compile_html_cards(cards: List[Tuple[str, str, str, Any]]) -> List[Tuple[str, Any, bool, str]]:
+    """(field, default, escape value, format string) per card, with the label already in place
     
-    return True
+    Plain "{}" fields are free text and get escaped; numeric formats are passed the raw value.
+    """
+    return [
+        (field, default, value_format == "{}",
+         REPORT_HTML_CARD.replace("{label}", label).replace("{value}", value_format))
+        for label, field, value_format, default in cards
+    ]
+
+def compile_html_metric_rows(rows: List[Tuple]) -> List[Tuple[str, Optional[str], Optional[Tuple], str]]:
+    """(metric, comparison, thresholds, format string) per metric row, with the static cells in place"""
+    return [
+        (metric, comparison, thresholds,
+         REPORT_HTML_METRIC_ROW.replace("{label}", label).replace("{benchmark}", html.escape(benchmark))
+         .replace("{value}", value_format))
+        for label, metric, value_format, benchmark, comparison, thresholds in rows
+    ]
+
+REPORT_HTML_COMPILED_PROPERTY_CARDS = compile_html_cards(REPORT_HTML_PROPERTY_CARDS)
+REPORT_HTML_COMPILED_FINANCIAL_CARDS = compile_html_cards(REPORT_HTML_FINANCIAL_CARDS)
+REPORT_HTML_COMPILED_PORTFOLIO_CARDS = compile_html_cards(REPORT_HTML_PORTFOLIO_CARDS)
+REPORT_HTML_COMPILED_METRIC_ROWS = compile_html_metric_rows(REPORT_HTML_METRIC_ROWS)
+# Escaped list items for every analysis message the scoring rules can produce
+REPORT_HTML_ANALYSIS_ITEMS = {
+    message: f"<li>{html.escape(message)}</li>"
+    for _, _, bands, fallback in INVESTMENT_SCORE_RULES
+    for message in [band[4] for band in bands] + [fallback[3]]
+}
+REPORT_HTML_ANALYSIS_ITEMS.update({
+    recommendation: f"<li>{html.escape(recommendation)}</li>"
+    for recommendation in [tier[2] for tier in INVESTMENT_TIERS] + [INVESTMENT_TIER_FALLBACK[1]]
+})
 
 # Report Generator Class
 class ReportGenerator:
     """Helper class to generate various types of real estate reports"""
     
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-    
-    def setup_custom_styles(self):
-        """Setup custom styles for PDF generation"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1,  # Center alignment
-            textColor=colors.HexColor('#2c3e50')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            textColor=colors.HexColor('#34495e'),
-            borderWidth=1,
-            borderColor=colors.HexColor('#3498db'),
-            leftIndent=10
-        ))
+    def __init__(self, style_registry: Optional[ReportStyleRegistry] = None):
+        """Initialize with the shared style registry (built on first use)
         
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=6,
-            leftIndent=10
-        ))
+        self.styles is the registry's stylesheet, shared with every other generator
+        in the process: read styles from it, never add or modify them.
+        """
+        self.style_registry = style_registry or get_report_style_registry()
+        self.styles = self.style_registry.styles
     
     def calculate_investment_metrics(self, property_data: Dict[str, Any]) -> Dict[str, float]:
         """Calculate comprehensive investment metrics"""
@@ -573,6 +3724,55 @@ class ReportGenerator:
         
         return metrics
     
+    @staticmethod
+    def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray, scale: float = 1.0,
+                    fallback: float = 0.0) -> np.ndarray:
+        """numerator / denominator * scale where denominator > 0, else fallback"""
+        valid = denominator > 0
+        ratio = np.divide(numerator, denominator, out=np.zeros(len(denominator), dtype=float), where=valid) * scale
+        return np.where(valid, ratio, fallback)
+    
+    def calculate_investment_metrics_frame(self, properties: pd.DataFrame) -> pd.DataFrame:
+        """Calculate investment metrics for every row of a property DataFrame
+        
+        Column-wise equivalent of calculate_investment_metrics: expects the same
+        snake_case inputs (missing columns or values use the same defaults) and
+        returns one column per metric, aligned to properties.index.
+        """
+        defaults = {
+            "price": 0, "noi": 0, "cash_invested": 0, "gross_rental_income": 0,
+            "operating_expenses": 0, "total_debt_service": 0, "occupied_units": 0,
+            "total_units": 1, "square_footage": 1, "property_taxes": 0
+        }
+        values = {
+            name: (pd.to_numeric(properties[name], errors='coerce').fillna(default).to_numpy(dtype=float)
+                   if name in properties.columns else np.full(len(properties), float(default)))
+            for name, default in defaults.items()
+        }
+        price = values["price"]
+        noi = values["noi"]
+        cash_invested = values["cash_invested"]
+        gross_rental_income = values["gross_rental_income"]
+        operating_expenses = values["operating_expenses"]
+        total_debt_service = values["total_debt_service"]
+        
+        annual_cash_flow = gross_rental_income - operating_expenses - total_debt_service
+        cash_on_cash_return = self._safe_ratio(annual_cash_flow, cash_invested, 100)
+        
+        return pd.DataFrame({
+            "annual_cash_flow": annual_cash_flow,
+            "cash_on_cash_return": cash_on_cash_return,
+            "cap_rate": self._safe_ratio(noi, price, 100),
+            "dscr": self._safe_ratio(noi, total_debt_service, fallback=np.inf),
+            "gross_rental_yield": self._safe_ratio(gross_rental_income, price, 100),
+            "price_per_sqft": self._safe_ratio(price, values["square_footage"]),
+            "oer": self._safe_ratio(operating_expenses, gross_rental_income, 100),
+            "roi": cash_on_cash_return.copy(),
+            "occupancy_rate": self._safe_ratio(values["occupied_units"], values["total_units"], 100),
+            "net_yield": self._safe_ratio(annual_cash_flow + total_debt_service, price, 100),
+            "break_even_ratio": self._safe_ratio(operating_expenses + total_debt_service, gross_rental_income, 100)
+        }, index=properties.index)
+    
     def _generate_investment_analysis(self, metrics: Dict[str, float]) -> Dict[str, Any]:
         """Generate investment analysis and recommendations"""
         analysis = {
@@ -584,515 +3784,222 @@ class ReportGenerator:
         }
         
         # Score and Analysis based on metrics
-        if metrics["cash_on_cash_return"] >= 12: analysis["score"] += 20; analysis["summary"].append("Excellent Cash-on-Cash Return.")
-        elif metrics["cash_on_cash_return"] >= 8: analysis["score"] += 15; analysis["summary"].append("Good Cash-on-Cash Return.")
-        elif metrics["cash_on_cash_return"] >= 5: analysis["score"] += 10; analysis["warnings"].append("Cash-on-Cash Return is fair, consider optimizing expenses or increasing income.")
-        else: analysis["score"] += 5; analysis["risks"].append("Low Cash-on-Cash Return, indicating poor cash flow generation relative to investment.")
+        for metric, comparison, bands, fallback in INVESTMENT_SCORE_RULES:
+            value = metrics[metric]
+            points, category, _, message = fallback
+            for threshold, band_points, band_category, _, band_message in bands:
+                if (value >= threshold) if comparison == ">=" else (value <= threshold):
+                    points, category, message = band_points, band_category, band_message
+                    break
+            analysis["score"] += points
+            analysis[category].append(message)
         
-        if metrics["cap_rate"] >= 8: analysis["score"] += 20; analysis["summary"].append("Strong Cap Rate, indicating good return potential.")
-        elif metrics["cap_rate"] >= 6: analysis["score"] += 15; analysis["summary"].append("Good Cap Rate.")
-        elif metrics["cap_rate"] >= 4: analysis["score"] += 10; analysis["warnings"].append("Cap Rate is fair, may indicate lower market demand or higher risk.")
-        else: analysis["score"] += 5; analysis["risks"].append("Low Cap Rate, suggesting higher price relative to NOI.")
+        # Recommendations
+        recommendation = INVESTMENT_TIER_FALLBACK[1]
+        for minimum_score, _, tier_recommendation in INVESTMENT_TIERS:
+            if analysis["score"] >= minimum_score:
+                recommendation = tier_recommendation
+                break
+        analysis["recommendations"].append(recommendation)
         
-        if metrics["dscr"] >= 1.5: analysis["score"] += 20; analysis["summary"].append("Very strong Debt Service Coverage Ratio, excellent loan repayment ability.")
-        elif metrics["dscr"] >= 1.25: analysis["score"] += 15; analysis["summary"].append("Healthy Debt Service Coverage Ratio.")
-        elif metrics["dscr"] >= 1.0: analysis["score"] += 10; analysis["warnings"].append("DSCR is at break-even, monitor cash flow closely.")
-        else: analysis["score"] += 5; analysis["risks"].append("DSCR below 1.0, indicating potential difficulty in covering debt payments.")
+        return analysis
+    
+    def score_investments_frame(self, metrics: pd.DataFrame) -> pd.DataFrame:
+        """Score every row of a metrics frame with the same rules as _generate_investment_analysis
         
-        if metrics["occupancy_rate"] >= 90: analysis["score"] += 15; analysis["summary"].append("High Occupancy Rate, stable rental income.")
-        elif metrics["occupancy_rate"] >= 70: analysis["score"] += 10; analysis["warnings"].append("Moderate Occupancy Rate, potential for improvement.")
-        else: analysis["score"] += 5; analysis["risks"].append("Low Occupancy Rate, impacting rental income and profitability.")
+        Returns 'score', 'tier' and 'reason_codes' (one code per rule, comma-separated)
+        aligned to metrics.index.
+        """
+        # Band index per rule (len(bands) = fallback), then one lookup per distinct combination
+        band_indexes = []
+        score = np.zeros(len(metrics), dtype=int)
+        for metric, comparison, bands, fallback in INVESTMENT_SCORE_RULES:
+            values = metrics[metric].to_numpy(dtype=float)
+            conditions = [values >= band[0] if comparison == ">=" else values <= band[0] for band in bands]
+            band_index = np.select(conditions, np.arange(len(bands)), default=len(bands))
+            points = np.array([band[1] for band in bands] + [fallback[0]])
+            score += points[band_index]
+            band_indexes.append(band_index)
         
-        if metrics["oer"] <= 35: analysis["score"] += 15; analysis["summary"].append("Low Operating Expense Ratio, efficient management.")
-        elif metrics["oer"] <= 50: analysis["score"] += 10; analysis["warnings"].append("Moderate Operating Expense Ratio, review for potential savings.")
-        else: analysis["score"] += 5; analysis["risks"].append("High Operating Expense Ratio, significantly impacting profitability.")
+        tier = np.select([score >= band[0] for band in INVESTMENT_TIERS],
+                         [band[1] for band in INVESTMENT_TIERS], default=INVESTMENT_TIER_FALLBACK[0])
         
-        # Recommendations
-        if analysis["score"] >= 80: analysis["recommendations"].append("This property shows strong investment potential. Consider proceeding with due diligence.")
-        elif analysis["score"] >= 60: analysis["recommendations"].append("Good investment opportunity, but further analysis on identified warnings is recommended.")
-        else: analysis["recommendations"].append("This property carries significant risks. Thorough due diligence and risk mitigation strategies are essential before investment.")
+        dims = [len(bands) + 1 for _, _, bands, _ in INVESTMENT_SCORE_RULES]
+        combination = np.ravel_multi_index(band_indexes, dims) if len(metrics) else np.array([], dtype=int)
+        unique_combinations, inverse = np.unique(combination, return_inverse=True)
+        labels = np.array([
+            ",".join((bands[i][3] if i < len(bands) else fallback[2])
+                     for i, (_, _, bands, fallback) in zip(np.unravel_index(code, dims), INVESTMENT_SCORE_RULES))
+            for code in unique_combinations
+        ], dtype=object)
+        reason_codes = labels[inverse] if len(metrics) else np.array([], dtype=object)
+        return pd.DataFrame({"score": score, "tier": tier, "reason_codes": reason_codes}, index=metrics.index)
+    
+    def rank_portfolio(self, properties: pd.DataFrame) -> pd.DataFrame:
+        """Compute metrics and scores for a portfolio and sort it best first
         
-        return analysis
+        properties should already use the snake_case inputs (see prepare_portfolio_frame).
+        """
+        metrics = self.calculate_investment_metrics_frame(properties)
+        scores = self.score_investments_frame(metrics)
+        ranked = pd.concat([properties.drop(columns=metrics.columns.union(scores.columns), errors='ignore'),
+                            metrics, scores], axis=1)
+        ranked = ranked.sort_values(["score", "cash_on_cash_return"], ascending=False, kind="stable")
+        ranked.insert(0, "rank", np.arange(1, len(ranked) + 1))
+        return ranked
+    
+    def _render_html_page(self, title: str, heading: str, subtitle: str, sections: List[str]) -> str:
+        """Wrap rendered sections in the page shell, header and footer"""
+        now = datetime.now()
+        return "".join([
+            REPORT_HTML_HEAD, html.escape(title), REPORT_HTML_STYLE,
+            REPORT_HTML_HEADER.format(heading=html.escape(heading), subtitle=html.escape(subtitle),
+                                      report_date=now.strftime('%B %d, %Y at %I:%M %p')),
+            *sections,
+            REPORT_HTML_PAGE_END.format(year=now.year)
+        ])
+    
+    def _render_html_cards(self, cards: List[Tuple[str, Any, bool, str]], values: Dict[str, Any]) -> str:
+        """Render compiled info cards (see compile_html_cards) from a dict of values"""
+        return "".join([
+            template.format(html.escape(str(values.get(field, default))) if escape else values.get(field, default))
+            for field, default, escape, template in cards
+        ])
+    
+    def _assess_html_metric(self, value: float, comparison: Optional[str],
+                            thresholds: Optional[Tuple[float, float, float]]) -> Tuple[str, str]:
+        """Assessment text and CSS class for one metric row"""
+        if comparison is None:
+            return "Market Analysis Required", "neutral"
+        if thresholds is None:
+            return ("Excellent", "positive") if value > 0 else ("Needs Improvement", "negative")
+        assessment = "Poor"
+        for grade, threshold in zip(("Excellent", "Good", "Fair"), thresholds):
+            if (value >= threshold) if comparison == ">=" else (value <= threshold) if comparison == "<=" else (value < threshold):
+                assessment = grade
+                break
+        if assessment in ("Excellent", "Good"):
+            return assessment, "positive"
+        negative = value < thresholds[2] if comparison == ">=" else value > thresholds[2]
+        return assessment, "negative" if negative else "neutral"
+    
+    def _render_html_property_section(self, property_data: Dict[str, Any], metrics: Dict[str, float],
+                                      analysis: Optional[Dict[str, Any]] = None) -> str:
+        """Render the overview, metrics and analysis of one property into the section template"""
+        analysis = analysis or self._generate_investment_analysis(metrics)
+        metric_rows = []
+        for metric, comparison, thresholds, template in REPORT_HTML_COMPILED_METRIC_ROWS:
+            assessment, css_class = self._assess_html_metric(metrics[metric], comparison, thresholds)
+            metric_rows.append(template.format(metrics[metric], css_class=css_class, assessment=assessment))
+        items = {
+            category: "".join([
+                REPORT_HTML_ANALYSIS_ITEMS.get(message) or f"<li>{html.escape(message)}</li>"
+                for message in analysis[category]
+            ])
+            for category in ("summary", "recommendations", "warnings", "risks")
+        }
+        return REPORT_HTML_PROPERTY_SECTION.format(
+            property_cards=self._render_html_cards(REPORT_HTML_COMPILED_PROPERTY_CARDS, property_data),
+            financial_cards=self._render_html_cards(REPORT_HTML_COMPILED_FINANCIAL_CARDS, property_data),
+            metric_rows="".join(metric_rows),
+            score=analysis['score'],
+            summary=items["summary"],
+            recommendations=items["recommendations"],
+            warnings=REPORT_HTML_ANALYSIS_BLOCK.format(title="Warnings", css_class="warning", items=items["warnings"])
+            if analysis['warnings'] else "",
+            risks=REPORT_HTML_ANALYSIS_BLOCK.format(title="Risks", css_class="risk", items=items["risks"])
+            if analysis['risks'] else ""
+        )
     
     def generate_html_report(self, property_data: Dict[str, Any], metrics: Dict[str, float]) -> str:
         """Generate comprehensive HTML report"""
+        return self._render_html_page(
+            "Real Estate Investment Analysis Report",
+            "🏠 Real Estate Investment Analysis",
+            "Comprehensive Property Investment Report",
+            [self._render_html_property_section(property_data, metrics)]
+        )
         
-        report_date = datetime.now().strftime('%B %d, %Y at %I:%M %p')
-        
-        # Investment analysis based on metrics
-        analysis = self._generate_investment_analysis(metrics)
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Real Estate Investment Analysis Report</title>
-            <style>
-                body {{ 
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-                    margin: 0;
-                    padding: 20px;
-                    background: linear-gradient(135deg, #f0f8ff 0%, #e6f3ff 100%);
-                    color: #333;
-                }}
-                .container {{
-                    max-width: 1000px;
-                    margin: 0 auto;
-                    background-color: white;
-                    padding: 40px;
-                    border-radius: 15px;
-                    box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-                }}
-                .header {{
-                    text-align: center;
-                    margin-bottom: 40px;
-                    padding-bottom: 20px;
-                    border-bottom: 3px solid #3498db;
-                }}
-                h1 {{ 
-                    color: #2c3e50;
-                    font-size: 2.5em;
-                    margin-bottom: 10px;
-                    text-shadow: 2px 2px 4px rgba(0,0,0,0.1);
-                }}
-                .subtitle {{
-                    color: #7f8c8d;
-                    font-size: 1.1em;
-                    margin-bottom: 20px;
-                }}
-                h2 {{ 
-                    color: #34495e;
-                    border-left: 5px solid #3498db;
-                    padding-left: 15px;
-                    margin-top: 40px;
-                    margin-bottom: 20px;
-                    font-size: 1.8em;
-                }}
-                .property-overview {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-                    gap: 20px;
-                    margin: 30px 0;
-                }}
-                .info-card {{
-                    background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-                    padding: 20px;
-                    border-radius: 10px;
-                    border-left: 4px solid #3498db;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                }}
-                .info-card h3 {{
-                    margin: 0 0 10px 0;
-                    color: #2c3e50;
-                    font-size: 1.1em;
-                }}
-                .info-card p {{
-                    margin: 0;
-                    font-size: 1.3em;
-                    font-weight: bold;
-                    color: #3498db;
-                }}
-                table {{ 
-                    width: 100%; 
-                    border-collapse: collapse; 
-                    margin: 20px 0;
-                    background-color: white;
-                    border-radius: 10px;
-                    overflow: hidden;
-                    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-                }}
-                th, td {{ 
-                    padding: 15px; 
-                    text-align: left; 
-                    border-bottom: 1px solid #ecf0f1;
-                }}
-                th {{ 
-                    background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
-                    color: white;
-                    font-weight: bold;
-                    text-transform: uppercase;
-                    letter-spacing: 0.5px;
-                }}
-                tr:nth-child(even) {{
-                    background-color: #f8f9fa;
-                }}
-                tr:hover {{
-                    background-color: #e8f4fd;
-                    transition: background-color 0.3s ease;
-                }}
-                .metric-value {{
-                    font-weight: bold;
-                    font-size: 1.1em;
-                }}
-                .positive {{ color: #27ae60; }}
-                .negative {{ color: #e74c3c; }}
-                .neutral {{ color: #f39c12; }}
-                .analysis-section {{
-                    background: linear-gradient(135deg, #e8f4fd 0%, #d6eaff 100%);
-                    padding: 25px;
-                    border-radius: 10px;
-                    margin: 30px 0;
-                    border: 1px solid #3498db;
-                }}
-                .analysis-section h3 {{
-                    color: #2c3e50;
-                    margin-top: 0;
-                }}
-                .recommendation {{
-                    background-color: #d5f4e6;
-                    border-left: 4px solid #27ae60;
-                    padding: 15px;
-                    margin: 15px 0;
-                    border-radius: 5px;
-                }}
-                .warning {{
-                    background-color: #ffeaa7;
-                    border-left: 4px solid #f39c12;
-                    padding: 15px;
-                    margin: 15px 0;
-                    border-radius: 5px;
-                }}
-                .risk {{
-                    background-color: #ffcccb;
-                    border-left: 4px solid #e74c3c;
-                    padding: 15px;
-                    margin: 15px 0;
-                    border-radius: 5px;
-                }}
-                .footer {{
-                    margin-top: 50px;
-                    text-align: center;
-                    color: #7f8c8d;
-                    font-size: 0.9em;
-                    padding-top: 20px;
-                    border-top: 1px solid #ecf0f1;
-                }}
-                @media print {{
-                    body {{ background: white; }}
-                    .container {{ box-shadow: none; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🏠 Real Estate Investment Analysis</h1>
-                    <div class="subtitle">Comprehensive Property Investment Report</div>
-                    <p><strong>Report Generated:</strong> {report_date}</p>
-                </div>
-                
-                <h2>🏠 Property Overview</h2>
-                <div class="property-overview">
-                    <div class="info-card">
-                        <h3>📍 Address</h3>
-                        <p>{property_data.get('address', 'N/A')}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>💰 Purchase Price</h3>
-                        <p>${property_data.get('price', 0):,.2f}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>📐 Square Footage</h3>
-                        <p>{property_data.get('square_footage', 0):,} sq ft</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>🏘️ Property Type</h3>
-                        <p>{property_data.get('property_type', 'N/A')}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>🛏️ Bedrooms</h3>
-                        <p>{property_data.get('bedrooms', 0)}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>🚿 Bathrooms</h3>
-                        <p>{property_data.get('bathrooms', 0)}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>📅 Year Built</h3>
-                        <p>{property_data.get('year_built', 'N/A')}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>🏞️ Lot Size</h3>
-                        <p>{property_data.get('lot_size', 0):,.0f} sq ft</p>
-                    </div>
-                </div>
-                
-                <h2>💰 Financial Summary</h2>
-                <div class="property-overview">
-                    <div class="info-card">
-                        <h3>💵 Net Operating Income</h3>
-                        <p>${property_data.get('noi', 0):,.2f}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>💸 Cash Invested</h3>
-                        <p>${property_data.get('cash_invested', 0):,.2f}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>📈 Gross Rental Income</h3>
-                        <p>${property_data.get('gross_rental_income', 0):,.2f}</p>
-                    </div>
-                    <div class="info-card">
-                        <h3>📉 Operating Expenses</h3>
-                        <p>${property_data.get('operating_expenses', 0):,.2f}</p>
-                    </div>
-                </div>
-                
-                <h2>📊 Investment Metrics</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Metric</th>
-                            <th>Value</th>
-                            <th>Industry Benchmark</th>
-                            <th>Assessment</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        <tr>
-                            <td>Annual Cash Flow</td>
-                            <td class="metric-value">${metrics['annual_cash_flow']:,.2f}</td>
-                            <td>Positive</td>
-                            <td class="{'positive' if metrics['annual_cash_flow'] > 0 else 'negative'}">
-                                {'Excellent' if metrics['annual_cash_flow'] > 0 else 'Needs Improvement'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Cash-on-Cash Return</td>
-                            <td class="metric-value">{metrics['cash_on_cash_return']:.2f}%</td>
-                            <td>8-12%</td>
-                            <td class="{'positive' if metrics['cash_on_cash_return'] >= 8 else 'negative' if metrics['cash_on_cash_return'] < 5 else 'neutral'}">
-                                {'Excellent' if metrics['cash_on_cash_return'] >= 12 else 'Good' if metrics['cash_on_cash_return'] >= 8 else 'Fair' if metrics['cash_on_cash_return'] >= 5 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Cap Rate</td>
-                            <td class="metric-value">{metrics['cap_rate']:.2f}%</td>
-                            <td>6-10%</td>
-                            <td class="{'positive' if metrics['cap_rate'] >= 6 else 'negative' if metrics['cap_rate'] < 4 else 'neutral'}">
-                                {'Excellent' if metrics['cap_rate'] >= 8 else 'Good' if metrics['cap_rate'] >= 6 else 'Fair' if metrics['cap_rate'] >= 4 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Debt Service Coverage Ratio</td>
-                            <td class="metric-value">{metrics['dscr']:.2f}</td>
-                            <td>1.25+</td>
-                            <td class="{'positive' if metrics['dscr'] >= 1.25 else 'negative' if metrics['dscr'] < 1.0 else 'neutral'}">
-                                {'Excellent' if metrics['dscr'] >= 1.5 else 'Good' if metrics['dscr'] >= 1.25 else 'Fair' if metrics['dscr'] >= 1.0 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Gross Rental Yield</td>
-                            <td class="metric-value">{metrics['gross_rental_yield']:.2f}%</td>
-                            <td>8-12%</td>
-                            <td class="{'positive' if metrics['gross_rental_yield'] >= 8 else 'negative' if metrics['gross_rental_yield'] < 6 else 'neutral'}">
-                                {'Excellent' if metrics['gross_rental_yield'] >= 10 else 'Good' if metrics['gross_rental_yield'] >= 8 else 'Fair' if metrics['gross_rental_yield'] >= 6 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Price per Square Foot</td>
-                            <td class="metric-value">${metrics['price_per_sqft']:.2f}</td>
-                            <td>Market Dependent</td>
-                            <td class="neutral">Market Analysis Required</td>
-                        </tr>
-                        <tr>
-                            <td>Operating Expense Ratio (OER)</td>
-                            <td class="metric-value">{metrics['oer']:.2f}%</td>
-                            <td>30-50%</td>
-                            <td class="{'positive' if metrics['oer'] <= 50 else 'negative' if metrics['oer'] > 60 else 'neutral'}">
-                                {'Excellent' if metrics['oer'] <= 35 else 'Good' if metrics['oer'] <= 50 else 'Fair' if metrics['oer'] <= 60 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Return on Investment (ROI)</td>
-                            <td class="metric-value">{metrics['roi']:.2f}%</td>
-                            <td>10-20%</td>
-                            <td class="{'positive' if metrics['roi'] >= 10 else 'negative' if metrics['roi'] < 5 else 'neutral'}">
-                                {'Excellent' if metrics['roi'] >= 20 else 'Good' if metrics['roi'] >= 10 else 'Fair' if metrics['roi'] >= 5 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Occupancy Rate</td>
-                            <td class="metric-value">{metrics['occupancy_rate']:.2f}%</td>
-                            <td>90-95%</td>
-                            <td class="{'positive' if metrics['occupancy_rate'] >= 90 else 'negative' if metrics['occupancy_rate'] < 70 else 'neutral'}">
-                                {'Excellent' if metrics['occupancy_rate'] >= 95 else 'Good' if metrics['occupancy_rate'] >= 90 else 'Fair' if metrics['occupancy_rate'] >= 70 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Net Yield</td>
-                            <td class="metric-value">{metrics['net_yield']:.2f}%</td>
-                            <td>5-10%</td>
-                            <td class="{'positive' if metrics['net_yield'] >= 5 else 'negative' if metrics['net_yield'] < 3 else 'neutral'}">
-                                {'Excellent' if metrics['net_yield'] >= 8 else 'Good' if metrics['net_yield'] >= 5 else 'Fair' if metrics['net_yield'] >= 3 else 'Poor'}
-                            </td>
-                        </tr>
-                        <tr>
-                            <td>Break-Even Ratio</td>
-                            <td class="metric-value">{metrics['break_even_ratio']:.2f}%</td>
-                            <td>< 85%</td>
-                            <td class="{'positive' if metrics['break_even_ratio'] < 85 else 'negative' if metrics['break_even_ratio'] > 95 else 'neutral'}">
-                                {'Excellent' if metrics['break_even_ratio'] < 75 else 'Good' if metrics['break_even_ratio'] < 85 else 'Fair' if metrics['break_even_ratio'] < 95 else 'Poor'}
-                            </td>
-                        </tr>
-                    </tbody>
-                </table>
-                
-                <div class="analysis-section">
-                    <h2>💡 Investment Analysis & Recommendations</h2>
-                    <h3>Overall Score: {analysis['score']}/100</h3>
-                    
-                    <h4>Summary:</h4>
-                    <ul>
-                        {''.join([f'<li>{s}</li>' for s in analysis['summary']])}
-                    </ul>
-                    
-                    <h4>Recommendations:</h4>
-                    <div class="recommendation">
-                        <ul>
-                            {''.join([f'<li>{r}</li>' for r in analysis['recommendations']])}
-                        </ul>
-                    </div>
-                    
-                    {'<h4>Warnings:</h4><div class="warning"><ul>' + ''.join([f'<li>{w}</li>' for w in analysis['warnings']]) + '</ul></div>' if analysis['warnings'] else ''}
-                    {'<h4>Risks:</h4><div class="risk"><ul>' + ''.join([f'<li>{r}</li>' for r in analysis['risks']]) + '</ul></div>' if analysis['risks'] else ''}
-                </div>
-
-                <div class="footer">
-                    <p>This report is for informational purposes only and does not constitute financial advice. Consult with a qualified professional before making investment decisions.</p>
-                    <p>&copy; {datetime.now().year} Real Estate Management System. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
+    def generate_portfolio_html_report(self, ranked: pd.DataFrame) -> str:
+        """Generate one HTML report with a ranking overview and a section per property
+        
+        ranked comes from rank_portfolio; properties appear in ranking order.
         """
-        return html_content
+        parts = []
+        tier_counts = ranked["tier"].value_counts()
+        parts.append('\n        <h2>📊 Portfolio Overview</h2>\n        <div class="property-overview">')
+        parts.append(self._render_html_cards(
+            REPORT_HTML_COMPILED_PORTFOLIO_CARDS,
+            {"properties": len(ranked), **{tier: int(count) for tier, count in tier_counts.items()}}
+        ))
+        parts.append("\n        </div>\n")
+        
+        inputs = portfolio_report_inputs(self, ranked)
+        ranking_rows = []
+        for (_, property_data, metrics), row in zip(inputs, ranked.itertuples(index=False)):
+            ranking_rows.append(
+                f"<tr><td>{int(row.rank)}</td><td>{html.escape(property_data['address'])}</td>"
+                f"<td class=\"metric-value\">{row.score:.0f}</td><td>{html.escape(str(row.tier))}</td>"
+                f"<td>{metrics['cap_rate']:.2f}%</td><td>{metrics['cash_on_cash_return']:.2f}%</td>"
+                f"<td>{metrics['dscr']:.2f}</td></tr>"
+            )
+        parts.append(
+            "\n        <h2>🏆 Ranking</h2>\n        <table>\n            <thead><tr><th>Rank</th><th>Property</th>"
+            "<th>Score</th><th>Tier</th><th>Cap Rate</th><th>CoC Return</th><th>DSCR</th></tr></thead>\n"
+            f"            <tbody>{''.join(ranking_rows)}</tbody>\n        </table>\n"
+        )
+        
+        for (_, property_data, metrics), rank in zip(inputs, ranked["rank"]):
+            parts.append(f'\n        <div class="portfolio-property">\n        <h1>#{int(rank)} '
+                         f'{html.escape(property_data["address"])}</h1>')
+            parts.append(self._render_html_property_section(property_data, metrics))
+            parts.append("        </div>\n")
+        
+        return self._render_html_page(
+            "Portfolio Investment Analysis Report",
+            "🏆 Portfolio Investment Analysis",
+            f"{len(ranked):,} Properties Ranked by Investment Score",
+            parts
+        )
     
     def generate_pdf_report(self, property_data: Dict[str, Any], metrics: Dict[str, float]) -> bytes:
         """Generate comprehensive PDF report"""
+        return build_property_pdf(self.style_registry, property_data, metrics,
+                                  self._generate_investment_analysis(metrics))
+    
+    def generate_portfolio_summary_pdf(self, ranked: pd.DataFrame) -> bytes:
+        """Generate a PDF ranking table for a portfolio ranked by rank_portfolio"""
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         styles = self.styles
         
         story = []
-        
-        # Title
-        story.append(Paragraph("🏠 Real Estate Investment Analysis", styles["CustomTitle"]))
-        story.append(Paragraph("Comprehensive Property Investment Report", styles["h2"]))
+        story.append(Paragraph("🏆 Portfolio Investment Summary", styles["CustomTitle"]))
         story.append(Paragraph(f"Report Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles["Normal"]))
         story.append(Spacer(1, 0.2 * inch))
         
-        # Property Overview
-        story.append(Paragraph("🏠 Property Overview", styles["CustomHeading"]))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        property_data_table = [
-            ["Address:", property_data.get('address', 'N/A')],
-            ["Purchase Price:", f"${property_data.get('price', 0):,.2f}"],
-            ["Square Footage:", f"{property_data.get('square_footage', 0):,} sq ft"],
-            ["Property Type:", property_data.get('property_type', 'N/A')],
-            ["Bedrooms:", property_data.get('bedrooms', 0)],
-            ["Bathrooms:", property_data.get('bathrooms', 0)],
-            ["Year Built:", property_data.get('year_built', 'N/A')],
-            ["Lot Size:", f"{property_data.get('lot_size', 0):,.0f} sq ft"]
-        ]
-        
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#ecf0f1'))
-        ])
-        
-        t = Table(property_data_table, colWidths=[2 * inch, 4 * inch])
-        t.setStyle(table_style)
-        story.append(t)
-        story.append(Spacer(1, 0.2 * inch))
-        
-        # Financial Summary
-        story.append(Paragraph("💰 Financial Summary", styles["CustomHeading"]))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        financial_data_table = [
-            ["Net Operating Income:", f"${property_data.get('noi', 0):,.2f}"],
-            ["Cash Invested:", f"${property_data.get('cash_invested', 0):,.2f}"],
-            ["Gross Rental Income:", f"${property_data.get('gross_rental_income', 0):,.2f}"],
-            ["Operating Expenses:", f"${property_data.get('operating_expenses', 0):,.2f}"]
-        ]
-        
-        t = Table(financial_data_table, colWidths=[2 * inch, 4 * inch])
-        t.setStyle(table_style)
-        story.append(t)
-        story.append(Spacer(1, 0.2 * inch))
-        
-        # Investment Metrics
-        story.append(Paragraph("📊 Investment Metrics", styles["CustomHeading"]))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        metrics_data = [
-            ["Metric", "Value", "Industry Benchmark", "Assessment"],
-            ["Annual Cash Flow", f"${metrics['annual_cash_flow']:,.2f}", "Positive", 'Excellent' if metrics['annual_cash_flow'] > 0 else 'Needs Improvement'],
-            ["Cash-on-Cash Return", f"{metrics['cash_on_cash_return']:.2f}%", "8-12%", 'Excellent' if metrics['cash_on_cash_return'] >= 12 else 'Good' if metrics['cash_on_cash_return'] >= 8 else 'Fair' if metrics['cash_on_cash_return'] >= 5 else 'Poor'],
-            ["Cap Rate", f"{metrics['cap_rate']:.2f}%", "6-10%", 'Excellent' if metrics['cap_rate'] >= 8 else 'Good' if metrics['cap_rate'] >= 6 else 'Fair' if metrics['cap_rate'] >= 4 else 'Poor'],
-            ["Debt Service Coverage Ratio", f"{metrics['dscr']:.2f}", "1.25+", 'Excellent' if metrics['dscr'] >= 1.5 else 'Good' if metrics['dscr'] >= 1.25 else 'Fair' if metrics['dscr'] >= 1.0 else 'Poor'],
-            ["Gross Rental Yield", f"{metrics['gross_rental_yield']:.2f}%", "8-12%", 'Excellent' if metrics['gross_rental_yield'] >= 10 else 'Good' if metrics['gross_rental_yield'] >= 8 else 'Fair' if metrics['gross_rental_yield'] >= 6 else 'Poor'],
-            ["Price per Square Foot", f"${metrics['price_per_sqft']:.2f}", "Market Dependent", "Market Analysis Required"],
-            ["Operating Expense Ratio (OER)", f"{metrics['oer']:.2f}%", "30-50%", 'Excellent' if metrics['oer'] <= 35 else 'Good' if metrics['oer'] <= 50 else 'Fair' if metrics['oer'] <= 60 else 'Poor'],
-            ["Return on Investment (ROI)", f"{metrics['roi']:.2f}%", "10-20%", 'Excellent' if metrics['roi'] >= 20 else 'Good' if metrics['roi'] >= 10 else 'Fair' if metrics['roi'] >= 5 else 'Poor'],
-            ["Occupancy Rate", f"{metrics['occupancy_rate']:.2f}%", "90-95%", 'Excellent' if metrics['occupancy_rate'] >= 95 else 'Good' if metrics['occupancy_rate'] >= 90 else 'Fair' if metrics['occupancy_rate'] >= 70 else 'Poor'],
-            ["Net Yield", f"{metrics['net_yield']:.2f}%", "5-10%", 'Excellent' if metrics['net_yield'] >= 8 else 'Good' if metrics['net_yield'] >= 5 else 'Fair' if metrics['net_yield'] >= 3 else 'Poor'],
-            ["Break-Even Ratio", f"{metrics['break_even_ratio']:.2f}%", "< 85%", 'Excellent' if metrics['break_even_ratio'] < 75 else 'Good' if metrics['break_even_ratio'] < 85 else 'Fair' if metrics['break_even_ratio'] < 95 else 'Poor']
+        tier_counts = ranked["tier"].value_counts()
+        overview_table = [
+            ["Properties:", f"{len(ranked):,}"],
+            ["Strong:", f"{int(tier_counts.get('Strong', 0)):,}"],
+            ["Good:", f"{int(tier_counts.get('Good', 0)):,}"],
+            ["High Risk:", f"{int(tier_counts.get('High Risk', 0)):,}"],
+            ["Average Score:", f"{ranked['score'].mean():.1f}/100" if len(ranked) else "N/A"]
         ]
-        
-        metrics_table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#ecf0f1'))
-        ])
-        
-        t = Table(metrics_data, colWidths=[2 * inch, 1.5 * inch, 1.5 * inch, 1.5 * inch])
-        t.setStyle(metrics_table_style)
-        story.append(t)
+        story.append(self.style_registry.table(overview_table, "key_value"))
         story.append(Spacer(1, 0.2 * inch))
         
-        # Investment Analysis & Recommendations
-        analysis = self._generate_investment_analysis(metrics)
-        story.append(Paragraph("💡 Investment Analysis & Recommendations", styles["CustomHeading"]))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        story.append(Paragraph(f"Overall Score: {analysis['score']}/100", styles["h3"]))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        story.append(Paragraph("Summary:", styles["h4"]))
-        for s in analysis['summary']:
-            story.append(Paragraph(f"• {s}", styles["CustomBody"]))
-        story.append(Spacer(1, 0.1 * inch))
-        
-        story.append(Paragraph("Recommendations:", styles["h4"]))
-        for r in analysis['recommendations']:
-            story.append(Paragraph(f"• {r}", styles["CustomBody"]))
+        story.append(Paragraph("📊 Ranking", styles["CustomHeading"]))
         story.append(Spacer(1, 0.1 * inch))
+        ranking_table = [["Rank", "Property", "Score", "Tier", "Cap Rate", "CoC Return", "DSCR"]]
+        labels = portfolio_property_labels(ranked)
+        for rank, label, row in zip(ranked["rank"], labels, ranked.itertuples(index=False)):
+            ranking_table.append([
+                int(rank), label[:40], f"{row.score:.0f}", row.tier, f"{row.cap_rate:.2f}%",
+                f"{row.cash_on_cash_return:.2f}%", f"{row.dscr:.2f}"
+            ])
+        story.append(self.style_registry.table(ranking_table, "ranking", repeatRows=1))
         
-        if analysis['warnings']:
-            story.append(Paragraph("Warnings:", styles["h4"]))
-            for w in analysis['warnings']:
-                story.append(Paragraph(f"• {w}", styles["CustomBody"]))
-            story.append(Spacer(1, 0.1 * inch))
-            
-        if analysis['risks']:
-            story.append(Paragraph("Risks:", styles["h4"]))
-            for r in analysis['risks']:
-                story.append(Paragraph(f"• {r}", styles["CustomBody"]))
-            story.append(Spacer(1, 0.1 * inch))
-            
         doc.build(story)
         buffer.seek(0)
         return buffer.getvalue()
@@ -1121,6 +4028,441 @@ def create_report_generator() -> ReportGenerator:
     """Create and return a report generator instance"""
     return ReportGenerator()
 
+# Report formats offered for download: format -> (label, file name, MIME type, generator method)
+REPORT_FORMATS = {
+    "html": ("HTML", "investment_report.html", "text/html", "generate_html_report"),
+    "pdf": ("PDF", "investment_report.pdf", "application/pdf", "generate_pdf_report"),
+    "csv": ("CSV", "investment_report.csv", "text/csv", "generate_csv_report"),
+    "json": ("JSON", "investment_report.json", "application/json", "generate_json_report"),
+}
+
+def display_report_downloads(report_generator: ReportGenerator, property_data: Dict[str, Any],
+                             metrics: Dict[str, float]):
+    """Offer each report format, rendering it only when requested
+    
+    Rendered reports are kept in session state under the hash of the inputs, so
+    reruns reuse them until the property data or metrics change. Reports another
+    session already rendered for the same inputs come from the shared artifact cache.
+    """
+    artifact_cache = get_report_artifact_cache()
+    input_key = report_input_key(property_data, metrics)
+    store = st.session_state.get('report_artifacts')
+    if store is None or store['key'] != input_key:
+        store = {'key': input_key, 'artifacts': {}}
+        for report_format in REPORT_FORMATS:
+            cached = artifact_cache.get(artifact_cache.artifact_key(report_format, property_data, metrics),
+                                        record_miss=False)
+            if cached is not None:
+                store['artifacts'][report_format] = cached
+        st.session_state['report_artifacts'] = store
+    artifacts = store['artifacts']
+    
+    columns = st.columns(len(REPORT_FORMATS))
+    for column, (report_format, (label, file_name, mime, method)) in zip(columns, REPORT_FORMATS.items()):
+        with column:
+            if report_format in artifacts:
+                st.download_button(
+                    label=f"Download {label} Report",
+                    data=artifacts[report_format],
+                    file_name=file_name,
+                    mime=mime,
+                    use_container_width=True,
+                    key=f"download_{report_format}_report"
+                )
+            elif st.button(f"Prepare {label} Report", use_container_width=True, key=f"prepare_{report_format}_report"):
+                with st.spinner(f"Generating {label} report..."):
+                    artifacts[report_format] = artifact_cache.get_or_render(
+                        report_format, property_data, metrics,
+                        lambda: getattr(report_generator, method)(property_data, metrics)
+                    )
+                st.rerun()
+    
+    cache_stats = artifact_cache.stats()
+    st.caption(f"Report cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+               f"{cache_stats['renders']} renders, {cache_stats['hit_rate']:.0%} hit rate")
+
+def prepare_portfolio_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename sheet-style camelCase columns to the snake_case inputs the metrics expect
+    
+    Columns already in snake_case are kept; an alias is only applied when the
+    snake_case column is not present.
+    """
+    renames = {
+        column: target for column, target in PORTFOLIO_COLUMN_ALIASES.items()
+        if column in df.columns and target not in df.columns
+    }
+    return df.rename(columns=renames)
+
+def missing_portfolio_columns(properties: pd.DataFrame) -> List[str]:
+    """Required portfolio inputs that are absent or hold no numeric value in any row
+    
+    properties should already use the snake_case inputs (see prepare_portfolio_frame).
+    """
+    return [
+        column for column in PORTFOLIO_REQUIRED_COLUMNS
+        if column not in properties.columns or pd.to_numeric(properties[column], errors='coerce').isna().all()
+    ]
+
+def portfolio_property_labels(properties: pd.DataFrame) -> List[str]:
+    """Display label for each property: its address, or its id when there is none"""
+    labels = pd.Series("", index=properties.index, dtype=object)
+    for column in ["address", "formattedAddress", "addressLine1"]:
+        if column in properties.columns:
+            values = properties[column].astype(object)
+            labels = labels.where(labels != "", values.where(values.notna(), "").astype(str))
+    if "id" in properties.columns:
+        ids = properties["id"].astype(object).where(properties["id"].notna(), "").astype(str)
+        labels = labels.where(labels != "", "Property " + ids)
+    return [label or "Property" for label in labels.tolist()]
+
+def _report_value(value: Any, default: Any) -> Any:
+    """Plain Python value for a report field: missing -> default, whole floats -> int"""
+    if value is None or (np.ndim(value) == 0 and pd.isna(value)):
+        return default
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def portfolio_report_inputs(report_generator: ReportGenerator,
+                            properties: pd.DataFrame) -> List[Tuple[str, Dict[str, Any], Dict[str, float]]]:
+    """Build (file name, property data, metrics) for every row of a portfolio
+    
+    Property data carries the snake_case fields the single-property report reads;
+    missing numbers become 0 and missing text 'N/A'. File names start with the
+    portfolio rank when properties has one, so they sort in ranking order.
+    """
+    metric_records = report_generator.calculate_investment_metrics_frame(properties).to_dict('records')
+    numeric_fields = ["price", "square_footage", "bedrooms", "bathrooms", "lot_size", "noi", "cash_invested",
+                      "gross_rental_income", "operating_expenses", "total_debt_service", "property_taxes",
+                      "occupied_units", "total_units"]
+    columns = {
+        name: (pd.to_numeric(properties[name], errors='coerce').to_numpy(dtype=float)
+               if name in properties.columns else np.zeros(len(properties)))
+        for name in numeric_fields
+    }
+    for name in ["property_type", "year_built"]:
+        columns[name] = properties[name].to_numpy(dtype=object) if name in properties.columns else [None] * len(properties)
+    ranks = properties["rank"].tolist() if "rank" in properties.columns else range(1, len(properties) + 1)
+    labels = portfolio_property_labels(properties)
+    
+    inputs = []
+    for position, (rank, label, metrics) in enumerate(zip(ranks, labels, metric_records)):
+        property_data = {"address": label}
+        for name in numeric_fields:
+            property_data[name] = _report_value(columns[name][position], 0)
+        for name in ["property_type", "year_built"]:
+            property_data[name] = _report_value(columns[name][position], 'N/A')
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')[:60] or "property"
+        inputs.append((f"{int(rank):04d}_{slug}.pdf", property_data, metrics))
+    return inputs
+
+# Portfolio PDF Export Helper Class
+class PortfolioPdfExporter:
+    """Render a PDF report per portfolio property into a ZIP archive across worker processes"""
+    
+    def __init__(self, report_generator: ReportGenerator, artifact_cache: Optional[ReportArtifactCache] = None,
+                 max_workers: int = REPORT_BATCH_MAX_WORKERS, chunk_size: int = REPORT_BATCH_CHUNK_SIZE,
+                 chunk_timeout: float = REPORT_BATCH_CHUNK_TIMEOUT, export_dir: str = REPORT_EXPORT_DIR):
+        """Initialize with the report generator, artifact cache, pool sizing and archive directory"""
+        self.report_generator = report_generator
+        self.artifact_cache = artifact_cache
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.chunk_timeout = chunk_timeout
+        self.export_dir = export_dir
+    
+    @staticmethod
+    def _pool_context():
+        """Multiprocessing context for the worker pool: never fork the threaded server
+        
+        A forkserver (or spawned) worker starts from a fresh interpreter, so it cannot
+        inherit locks held by other server threads. Its tasks only need pdf_reports,
+        which the forkserver preloads. multiprocessing still re-imports the main script
+        in each worker as __mp_main__; main() stays behind its __name__ guard for that.
+        """
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["pdf_reports"])
+            return context
+        return multiprocessing.get_context("spawn")
+    
+    def _render_chunks(self, chunks: List[List[Tuple[str, Dict[str, Any], Dict[str, float], Dict[str, Any]]]]):
+        """Yield rendered chunks as they finish, in worker processes when possible
+        
+        If the pool cannot start or breaks, the remaining chunks are rendered in this
+        process instead. If the chunks do not finish within chunk_timeout per round of
+        workers, the pool is abandoned and the unfinished chunks are reported as failed.
+        """
+        remaining = list(range(len(chunks)))
+        workers = min(self.max_workers, len(chunks))
+        if workers > 1:
+            executor = None
+            try:
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=self._pool_context())
+                futures = {executor.submit(render_pdf_reports, chunks[index]): index for index in remaining}
+                rounds = -(-len(chunks) // workers)
+                for future in as_completed(futures, timeout=self.chunk_timeout * rounds):
+                    try:
+                        rendered = future.result(timeout=0)
+                    except Exception:
+                        continue  # left in remaining and rendered below
+                    remaining.remove(futures[future])
+                    yield rendered
+            except FutureTimeoutError:
+                logger.error("Batch PDF export timed out with %d chunks unfinished", len(remaining))
+                timed_out = remaining
+                remaining = []
+                # A hung worker would block shutdown, so stop the workers outright
+                for process in list(getattr(executor, "_processes", {}).values()):
+                    process.terminate()
+                for index in timed_out:
+                    yield [(file_name, None, "timed out") for file_name, _, _, _ in chunks[index]]
+            except Exception:
+                logger.exception("Batch PDF export pool failed; rendering the rest in-process")
+            finally:
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+        for index in remaining:
+            yield render_pdf_reports(chunks[index])
+    
+    def _sweep_exports(self):
+        """Remove archives older than REPORT_EXPORT_MAX_AGE left behind by abandoned sessions"""
+        cutoff = time.time() - REPORT_EXPORT_MAX_AGE
+        for name in os.listdir(self.export_dir):
+            path = os.path.join(self.export_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # already removed by another session
+    
+    def export(self, ranked: pd.DataFrame, include_summary: bool = True, progress_callback=None) -> Dict[str, Any]:
+        """Render every property in ranked into a ZIP archive on disk and return its path with counts
+        
+        Reports already in the artifact cache are reused and new ones are added to it.
+        PDFs are written into the archive file as each chunk finishes, so only the
+        chunks in flight are held in memory; the caller owns the file at 'zip_path' and
+        removes it when done (see remove_portfolio_export). progress_callback(done,
+        total) is called from the calling thread.
+        """
+        started = time.time()
+        inputs = portfolio_report_inputs(self.report_generator, ranked)
+        total = len(inputs)
+        counts = {'rendered': 0, 'cached': 0, 'failed': 0}
+        errors = []
+        os.makedirs(self.export_dir, exist_ok=True)
+        self._sweep_exports()
+        fd, zip_path = tempfile.mkstemp(prefix="portfolio_reports_", suffix=".zip", dir=self.export_dir)
+        
+        try:
+            with os.fdopen(fd, 'wb') as handle, zipfile.ZipFile(handle, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+                keys = {}
+                pending = []
+                for file_name, property_data, metrics in inputs:
+                    if self.artifact_cache is not None:
+                        key = self.artifact_cache.artifact_key("pdf", property_data, metrics)
+                        cached = self.artifact_cache.get(key, record_miss=False)
+                        if cached is not None:
+                            archive.writestr(file_name, cached)
+                            counts['cached'] += 1
+                            continue
+                        keys[file_name] = key
+                    pending.append((file_name, property_data, metrics,
+                                    self.report_generator._generate_investment_analysis(metrics)))
+                
+                done = counts['cached']
+                if progress_callback is not None:
+                    progress_callback(done, total)
+                chunks = [pending[start:start + self.chunk_size] for start in range(0, len(pending), self.chunk_size)]
+                for rendered in self._render_chunks(chunks):
+                    for file_name, data, error in rendered:
+                        if data is None:
+                            counts['failed'] += 1
+                            errors.append(f"{file_name}: {error}")
+                            continue
+                        archive.writestr(file_name, data)
+                        counts['rendered'] += 1
+                        if file_name in keys:
+                            self.artifact_cache.put(keys[file_name], data)
+                    done += len(rendered)
+                    if progress_callback is not None:
+                        progress_callback(done, total)
+                
+                if include_summary and total:
+                    try:
+                        archive.writestr("portfolio_summary.pdf", self.report_generator.generate_portfolio_summary_pdf(ranked))
+                    except Exception as e:
+                        errors.append(f"portfolio_summary.pdf: {e}")
+                if errors:
+                    archive.writestr("errors.txt", "\n".join(errors))
+        except BaseException:
+            os.remove(zip_path)
+            raise
+        
+        return {
+            'success': counts['failed'] == 0,
+            'zip_path': zip_path,
+            'total': total,
+            **counts,
+            'errors': errors,
+            'duration': time.time() - started
+        }
+
+def portfolio_frame_key(ranked: pd.DataFrame) -> str:
+    """Content hash of a ranked portfolio frame, for reusing exports across reruns"""
+    return hashlib.sha256(pd.util.hash_pandas_object(ranked).to_numpy().tobytes()).hexdigest()
+
+def display_portfolio_html_report(report_generator: ReportGenerator, ranked: pd.DataFrame):
+    """Offer the shown portfolio rows as a single HTML report, rendered when requested"""
+    report_key = portfolio_frame_key(ranked)
+    report = st.session_state.get('portfolio_html_report')
+    if report is not None and report['key'] == report_key:
+        st.download_button(
+            label="📥 Download Portfolio HTML Report",
+            data=report['html'],
+            file_name=f"portfolio_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html",
+            mime="text/html",
+            key="download_portfolio_html"
+        )
+    elif st.button(f"Prepare Portfolio HTML Report ({len(ranked):,} properties)", disabled=ranked.empty,
+                   key="prepare_portfolio_html"):
+        with st.spinner("Generating portfolio HTML report..."):
+            try:
+                html_report = report_generator.generate_portfolio_html_report(ranked)
+            except Exception as e:
+                st.error(f"Error generating portfolio HTML report: {str(e)}")
+                return
+        st.session_state['portfolio_html_report'] = {'key': report_key, 'html': html_report}
+        st.rerun()
+
+def remove_portfolio_export():
+    """Delete this session's prepared PDF archive, if any, and forget it"""
+    export = st.session_state.pop('portfolio_pdf_export', None)
+    if export is not None:
+        try:
+            os.remove(export['result']['zip_path'])
+        except OSError:
+            pass  # already swept
+
+def display_portfolio_pdf_export(report_generator: ReportGenerator, ranked: pd.DataFrame):
+    """Export the shown portfolio rows as a ZIP of PDF reports
+    
+    The archive stays on disk under REPORT_EXPORT_DIR and session state keeps only its
+    path; it is read when the download is clicked and deleted once the shown rows or
+    options change.
+    """
+    st.markdown("#### 📦 Batch PDF Export")
+    include_summary = st.checkbox("Include portfolio summary PDF", value=True, key="portfolio_pdf_summary")
+    export_key = (portfolio_frame_key(ranked), include_summary)
+    
+    export = st.session_state.get('portfolio_pdf_export')
+    if export is not None and (export['key'] != export_key or not os.path.exists(export['result']['zip_path'])):
+        remove_portfolio_export()
+        export = None
+    if export is not None:
+        result = export['result']
+        zip_path = result['zip_path']
+        
+        def read_archive() -> bytes:
+            with open(zip_path, 'rb') as handle:
+                return handle.read()
+        
+        st.success(f"Prepared {result['rendered'] + result['cached']} of {result['total']} reports "
+                   f"({result['cached']} from cache) in {result['duration']:.1f}s")
+        if result['errors']:
+            st.warning(f"{len(result['errors'])} reports failed; see errors.txt in the archive.")
+        st.download_button(
+            label="📥 Download PDF Reports (ZIP)",
+            data=read_archive,
+            file_name=f"portfolio_reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+            mime="application/zip",
+            key="download_portfolio_pdfs"
+        )
+        return
+    
+    if st.button(f"Generate {len(ranked):,} PDF Reports", disabled=ranked.empty, key="generate_portfolio_pdfs"):
+        progress = st.progress(0.0)
+        status = st.empty()
+        
+        def update_progress(done: int, total: int):
+            progress.progress(done / total if total else 1.0)
+            status.text(f"Rendered {done:,} of {total:,} reports")
+        
+        try:
+            exporter = PortfolioPdfExporter(report_generator, get_report_artifact_cache())
+            result = exporter.export(ranked, include_summary=include_summary, progress_callback=update_progress)
+        except Exception as e:
+            st.error(f"Error exporting PDF reports: {str(e)}")
+            return
+        st.session_state['portfolio_pdf_export'] = {'key': export_key, 'result': result}
+        st.rerun()
+
+def display_portfolio_ranking(report_generator: ReportGenerator):
+    """Rank every property in the listings sheet or an uploaded CSV by investment score"""
+    st.subheader("🏆 Portfolio Ranking")
+    st.markdown("Score every property at once with the same rules as the single-property analysis.")
+    
+    source = st.radio("Portfolio source", ["Listings sheet", "Upload CSV"], horizontal=True, key="portfolio_source")
+    portfolio_df = None
+    if source == "Listings sheet":
+        if get_sheet_manager() is None:
+            st.info("Upload Google Service Account credentials in the sidebar to rank the listings sheet.")
+        else:
+            portfolio_df = load_google_sheets_data()
+    else:
+        uploaded_file = st.file_uploader("Portfolio CSV", type=['csv'], key="portfolio_csv")
+        if uploaded_file is not None:
+            try:
+                portfolio_df = pd.read_csv(uploaded_file)
+            except Exception as e:
+                st.error(f"Error reading CSV: {str(e)}")
+    
+    if portfolio_df is None or portfolio_df.empty:
+        return
+    
+    portfolio_df = prepare_portfolio_frame(portfolio_df)
+    missing = missing_portfolio_columns(portfolio_df)
+    if missing:
+        aliases = {target: column for column, target in PORTFOLIO_COLUMN_ALIASES.items()}
+        names = ", ".join(f"{column} ({aliases[column]})" if column in aliases else column for column in missing)
+        st.warning(f"Ranking needs financial data this portfolio does not have: {names}. "
+                   "Add these columns to rank it.")
+        return
+    
+    ranked = report_generator.rank_portfolio(portfolio_df)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    tier_counts = ranked["tier"].value_counts()
+    with col1:
+        st.metric("Properties", len(ranked))
+    with col2:
+        st.metric("Strong", int(tier_counts.get("Strong", 0)))
+    with col3:
+        st.metric("Good", int(tier_counts.get("Good", 0)))
+    with col4:
+        st.metric("High Risk", int(tier_counts.get("High Risk", 0)))
+    
+    tier_filter = st.multiselect("Tiers", ["Strong", "Good", "High Risk"], default=["Strong", "Good", "High Risk"])
+    label_columns = [column for column in ["id", "formattedAddress", "address", "city", "state", "property_type"]
+                     if column in ranked.columns]
+    display_columns = ["rank", *label_columns, "score", "tier", "cap_rate", "cash_on_cash_return", "dscr",
+                       "occupancy_rate", "oer", "price", "reason_codes"]
+    display_columns = [column for column in display_columns if column in ranked.columns]
+    shown = ranked.loc[ranked["tier"].isin(tier_filter)]
+    st.dataframe(shown[display_columns], use_container_width=True, hide_index=True)
+    
+    st.download_button(
+        label="📥 Download Ranked Portfolio CSV",
+        data=ranked.to_csv(index=False),
+        file_name=f"portfolio_ranking_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv"
+    )
+    display_portfolio_html_report(report_generator, shown)
+    
+    display_portfolio_pdf_export(report_generator, shown)
+
 
 def get_demo_data():
     """Returns a sample DataFrame for demonstration purposes."""
@@ -1185,24 +4527,81 @@ def main():
     with tab4:
         reports_tab()
 
-def load_google_sheets_data() -> Optional[pd.DataFrame]:
+def load_google_sheets_data(force_refresh: bool = False) -> Optional[pd.DataFrame]:
     """Load data from Google Sheets using the session-managed sheets_manager"""
     sheets_manager = get_sheet_manager()
     if sheets_manager:
-        if sheets_manager.connect_to_sheet("1BWz_FnYdzZyyl4WafSgoZV9rLHC91XOjstDcgwn_k6Y"): # Hardcoded Sheet ID
-            return sheets_manager.get_all_data()
+        return sheets_manager.load_data(
+            GOOGLE_SHEET_ID, refresher=get_sheet_refresher(), force_refresh=force_refresh
+        )
     return None
 
-def apply_filters(df: pd.DataFrame, search_term: str, property_type_filter: str) -> pd.DataFrame:
-    """Apply search and filter to the dataframe"""
-    sheets_manager = get_sheet_manager()
-    if sheets_manager is None:
-        return df # Should not happen if sheets_manager is properly initialized
+def describe_sheet_load(sheets_manager: Optional[GoogleSheetsManager]) -> str:
+    """Describe where the last sheet load was served from"""
+    if sheets_manager is None or not sheets_manager.last_load_info:
+        return ""
+    info = sheets_manager.last_load_info
+    if info['source'] in ('stale-cache', 'snapshot'):
+        label = "cached copy" if info['source'] == 'stale-cache' else "local snapshot"
+        message = f"Showing {label} from {datetime.fromtimestamp(info['as_of']).strftime('%I:%M %p')}"
+        if info.get('refreshing'):
+            message += " — refreshing in the background"
+        if info.get('last_error'):
+            message += f" (last refresh failed: {info['last_error']})"
+        return message
+    return "Live data" if info['source'] == 'live' else "Cached data"
+
+def build_listing_query(search_term: str, property_type_filter: str, sort_by: str = None,
+                        limit: int = None, offset: int = 0) -> PropertyQuery:
+    """Build the listings query from the search, filter and sort widgets"""
+    filters = {}
+    if property_type_filter and property_type_filter != "All":
+        filters['propertyType'] = property_type_filter
+    return PropertyQuery(
+        search_term=search_term,
+        search_columns=SEARCH_INDEX_COLUMNS,
+        filters=filters,
+        sort_by=SORT_COLUMN_MAP.get(sort_by),
+        limit=limit,
+        offset=offset
+    )
+    
+def apply_filters(df: pd.DataFrame, search_term: str, property_type_filter: str, sort_by: str = None) -> pd.DataFrame:
+    """Apply search, filter and sort to the dataframe"""
+    filtered_df, _ = get_query_engine().execute(df, build_listing_query(search_term, property_type_filter, sort_by))
+    return filtered_df
 
-    df = sheets_manager.search_data(df, search_term, columns=['formattedAddress', 'city', 'state', 'propertyType'])
-    df = sheets_manager.filter_by_property_type(df, property_type_filter)
+def display_listing_page(df: pd.DataFrame, search_term: str, property_type_filter: str, sort_by: str):
+    """Query the listings and display one page of property cards"""
+    page_size_col, page_col, _ = st.columns([1, 1, 2])
+    with page_size_col:
+        page_size = st.selectbox("Properties per page", PROPERTY_PAGE_SIZE_OPTIONS, index=1, key="listing_page_size")
+    
+    # Count matches first so the page number can be clamped before its widget is drawn
+    engine = get_query_engine()
+    query = build_listing_query(search_term, property_type_filter, sort_by)
+    total = engine.count(df, query)
+    total_pages = max(1, -(-total // page_size))
+    
+    # Go back to the first page whenever the query or data changes
+    query_signature = (search_term, property_type_filter, sort_by, page_size, len(df))
+    if st.session_state.get('listing_query_signature') != query_signature:
+        st.session_state['listing_query_signature'] = query_signature
+        st.session_state['listing_page'] = 1
+    st.session_state['listing_page'] = min(max(st.session_state.get('listing_page', 1), 1), total_pages)
+    
+    with page_col:
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, step=1, key="listing_page")
+    
+    query.limit = page_size
+    query.offset = (page - 1) * page_size
+    page_df, _ = engine.execute(df, query)
     
-    return df
+    if total:
+        st.markdown(f"**Found {total} properties** · showing {query.offset + 1}–{query.offset + len(page_df)}")
+    else:
+        st.markdown("**Found 0 properties**")
+    display_property_cards(page_df)
 
 def display_property_cards(df):
     """Display properties in card format"""
@@ -1216,11 +4615,11 @@ def display_property_cards(df):
         
         with col1:
             if i < len(df):
-                display_single_property_card(df.iloc[i], i)
+                display_single_property_card(df.iloc[i], df.index[i])
         
         with col2:
             if i + 1 < len(df):
-                display_single_property_card(df.iloc[i + 1], i + 1)
+                display_single_property_card(df.iloc[i + 1], df.index[i + 1])
 
 def display_single_property_card(property_data, index):
     """Display a single property card with selection option"""
@@ -1243,8 +4642,8 @@ def display_single_property_card(property_data, index):
         current_address = property_data.get('formattedAddress', property_data.get('addressLine1', ''))
         is_selected = selected_address == current_address
     
-    # Create a unique key for this property
-    property_key = f"property_{index}_{hash(str(property_data))}"
+    # Create a stable key for this property from its id and row label
+    property_key = f"property_{property_data.get('id', '')}_{index}"
     
     # Apply selected styling if this property is selected
     card_class = "property-card selected-property" if is_selected else "property-card"
@@ -1305,17 +4704,19 @@ def property_listings_tab():
 
     if data_source == 'Live Google Sheet':
         if 'credentials' in st.session_state:
+            refresh_col, stats_col = st.columns([1, 3])
+            with refresh_col:
+                force_refresh = st.button("🔄 Refresh Data")
             try:
-                df = load_google_sheets_data()
+                df = load_google_sheets_data(force_refresh=force_refresh)
+                with stats_col:
+                    cache_stats = get_sheet_data_cache().stats()
+                    st.caption(f"{describe_sheet_load(get_sheet_manager())} · Sheet cache: "
+                               f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                               f"(TTL {cache_stats['ttl_seconds']}s)")
                 if df is not None and not df.empty:
-                    # Apply filters
-                    filtered_df = apply_filters(df, search_term, property_type_filter)
-                    
-                    # Show count
-                    st.markdown(f"**Found {len(filtered_df)} properties**")
-                    
-                    # Display properties in cards
-                    display_property_cards(filtered_df)
+                    # Query, paginate and display properties in cards
+                    display_listing_page(df, search_term, property_type_filter, sort_by)
                 else:
                     st.info("No data found in the Google Sheet.")
             except Exception as e:
@@ -1324,9 +4725,7 @@ def property_listings_tab():
             st.warning("Please upload Google Service Account credentials in the sidebar to view live property listings.")
     else: # Demo Data
         df = get_demo_data()
-        filtered_df = apply_filters(df, search_term, property_type_filter)
-        st.markdown(f"**Found {len(filtered_df)} properties**")
-        display_property_cards(filtered_df)
+        display_listing_page(df, search_term, property_type_filter, sort_by)
         
         # Show sample data structure
         st.markdown("### 📊 Expected Google Sheets Data Structure")
@@ -1376,6 +4775,15 @@ def address_submission_tab():
     
     st.markdown("Submit property addresses to the n8n webhook for processing.")
     
+    breaker = get_webhook_guards().breaker(N8N_WEBHOOK_URL)
+    breaker_state = breaker.state
+    if breaker_state == CircuitBreaker.OPEN:
+        st.warning(f"⚡ n8n webhook circuit is open: submissions fail fast "
+                   f"for the next {max(breaker.retry_after(), 1.0):.0f}s while the endpoint recovers.")
+    elif breaker_state == CircuitBreaker.HALF_OPEN:
+        st.warning("⚡ n8n webhook circuit is half-open: a probe request is checking whether the endpoint "
+                   "has recovered; other submissions fail fast until it answers.")
+    
     # Test webhook connection
     col1, col2 = st.columns([3, 1])
     with col2:
@@ -1403,6 +4811,13 @@ def address_submission_tab():
             property_type = st.selectbox("Property Type", ["Single Family", "Condo", "Townhouse", "Multi-Family", "Commercial"])
             notes = st.text_area("Additional Notes", placeholder="Any additional information...")
         
+        delivery_mode = st.radio(
+            "Delivery",
+            ["Queue in background", "Wait for webhook response"],
+            horizontal=True,
+            help="Queued submissions return a ticket immediately and are retried in the background"
+        )
+        
         submitted = st.form_submit_button("📤 Submit Address", use_container_width=True)
         
         if submitted:
@@ -1429,11 +4844,19 @@ def address_submission_tab():
                     # Format the data
                     formatted_data = webhook_manager.format_address_data(form_data)
                     
-                    # Send to webhook
-                    result = webhook_manager.send_address_data(formatted_data)
+                    if delivery_mode == "Queue in background":
+                        # Hand off to the outbox worker and return right away
+                        ticket_id = get_webhook_outbox_worker().submit(
+                            N8N_WEBHOOK_URL, webhook_manager.build_payload(formatted_data)
+                        )
+                        st.session_state.setdefault('webhook_tickets', []).insert(0, ticket_id)
+                        st.success(f"📨 Address queued for delivery. Ticket ID: `{ticket_id}`")
+                    else:
+                        # Send to webhook
+                        result = webhook_manager.send_address_data(formatted_data, on_attempt_failed=st.warning)
                     
-                    # Display result
-                    display_webhook_result(result)
+                        # Display result
+                        display_webhook_result(result)
                     
                     # Show warnings if any
                     if validation_result['warnings']:
@@ -1446,6 +4869,13 @@ def address_submission_tab():
                         st.error(f"• {error}")
             else:
                 st.error("Please fill in all required fields (marked with *).")
+    
+    display_outbox_status()
+    
+    display_webhook_diagnostics()
+    
+    st.markdown("---")
+    display_bulk_address_import()
 
 def property_input_tab():
     st.header("📊 Property Input for Reports")
@@ -1648,50 +5078,7 @@ def reports_tab():
                 st.error(f"• {r}")
         
         st.subheader("Download Reports")
-        col1, col2, col3 = st.columns(3)
-        
-        # HTML Report
-        html_report = report_generator.generate_html_report(property_data, metrics)
-        with col1:
-            st.download_button(
-                label="Download HTML Report",
-                data=html_report,
-                file_name="investment_report.html",
-                mime="text/html",
-                use_container_width=True
-            )
-            
-        # PDF Report
-        pdf_report = report_generator.generate_pdf_report(property_data, metrics)
-        with col2:
-            st.download_button(
-                label="Download PDF Report",
-                data=pdf_report,
-                file_name="investment_report.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
-            
-        # CSV Report
-        csv_report = report_generator.generate_csv_report(property_data, metrics)
-        with col3:
-            st.download_button(
-                label="Download CSV Report",
-                data=csv_report,
-                file_name="investment_report.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
-            
-        # JSON Report
-        json_report = report_generator.generate_json_report(property_data, metrics)
-        st.download_button(
-            label="Download JSON Report",
-            data=json_report,
-            file_name="investment_report.json",
-            mime="application/json",
-            use_container_width=True
-        )
+        display_report_downloads(report_generator, property_data, metrics)
         
         # Save to Google Sheets
         st.subheader("Save Analysis to Google Sheets")
@@ -1814,7 +5201,7 @@ def reports_tab():
                         all_data.get("timestamp", "")
                     ]
                     
-                    if sheets_manager.connect_to_sheet("1BWz_FnYdzZyyl4WafSgoZV9rLHC91XOjstDcgwn_k6Y", worksheet_name="Reports"):
+                    if sheets_manager.connect_to_sheet(GOOGLE_SHEET_ID, worksheet_name="Reports"):
                         sheets_manager.append_row(row_to_append)
                         st.success("✅ Analysis saved to Google Sheets successfully!")
                     else:
@@ -1826,6 +5213,9 @@ def reports_tab():
     else:
         st.info("Please enter property data in the 'Property Input' tab first to generate reports.")
 
+    st.markdown("---")
+    display_portfolio_ranking(report_generator)
+
 if __name__ == "__main__":
     main()
 
@@ -0,0 +1,219 @@
+"""Local stand-in for the n8n address webhook.
+
+Accepts the same POSTs the app sends to N8N_WEBHOOK_URL (single address payloads,
+gzip-encoded bodies included) and answers after a configurable latency, failing a
+configurable share of requests, so retry, backoff and circuit-breaker behaviour can
+be exercised offline.
+
+    python mock_n8n_server.py --port 5678 --latency-ms 150 --jitter-ms 50 --error-rate 0.1
+
+Point the app or webhook_load_test.py at http://127.0.0.1:5678/webhook/address.
+GET /stats returns request counters as JSON; POST /reset clears them.
+"""
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+
+class MockWebhookConfig:
+    """Behaviour of the mock webhook"""
+
+    def __init__(self, latency_ms: float = 100.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_statuses: Optional[List[int]] = None, hang_rate: float = 0.0, hang_seconds: float = 60.0,
+                 seed: Optional[int] = None):
+        """Initialize the mock behaviour
+
+        latency_ms/jitter_ms: response delay, drawn uniformly from latency ± jitter
+        error_rate: share of requests answered with a status from error_statuses
+        hang_rate: share of requests held for hang_seconds (to trigger client timeouts)
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [500, 502, 503]
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Dict[str, Any]:
+        """Pick the delay and status for one request"""
+        with self._lock:
+            roll = self.random.random()
+            if roll < self.hang_rate:
+                return {'delay': self.hang_seconds, 'status': 504}
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            if roll < self.hang_rate + self.error_rate:
+                return {'delay': delay, 'status': self.random.choice(self.error_statuses)}
+            return {'delay': delay, 'status': 200}
+
+
+class MockWebhookStats:
+    """Thread-safe counters for requests seen by the mock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clear all counters"""
+        with self._lock:
+            self.requests = 0
+            self.addresses = 0
+            self.bytes_received = 0
+            self.gzip_requests = 0
+            self.status_counts = {}
+            self.idempotency_keys = set()
+            self.duplicate_keys = 0
+            self.started_at = time.time()
+
+    def record(self, body_bytes: int, gzipped: bool, addresses: int, keys: List[str], status: int):
+        """Record one request"""
+        with self._lock:
+            self.requests += 1
+            self.addresses += addresses
+            self.bytes_received += body_bytes
+            self.gzip_requests += int(gzipped)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            for key in keys:
+                if key in self.idempotency_keys:
+                    self.duplicate_keys += 1
+                self.idempotency_keys.add(key)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters as a JSON-serializable dict"""
+        with self._lock:
+            elapsed = time.time() - self.started_at
+            return {
+                'requests': self.requests,
+                'addresses': self.addresses,
+                'bytes_received': self.bytes_received,
+                'gzip_requests': self.gzip_requests,
+                'status_counts': {str(code): count for code, count in sorted(self.status_counts.items())},
+                'unique_idempotency_keys': len(self.idempotency_keys),
+                'duplicate_idempotency_keys': self.duplicate_keys,
+                'elapsed_seconds': elapsed,
+                'requests_per_second': self.requests / elapsed if elapsed > 0 else 0.0
+            }
+
+
+def extract_addresses(payload: Any) -> List[Dict[str, Any]]:
+    """Return the address records in a payload (a single address or a batch envelope)"""
+    if isinstance(payload, dict) and isinstance(payload.get('addresses'), list):
+        return [item for item in payload['addresses'] if isinstance(item, dict)]
+    if isinstance(payload, dict):
+        return [payload]
+    return []
+
+
+def make_handler(config: MockWebhookConfig, stats: MockWebhookStats):
+    """Build a request handler class bound to a config and stats instance"""
+
+    class MockWebhookHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like n8n behind a reverse proxy
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def _send_json(self, status: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip('/') == '/stats':
+                self._send_json(200, stats.snapshot())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+            if self.path.rstrip('/') == '/reset':
+                stats.reset()
+                self._send_json(200, {'reset': True})
+                return
+
+            gzipped = self.headers.get('Content-Encoding', '').lower() == 'gzip'
+            try:
+                payload = json.loads(gzip.decompress(raw) if gzipped else raw or b'{}')
+            except (OSError, ValueError):
+                stats.record(len(raw), gzipped, 0, [], 400)
+                self._send_json(400, {'error': 'invalid JSON body'})
+                return
+
+            addresses = extract_addresses(payload)
+            keys = [item['idempotencyKey'] for item in addresses if item.get('idempotencyKey')]
+            if not keys and self.headers.get('Idempotency-Key'):
+                keys = [self.headers['Idempotency-Key']]
+
+            outcome = config.draw()
+            time.sleep(outcome['delay'])
+            stats.record(len(raw), gzipped, len(addresses), keys, outcome['status'])
+            if outcome['status'] == 200:
+                self._send_json(200, {'message': 'Workflow was started', 'received': len(addresses)})
+            else:
+                self._send_json(outcome['status'], {'error': 'mock failure'})
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockWebhookHandler
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, config: Optional[MockWebhookConfig] = None):
+    """Start the mock server on a daemon thread and return (server, stats, base_url)
+
+    Port 0 picks a free port. Call server.shutdown() to stop it.
+    """
+    config = config or MockWebhookConfig()
+    stats = MockWebhookStats()
+    server = ThreadingHTTPServer((host, port), make_handler(config, stats))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-n8n", daemon=True).start()
+    return server, stats, f"http://{host}:{server.server_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the n8n address webhook")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Mean response delay")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform jitter around the delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail (0-1)")
+    parser.add_argument("--error-statuses", default="500,502,503",
+                        help="Comma-separated status codes used for failures")
+    parser.add_argument("--hang-rate", type=float, default=0.0,
+                        help="Share of requests held for --hang-seconds to force client timeouts")
+    parser.add_argument("--hang-seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockWebhookConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_statuses=[int(code) for code in args.error_statuses.split(',') if code.strip()],
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config, MockWebhookStats()))
+    server.daemon_threads = True
+    print(f"Mock n8n webhook listening on http://{args.host}:{args.port}/webhook/address (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
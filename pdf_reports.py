@@ -0,0 +1,215 @@
+"""ReportLab layout for the property PDF reports.
+
+Kept apart from app.py so batch export worker processes can render reports without
+importing Streamlit or the app: everything here depends only on ReportLab and the
+plain dicts the app passes in (property data, metrics and the investment analysis).
+"""
+
+import functools
+import io
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+
+class ReportStyleRegistry:
+    """ReportLab paragraph styles, table styles and column layouts for the PDF reports
+
+    One instance per process is shared by every report generator (see
+    get_report_style_registry), so it is read-only after construction: the table
+    styles and column layouts are read-only mappings, and the ReportLab stylesheet
+    must not be added to or edited outside setup_custom_styles. A report that needs
+    a variant style builds its own ParagraphStyle with the shared one as parent.
+    """
+
+    def __init__(self):
+        """Build the sample stylesheet, the custom styles and the table templates"""
+        self.styles = getSampleStyleSheet()
+        self.setup_custom_styles()
+        self.table_styles = MappingProxyType({
+            "data": TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
+                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#ecf0f1'))
+            ])
+        })
+        # Column widths per table layout
+        self.column_widths = MappingProxyType({
+            "key_value": (2 * inch, 4 * inch),
+            "metrics": (2 * inch, 1.5 * inch, 1.5 * inch, 1.5 * inch),
+            "ranking": (0.5 * inch, 2.9 * inch, 0.6 * inch, 0.8 * inch, 0.8 * inch, 0.9 * inch, 0.6 * inch)
+        })
+
+    def setup_custom_styles(self):
+        """Setup custom styles for PDF generation"""
+        self.styles.add(ParagraphStyle(
+            name='CustomTitle',
+            parent=self.styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=1,  # Center alignment
+            textColor=colors.HexColor('#2c3e50')
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='CustomHeading',
+            parent=self.styles['Heading2'],
+            fontSize=16,
+            spaceAfter=12,
+            textColor=colors.HexColor('#34495e'),
+            borderWidth=1,
+            borderColor=colors.HexColor('#3498db'),
+            leftIndent=10
+        ))
+
+        self.styles.add(ParagraphStyle(
+            name='CustomBody',
+            parent=self.styles['Normal'],
+            fontSize=11,
+            spaceAfter=6,
+            leftIndent=10
+        ))
+
+    def table(self, rows: List[List[Any]], layout: str, style: str = "data", **kwargs) -> Table:
+        """Build a Table with a registered column layout and table style"""
+        t = Table(rows, colWidths=self.column_widths[layout], **kwargs)
+        t.setStyle(self.table_styles[style])
+        return t
+
+
+@functools.lru_cache(maxsize=None)
+def get_report_style_registry() -> ReportStyleRegistry:
+    """Get the process-wide report style registry, built on first use"""
+    return ReportStyleRegistry()
+
+
+def build_property_pdf(style_registry: ReportStyleRegistry, property_data: Dict[str, Any],
+                       metrics: Dict[str, float], analysis: Dict[str, Any]) -> bytes:
+    """Lay out the single-property investment report and return the PDF bytes
+
+    style_registry is usually the shared one, so its styles are only read here.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = style_registry.styles
+
+    story = []
+
+    # Title
+    story.append(Paragraph("🏠 Real Estate Investment Analysis", styles["CustomTitle"]))
+    story.append(Paragraph("Comprehensive Property Investment Report", styles["h2"]))
+    story.append(Paragraph(f"Report Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles["Normal"]))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # Property Overview
+    story.append(Paragraph("🏠 Property Overview", styles["CustomHeading"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    property_data_table = [
+        ["Address:", property_data.get('address', 'N/A')],
+        ["Purchase Price:", f"${property_data.get('price', 0):,.2f}"],
+        ["Square Footage:", f"{property_data.get('square_footage', 0):,} sq ft"],
+        ["Property Type:", property_data.get('property_type', 'N/A')],
+        ["Bedrooms:", property_data.get('bedrooms', 0)],
+        ["Bathrooms:", property_data.get('bathrooms', 0)],
+        ["Year Built:", property_data.get('year_built', 'N/A')],
+        ["Lot Size:", f"{property_data.get('lot_size', 0):,.0f} sq ft"]
+    ]
+
+    story.append(style_registry.table(property_data_table, "key_value"))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # Financial Summary
+    story.append(Paragraph("💰 Financial Summary", styles["CustomHeading"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    financial_data_table = [
+        ["Net Operating Income:", f"${property_data.get('noi', 0):,.2f}"],
+        ["Cash Invested:", f"${property_data.get('cash_invested', 0):,.2f}"],
+        ["Gross Rental Income:", f"${property_data.get('gross_rental_income', 0):,.2f}"],
+        ["Operating Expenses:", f"${property_data.get('operating_expenses', 0):,.2f}"]
+    ]
+
+    story.append(style_registry.table(financial_data_table, "key_value"))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # Investment Metrics
+    story.append(Paragraph("📊 Investment Metrics", styles["CustomHeading"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    metrics_data = [
+        ["Metric", "Value", "Industry Benchmark", "Assessment"],
+        ["Annual Cash Flow", f"${metrics['annual_cash_flow']:,.2f}", "Positive", 'Excellent' if metrics['annual_cash_flow'] > 0 else 'Needs Improvement'],
+        ["Cash-on-Cash Return", f"{metrics['cash_on_cash_return']:.2f}%", "8-12%", 'Excellent' if metrics['cash_on_cash_return'] >= 12 else 'Good' if metrics['cash_on_cash_return'] >= 8 else 'Fair' if metrics['cash_on_cash_return'] >= 5 else 'Poor'],
+        ["Cap Rate", f"{metrics['cap_rate']:.2f}%", "6-10%", 'Excellent' if metrics['cap_rate'] >= 8 else 'Good' if metrics['cap_rate'] >= 6 else 'Fair' if metrics['cap_rate'] >= 4 else 'Poor'],
+        ["Debt Service Coverage Ratio", f"{metrics['dscr']:.2f}", "1.25+", 'Excellent' if metrics['dscr'] >= 1.5 else 'Good' if metrics['dscr'] >= 1.25 else 'Fair' if metrics['dscr'] >= 1.0 else 'Poor'],
+        ["Gross Rental Yield", f"{metrics['gross_rental_yield']:.2f}%", "8-12%", 'Excellent' if metrics['gross_rental_yield'] >= 10 else 'Good' if metrics['gross_rental_yield'] >= 8 else 'Fair' if metrics['gross_rental_yield'] >= 6 else 'Poor'],
+        ["Price per Square Foot", f"${metrics['price_per_sqft']:.2f}", "Market Dependent", "Market Analysis Required"],
+        ["Operating Expense Ratio (OER)", f"{metrics['oer']:.2f}%", "30-50%", 'Excellent' if metrics['oer'] <= 35 else 'Good' if metrics['oer'] <= 50 else 'Fair' if metrics['oer'] <= 60 else 'Poor'],
+        ["Return on Investment (ROI)", f"{metrics['roi']:.2f}%", "10-20%", 'Excellent' if metrics['roi'] >= 20 else 'Good' if metrics['roi'] >= 10 else 'Fair' if metrics['roi'] >= 5 else 'Poor'],
+        ["Occupancy Rate", f"{metrics['occupancy_rate']:.2f}%", "90-95%", 'Excellent' if metrics['occupancy_rate'] >= 95 else 'Good' if metrics['occupancy_rate'] >= 90 else 'Fair' if metrics['occupancy_rate'] >= 70 else 'Poor'],
+        ["Net Yield", f"{metrics['net_yield']:.2f}%", "5-10%", 'Excellent' if metrics['net_yield'] >= 8 else 'Good' if metrics['net_yield'] >= 5 else 'Fair' if metrics['net_yield'] >= 3 else 'Poor'],
+        ["Break-Even Ratio", f"{metrics['break_even_ratio']:.2f}%", "< 85%", 'Excellent' if metrics['break_even_ratio'] < 75 else 'Good' if metrics['break_even_ratio'] < 85 else 'Fair' if metrics['break_even_ratio'] < 95 else 'Poor']
+    ]
+
+    story.append(style_registry.table(metrics_data, "metrics"))
+    story.append(Spacer(1, 0.2 * inch))
+
+    # Investment Analysis & Recommendations
+    story.append(Paragraph("💡 Investment Analysis & Recommendations", styles["CustomHeading"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    story.append(Paragraph(f"Overall Score: {analysis['score']}/100", styles["h3"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    story.append(Paragraph("Summary:", styles["h4"]))
+    for s in analysis['summary']:
+        story.append(Paragraph(f"• {s}", styles["CustomBody"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    story.append(Paragraph("Recommendations:", styles["h4"]))
+    for r in analysis['recommendations']:
+        story.append(Paragraph(f"• {r}", styles["CustomBody"]))
+    story.append(Spacer(1, 0.1 * inch))
+
+    if analysis['warnings']:
+        story.append(Paragraph("Warnings:", styles["h4"]))
+        for w in analysis['warnings']:
+            story.append(Paragraph(f"• {w}", styles["CustomBody"]))
+        story.append(Spacer(1, 0.1 * inch))
+
+    if analysis['risks']:
+        story.append(Paragraph("Risks:", styles["h4"]))
+        for r in analysis['risks']:
+            story.append(Paragraph(f"• {r}", styles["CustomBody"]))
+        story.append(Spacer(1, 0.1 * inch))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
+def render_pdf_reports(items: List[Tuple[str, Dict[str, Any], Dict[str, float], Dict[str, Any]]]) -> List[Tuple[str, Optional[bytes], Optional[str]]]:
+    """Render a chunk of (file name, property data, metrics, analysis) into PDFs
+
+    Runs inside the batch export worker processes. Returns (file name, PDF bytes or
+    None, error or None) for each item; the style registry is built once per process.
+    """
+    style_registry = get_report_style_registry()
+    results = []
+    for file_name, property_data, metrics, analysis in items:
+        try:
+            results.append((file_name, build_property_pdf(style_registry, property_data, metrics, analysis), None))
+        except Exception as e:
+            results.append((file_name, None, str(e)))
+    return results
@@ -0,0 +1,288 @@
+"""Load-test harness for the app's webhook delivery path.
+
+Drives WebhookManager.deliver_payload (or the bulk sender, batch envelopes or
+the background outbox) at a target request rate and reports throughput and tail latency. Combine with
+mock_n8n_server.py to measure retry, backoff and circuit-breaker behaviour offline:
+
+    python webhook_load_test.py --spawn-mock --mock-latency-ms 120 --mock-error-rate 0.05 --rps 50 --requests 500
+    python webhook_load_test.py --url http://127.0.0.1:5678/webhook/address --mode bulk --requests 2000
+    python webhook_load_test.py --mode batch --batch-size 50 --linger 0.25 --rps 200 --requests 2000
+
+Latency is measured from each request's scheduled start time, so queueing delay
+caused by a slow endpoint shows up in the percentiles instead of being hidden.
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Importing the app runs its module-level Streamlit calls in bare mode; keep that quiet.
+# Streamlit resets its loggers when it first parses config, so parse it before lowering them.
+import streamlit.config  # noqa: E402
+import streamlit.logger  # noqa: E402
+streamlit.config.get_config_options()
+streamlit.logger.set_log_level("error")
+
+import app  # noqa: E402
+from mock_n8n_server import MockWebhookConfig, start_mock_server  # noqa: E402
+
+logger = logging.getLogger("webhook_load_test")
+
+
+def make_addresses(count: int, run_id: str) -> pd.DataFrame:
+    """Build count distinct formatted addresses (distinct so idempotency keys never collide)"""
+    states = ['CA', 'NY', 'TX', 'FL', 'WA', 'IL', 'MA', 'CO']
+    raw = pd.DataFrame({
+        'addressLine1': [f"{i + 1} Load Test Ave" for i in range(count)],
+        'addressLine2': [f"Run {run_id}" for _ in range(count)],
+        'city': ['Testville'] * count,
+        'state': [states[i % len(states)] for i in range(count)],
+        'zipCode': [f"{10000 + i % 89999:05d}" for i in range(count)],
+        'county': ['Test County'] * count,
+        'propertyType': ['Single Family'] * count,
+        'notes': ['webhook load test'] * count
+    })
+    return app.AddressValidationEngine().normalize(raw)
+
+
+def build_guards(url: str, args) -> Optional[app.WebhookGuardRegistry]:
+    """Circuit breaker and rate limiter registry for the run, or None with --no-guards"""
+    if args.no_guards:
+        return None
+    rate_limits = {url: (args.rate_limit, max(1, int(args.rate_limit * 2)))} if args.rate_limit else {}
+    return app.WebhookGuardRegistry(rate_limits=rate_limits, default_rate_limit=(1e9, 10 ** 9))
+
+
+def build_manager(url: str, args, guards: Optional[app.WebhookGuardRegistry]) -> app.WebhookManager:
+    """Create a webhook manager wired like the app's, with its own metrics"""
+    manager = app.WebhookManager(
+        url,
+        transport=app.WebhookTransport(pool_maxsize=max(args.concurrency, app.WEBHOOK_POOL_MAXSIZE)),
+        guards=guards,
+        delivered_keys=app.DeliveredKeyCache(),
+        metrics=app.WebhookMetrics()
+    )
+    manager.timeout = args.timeout
+    manager.max_retries = args.max_retries
+    return manager
+
+
+def run_paced(manager: app.WebhookManager, records: List[Dict[str, Any]], rps: float,
+              concurrency: int) -> List[Dict[str, Any]]:
+    """Send one address per request at a fixed arrival rate (open loop)"""
+    results = [None] * len(records)
+    sent_at = [0.0] * len(records)
+    start = time.perf_counter()
+
+    def send(position: int, scheduled: float):
+        result = manager.deliver_payload(manager.build_payload(records[position]), on_attempt_failed=logger.debug)
+        finished = time.perf_counter()
+        results[position] = {
+            'success': result['success'],
+            'attempts': result.get('attempt', 0),
+            'latency': finished - scheduled,
+            'service_time': finished - max(scheduled, sent_at[position])
+        }
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load-test") as executor:
+        for position in range(len(records)):
+            scheduled = start + position / rps if rps > 0 else start
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            sent_at[position] = time.perf_counter()
+            executor.submit(send, position, scheduled)
+    return results
+
+
+def run_batched(manager: app.WebhookManager, records: List[Dict[str, Any]], rps: float, batch_size: int,
+                linger: float, compress: bool, concurrency: int) -> List[Dict[str, Any]]:
+    """Submit addresses to a WebhookBatcher at a fixed arrival rate and wait for every batch"""
+    batcher = app.WebhookBatcher(manager, batch_size=batch_size, linger_seconds=linger, compress=compress,
+                                 max_in_flight=concurrency)
+    results = [None] * len(records)
+    start = time.perf_counter()
+
+    def on_done(position: int, scheduled: float, future):
+        finished = time.perf_counter()
+        result = future.result()
+        results[position] = {'success': result['success'], 'attempts': result.get('attempt', 0),
+                             'latency': finished - scheduled, 'service_time': finished - scheduled}
+
+    for position, record in enumerate(records):
+        scheduled = start + position / rps if rps > 0 else start
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        future = batcher.submit(record)
+        future.add_done_callback(lambda f, p=position, t=scheduled: on_done(p, t, f))
+    batcher.close()
+    return results
+
+
+def run_bulk(manager: app.WebhookManager, addresses: pd.DataFrame, concurrency: int, batch_size: int = 0,
+             compress: bool = False) -> List[Dict[str, Any]]:
+    """Send every address through BulkWebhookSender as fast as the pool allows"""
+    start = time.perf_counter()
+    delivery = app.BulkWebhookSender(manager, max_workers=concurrency).send_frame(
+        addresses, batch_size=batch_size or None, compress=compress
+    )
+    elapsed = time.perf_counter() - start
+    # Per-row latency is not observable through the bulk sender; report the batch wall time
+    return [
+        {'success': bool(row.delivered), 'attempts': row.attempts, 'latency': elapsed, 'service_time': elapsed}
+        for row in delivery.itertuples()
+    ]
+
+
+def run_outbox(manager: app.WebhookManager, guards: Optional[app.WebhookGuardRegistry],
+               records: List[Dict[str, Any]], rps: float, drain_timeout: float) -> List[Dict[str, Any]]:
+    """Enqueue addresses in a throwaway outbox at the target rate and wait for the worker to drain it"""
+    path = os.path.join(tempfile.mkdtemp(prefix="webhook-load-"), "outbox.sqlite3")
+    worker = app.WebhookOutboxWorker(
+        app.WebhookOutbox(path), transport=manager.transport, guards=guards, metrics=manager.metrics,
+        delivered_keys=manager.delivered_keys, poll_interval=0.05
+    )
+    worker.start()
+    start = time.perf_counter()
+    tickets = []
+    for position, record in enumerate(records):
+        delay = start + (position / rps if rps > 0 else 0) - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        tickets.append(worker.submit(manager.webhook_url, manager.build_payload(record)))
+
+    deadline = time.perf_counter() + drain_timeout
+    while time.perf_counter() < deadline:
+        stats = worker.outbox.stats()
+        if stats.get('pending', 0) + stats.get('sending', 0) == 0:
+            break
+        time.sleep(0.1)
+    worker.stop()
+
+    statuses = {status['ticket_id']: status for status in worker.outbox.get_statuses(tickets)}
+    return [
+        {
+            'success': statuses[ticket]['status'] == 'delivered',
+            'attempts': statuses[ticket]['attempts'],
+            'latency': statuses[ticket]['updated_at'] - statuses[ticket]['created_at'],
+            'service_time': statuses[ticket]['updated_at'] - statuses[ticket]['created_at']
+        }
+        for ticket in tickets
+    ]
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, manager: app.WebhookManager) -> Dict[str, Any]:
+    """Throughput, success and latency percentiles for a run"""
+    latencies = np.array([r['latency'] for r in results], dtype=float)
+    successes = sum(1 for r in results if r['success'])
+    p50, p90, p95, p99 = np.percentile(latencies, [50, 90, 95, 99]) if len(latencies) else (0, 0, 0, 0)
+    return {
+        'requests': len(results),
+        'succeeded': successes,
+        'failed': len(results) - successes,
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(results) / elapsed if elapsed > 0 else 0.0,
+        'latency_seconds': {
+            'p50': float(p50), 'p90': float(p90), 'p95': float(p95), 'p99': float(p99),
+            'max': float(latencies.max()) if len(latencies) else 0.0
+        },
+        'webhook_metrics': manager.metrics.snapshot(),
+        'circuit': manager.breaker.snapshot() if manager.breaker is not None else None
+    }
+
+
+def print_report(summary: Dict[str, Any], mock_stats: Dict[str, Any] = None):
+    latency = summary['latency_seconds']
+    metrics = summary['webhook_metrics']
+    print(f"Requests:     {summary['requests']} ({summary['succeeded']} ok, {summary['failed']} failed)")
+    print(f"Elapsed:      {summary['elapsed_seconds']:.2f}s")
+    print(f"Throughput:   {summary['throughput_rps']:.1f} req/s")
+    print("Latency:      p50 {p50:.3f}s  p90 {p90:.3f}s  p95 {p95:.3f}s  p99 {p99:.3f}s  max {max:.3f}s".format(**latency))
+    if metrics['latency']:
+        print("Per attempt:  p50 {p50:.3f}s  p95 {p95:.3f}s  p99 {p99:.3f}s".format(**metrics['latency']))
+    print(f"HTTP attempts: {metrics['attempts']}  bytes sent: {metrics['bytes_sent']}  status counts: {metrics['status_counts']}  "
+          f"errors: {metrics['error_counts']}")
+    print(f"Attempts per delivery: {metrics['attempts_per_delivery']}  refused locally: {metrics['rejections']}")
+    if summary['circuit']:
+        print(f"Circuit:      {summary['circuit']['state']} (opened {summary['circuit']['times_opened']} times)")
+    if mock_stats:
+        print(f"Mock server:  {mock_stats['requests']} requests, {mock_stats['addresses']} addresses, "
+              f"{mock_stats['bytes_received']} bytes, duplicate keys {mock_stats['duplicate_idempotency_keys']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the webhook delivery path")
+    parser.add_argument("--url", help="Webhook URL (defaults to the spawned mock)")
+    parser.add_argument("--mode", choices=["send", "bulk", "batch", "outbox"], default="send",
+                        help="send: deliver_payload per request; bulk: BulkWebhookSender; "
+                             "batch: WebhookBatcher envelopes; outbox: background queue")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rps", type=float, default=20.0, help="Target arrival rate (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=app.BULK_IMPORT_MAX_WORKERS)
+    parser.add_argument("--timeout", type=float, default=30.0, help="WebhookManager.timeout")
+    parser.add_argument("--max-retries", type=int, default=3, help="WebhookManager.max_retries")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Client rate limit in req/s (0 = off)")
+    parser.add_argument("--no-guards", action="store_true", help="Disable the circuit breaker and rate limiter")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Addresses per envelope (batch mode default: app.WEBHOOK_BATCH_SIZE; bulk: 0 = off)")
+    parser.add_argument("--linger", type=float, default=app.WEBHOOK_BATCH_LINGER_SECONDS,
+                        help="Batch mode: max seconds a partial batch waits")
+    parser.add_argument("--no-gzip", action="store_true", help="Send batch envelopes uncompressed")
+    parser.add_argument("--drain-timeout", type=float, default=300.0, help="Outbox mode: max wait for delivery")
+    parser.add_argument("--spawn-mock", action="store_true", help="Run mock_n8n_server in-process")
+    parser.add_argument("--mock-latency-ms", type=float, default=100.0)
+    parser.add_argument("--mock-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-hang-rate", type=float, default=0.0)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    mock_stats = None
+    if args.spawn_mock or not args.url:
+        config = MockWebhookConfig(latency_ms=args.mock_latency_ms, jitter_ms=args.mock_jitter_ms,
+                                   error_rate=args.mock_error_rate, hang_rate=args.mock_hang_rate,
+                                   hang_seconds=args.timeout + 1)
+        server, mock_stats, base_url = start_mock_server(config=config)
+        url = args.url or f"{base_url}/webhook/address"
+    else:
+        url = args.url
+
+    guards = build_guards(url, args)
+    manager = build_manager(url, args, guards)
+    addresses = make_addresses(args.requests, run_id=str(int(time.time())))
+    records = addresses.to_dict('records')
+
+    start = time.perf_counter()
+    if args.mode == "bulk":
+        results = run_bulk(manager, addresses, args.concurrency, args.batch_size, not args.no_gzip)
+    elif args.mode == "batch":
+        results = run_batched(manager, records, args.rps, args.batch_size or app.WEBHOOK_BATCH_SIZE,
+                              args.linger, not args.no_gzip, args.concurrency)
+    elif args.mode == "outbox":
+        results = run_outbox(manager, guards, records, args.rps, args.drain_timeout)
+    else:
+        results = run_paced(manager, records, args.rps, args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results, elapsed, manager)
+    summary.update({'mode': args.mode, 'url': url, 'target_rps': args.rps, 'concurrency': args.concurrency})
+    if mock_stats is not None:
+        summary['mock_server'] = mock_stats.snapshot()
+
+    if args.json:
+        print(json.dumps(summary, indent=2, default=str))
+    else:
+        print_report(summary, summary.get('mock_server'))
+
+
+if __name__ == "__main__":
+    main()